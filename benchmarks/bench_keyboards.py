@@ -0,0 +1,200 @@
+"""
+Микро-бенчмарки чистых функций handlers/keyboards.py.
+
+Запуск:
+    python -m benchmarks.bench_keyboards [--sizes 1000,10000,100000]
+        [--output results.json] [--baseline benchmarks/baseline.json] [--threshold 0.25]
+
+Для каждого размера хранилище заполняется играми, пользователями и
+участниками, затем замеряется время каждой функции (медиана по повторам)
+и пик выделенной памяти через tracemalloc. Результат пишется в JSON;
+при указании --baseline время сравнивается с базовым и превышение
+порога считается регрессией (код возврата 1).
+
+Абсолютное время зависит от машины, поэтому сравнение идет по времени,
+нормированному на калибровочный цикл (поле relative): серии функции
+и калибровки чередуются в том же процессе. Так базу, снятую на одной
+машине, можно проверять на другой; отношение зависит от версии Python
+и процессора, поэтому базу стоит обновлять при их смене.
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from handlers import keyboards
+
+# Размеры хранилища (количество игр) по умолчанию
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEATS = 7
+# Минимальное время одного замера, чтобы уменьшить шум таймера
+MIN_MEASURE_TIME = 0.05
+
+
+def fill_store(games_count: int, users_count: int, memberships_per_user: int, seed: int = 42):
+    """Заполняет хранилище играми и участниками"""
+    keyboards.reset_store()
+    rng = random.Random(seed)
+    
+    for index in range(games_count):
+        creator_id = rng.randint(1, users_count)
+        keyboards.add_game({
+            'title': f"Игра {index} " + rng.choice(['Мафия', 'Монополия', 'Шахматы', 'Диксит']),
+            'date': '15.01.2030 19:00',
+            'location': 'Кафе',
+            'max_players': rng.randint(2, 20),
+            'creator': f"user{creator_id}",
+            'creator_id': creator_id,
+        }, None)
+    
+    for user_id in range(1, users_count + 1):
+        for game in rng.sample(keyboards.games, min(memberships_per_user, games_count)):
+            if user_id in game['player_ids'] or len(game['player_ids']) >= game['max_players']:
+                continue
+            keyboards.add_player_to_game(game, f"user{user_id}", user_id)
+
+
+def calibrate_loops(function, *args) -> int:
+    """Подбирает число вызовов на один замер (не короче MIN_MEASURE_TIME)"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function(*args)
+        if time.perf_counter() - started >= MIN_MEASURE_TIME or loops >= 1 << 20:
+            return loops
+        loops *= 2
+
+
+def time_loops(function, args, loops: int) -> float:
+    """Среднее время одного вызова в серии из loops вызовов"""
+    started = time.perf_counter()
+    for _ in range(loops):
+        function(*args)
+    return (time.perf_counter() - started) / loops
+
+
+def calibration_workload():
+    """Калибровочный цикл: типичные для хранилища операции со словарями, списками и строками"""
+    data = {}
+    for index in range(1000):
+        data[index] = f"user{index}"
+    return sum(len(value) for value in data.values() if value.startswith('user'))
+
+
+def measure(function, *args) -> dict:
+    """
+    Замеряет время вызова (медиана по повторам), время относительно
+    калибровочного цикла и пик памяти. Серии функции и калибровки чередуются,
+    поэтому каждое отношение снято в одном состоянии машины
+    """
+    loops = calibrate_loops(function, *args)
+    calibration_loops = calibrate_loops(calibration_workload)
+    
+    samples = []
+    ratios = []
+    # Как в timeit: сборщик мусора не срабатывает посреди серии
+    gc.disable()
+    try:
+        for _ in range(DEFAULT_REPEATS):
+            sample = time_loops(function, args, loops)
+            samples.append(sample)
+            ratios.append(sample / time_loops(calibration_workload, (), calibration_loops))
+    finally:
+        gc.enable()
+    
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'relative': statistics.median(ratios),
+        'loops': loops,
+        'peak_bytes': peak,
+    }
+
+
+def run_size(size: int) -> dict:
+    """Запускает все бенчмарки для одного размера хранилища"""
+    users_count = max(10, size // 10)
+    fill_store(size, users_count, memberships_per_user=3)
+    
+    user_id = keyboards.games[len(keyboards.games) // 2]['creator_id']
+    sample_game = keyboards.games[-1]
+    button_text = keyboards.format_game_button(sample_game, user_id)
+    title_part = sample_game['title'][:10]
+    
+    return {
+        'format_game_button': measure(keyboards.format_game_button, sample_game, user_id),
+        'parse_game_button': measure(keyboards.parse_game_button, button_text),
+        'get_user_games': measure(keyboards.get_user_games, user_id),
+        'get_active_games': measure(keyboards.get_active_games),
+        'get_games_keyboard': measure(keyboards.get_games_keyboard, user_id),
+        'get_game_by_title_partial': measure(keyboards.get_game_by_title_partial, title_part),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Возвращает список регрессий относительно базовых результатов"""
+    regressions = []
+    for size, functions in results['results'].items():
+        for name, result in functions.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            # Базы без калибровки (старый формат) сравниваются по абсолютному времени
+            key = 'relative' if 'relative' in base and 'relative' in result else 'median'
+            ratio = result[key] / base[key] if base[key] else 1.0
+            if ratio > 1.0 + threshold:
+                regressions.append(f"{name}@{size}: {key} {base[key]:.3g} -> {result[key]:.3g} (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки handlers/keyboards.py")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="размеры хранилища через запятую")
+    parser.add_argument('--output', help="записать результаты в JSON-файл")
+    parser.add_argument('--baseline', help="сравнить с базовыми результатами")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="допустимое замедление относительно базы (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    # Логи функций не должны влиять на замеры
+    logging.disable(logging.CRITICAL)
+    
+    results = {
+        'python': platform.python_version(),
+        'results': {},
+    }
+    for size in (int(size) for size in args.sizes.split(',')):
+        functions = run_size(size)
+        results['results'][str(size)] = functions
+        for name, result in functions.items():
+            print(f"{size:>7} {name:<28} {result['median'] * 1e6:>12.2f} мкс "
+                  f"{result['relative']:>10.4f} калибр. {result['peak_bytes']:>12} байт")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print("\n❌ Регрессии:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print("\n✅ Регрессий нет")
+
+
+if __name__ == '__main__':
+    main()
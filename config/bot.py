@@ -2,6 +2,8 @@ import os
 import logging
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 from dotenv import load_dotenv
+from config.transport import build_api_request, build_updates_request, build_shared_requests
+from utils.namespaces import NAMESPACE_NAME
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -13,20 +15,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_application() -> Application:
+def create_application(post_init=None, post_stop=None, token=None,
+                       request=None, get_updates_request=None) -> Application:
 
     # Получаем токен из переменных окружения
-    TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+    TOKEN = token or os.getenv('TELEGRAM_BOT_TOKEN')
     
     if not TOKEN:
         logger.error("TELEGRAM_BOT_TOKEN не найден в .env файле!")
         raise ValueError("Токен бота не указан")
     
-    # Создаем приложение
-    application = Application.builder().token(TOKEN).build()
+    # Создаем приложение с отдельными пулами для API и get_updates
+    builder = (
+        Application.builder()
+        .token(TOKEN)
+        .request(request or build_api_request())
+        .get_updates_request(get_updates_request or build_updates_request())
+    )
+    if post_init:
+        builder = builder.post_init(post_init)
+    if post_stop:
+        builder = builder.post_stop(post_stop)
+    application = builder.build()
     
     return application
 
+def create_hosted_applications(bots: list, post_init=None, post_stop=None) -> list:
+    """
+    Создает приложения для нескольких ботов одного процесса: [(имя, токен), ...].
+    Боты используют общие пулы соединений, имя бота сохраняется в bot_data['namespace'].
+    """
+    names = set()
+    for bot in bots:
+        if len(bot) != 2 or not all(bot) or not NAMESPACE_NAME.match(bot[0]) or bot[0] in names:
+            raise ValueError(f"Некорректная запись TELEGRAM_BOTS: '{'='.join(bot)}' (ожидается уникальное имя=токен)")
+        names.add(bot[0])
+    
+    shared_api, shared_updates = build_shared_requests(len(bots))
+    applications = []
+    for name, token in bots:
+        application = create_application(
+            post_init=post_init,
+            post_stop=post_stop,
+            token=token,
+            request=build_api_request(shared_api, name),
+            get_updates_request=shared_updates
+        )
+        application.bot_data['namespace'] = name
+        applications.append(application)
+    
+    logger.info(f"🤖 Ботов в процессе: {len(applications)} ({', '.join(name for name, _ in bots)})")
+    return applications
+
 # Глобальная переменная application
 users = {}
 users_language = {}
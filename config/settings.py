@@ -0,0 +1,161 @@
+import os
+from dotenv import load_dotenv
+
+# Загрузка переменных окружения
+load_dotenv()
+
+
+def env_int(name: str, default: int) -> int:
+    """Читает целое число из переменной окружения"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Читает дробное число из переменной окружения"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Читает флаг из переменной окружения (1/true/yes/on)"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# HTTP-транспорт для запросов к Bot API (send_message, edit_message_text и т.д.)
+API_POOL_SIZE = env_int('API_POOL_SIZE', 64)
+API_CONNECT_TIMEOUT = env_float('API_CONNECT_TIMEOUT', 5.0)
+API_READ_TIMEOUT = env_float('API_READ_TIMEOUT', 10.0)
+API_WRITE_TIMEOUT = env_float('API_WRITE_TIMEOUT', 10.0)
+API_POOL_TIMEOUT = env_float('API_POOL_TIMEOUT', 5.0)
+
+# HTTP-транспорт для get_updates (отдельный пул, чтобы long polling не занимал соединения API)
+UPDATES_POOL_SIZE = env_int('UPDATES_POOL_SIZE', 1)
+UPDATES_CONNECT_TIMEOUT = env_float('UPDATES_CONNECT_TIMEOUT', 5.0)
+UPDATES_READ_TIMEOUT = env_float('UPDATES_READ_TIMEOUT', 30.0)
+UPDATES_POOL_TIMEOUT = env_float('UPDATES_POOL_TIMEOUT', 5.0)
+
+# Общие параметры транспорта (HTTP/2 требует пакета h2: pip install "python-telegram-bot[http2]")
+HTTP2_ENABLED = env_bool('HTTP2_ENABLED', False)
+KEEPALIVE_CONNECTIONS = env_int('KEEPALIVE_CONNECTIONS', 32)
+KEEPALIVE_EXPIRY = env_float('KEEPALIVE_EXPIRY', 30.0)
+# Порог ожидания свободного соединения в пуле, выше которого пишем предупреждение (сек)
+POOL_WAIT_WARN_THRESHOLD = env_float('POOL_WAIT_WARN_THRESHOLD', 0.5)
+
+# Анти-флуд: скорость пополнения (токенов/сек) и емкость ведра для каждого класса действий
+THROTTLE_RATES = {
+    'menu': (env_float('THROTTLE_MENU_RATE', 1.0), env_int('THROTTLE_MENU_BURST', 5)),
+    'membership': (env_float('THROTTLE_MEMBERSHIP_RATE', 0.5), env_int('THROTTLE_MEMBERSHIP_BURST', 4)),
+    'create': (env_float('THROTTLE_CREATE_RATE', 0.1), env_int('THROTTLE_CREATE_BURST', 3)),
+    'default': (env_float('THROTTLE_DEFAULT_RATE', 2.0), env_int('THROTTLE_DEFAULT_BURST', 10)),
+    # Инлайн-запросы приходят на каждое нажатие клавиши
+    'inline': (env_float('THROTTLE_INLINE_RATE', 5.0), env_int('THROTTLE_INLINE_BURST', 30)),
+}
+# Через сколько секунд бездействия состояние пользователя удаляется
+THROTTLE_IDLE_TTL = env_float('THROTTLE_IDLE_TTL', 600.0)
+
+# Администраторы бота (ID через запятую)
+ADMIN_IDS = {int(admin_id) for admin_id in os.getenv('ADMIN_IDS', '').split(',') if admin_id.strip()}
+
+# Профилирование: каталог для отчетов, длительность по умолчанию и интервал сэмплирования
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_DEFAULT_SECONDS = env_float('PROFILE_DEFAULT_SECONDS', 30.0)
+PROFILE_SAMPLE_INTERVAL = env_float('PROFILE_SAMPLE_INTERVAL', 0.005)
+
+# Сторож event loop: интервал пульса и порог блокировки (сек)
+WATCHDOG_INTERVAL = env_float('WATCHDOG_INTERVAL', 0.1)
+WATCHDOG_STALL_THRESHOLD = env_float('WATCHDOG_STALL_THRESHOLD', 0.5)
+
+# Запись потока обновлений для воспроизведения (пустой путь — запись выключена)
+RECORD_UPDATES_PATH = os.getenv('RECORD_UPDATES_PATH', '')
+RECORD_SALT = os.getenv('RECORD_SALT', 'gatherbot')
+# Текст сообщений и запросов записывается как есть (нужен для точного воспроизведения);
+# при RECORD_KEEP_TEXT=0 он заменяется хешем, команды сохраняются
+RECORD_KEEP_TEXT = env_bool('RECORD_KEEP_TEXT', True)
+
+# URL формы создания игры (Telegram Web App); пустой — кнопка формы не показывается
+GAME_FORM_WEBAPP_URL = os.getenv('GAME_FORM_WEBAPP_URL', '')
+
+# Живые карточки игр: одно закрепленное сообщение на участника, обновляемое редактированием
+GAME_CARDS_ENABLED = env_bool('GAME_CARDS_ENABLED', True)
+# Минимальный интервал между редактированиями карточек одной игры (сек)
+GAME_CARD_EDIT_INTERVAL = env_float('GAME_CARD_EDIT_INTERVAL', 5.0)
+
+# Корректное завершение: сколько ждать отправки исходящих сообщений (сек)
+SHUTDOWN_DRAIN_TIMEOUT = env_float('SHUTDOWN_DRAIN_TIMEOUT', 10.0)
+# Снимок состояния: пишется периодически (сек, 0 — только при остановке) и при остановке,
+# читается при запуске
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'data/snapshot.bin')
+SNAPSHOT_INTERVAL = env_float('SNAPSHOT_INTERVAL', 60.0)
+# Отбрасывать ли обновления, пришедшие пока бот был остановлен
+DROP_PENDING_UPDATES = env_bool('DROP_PENDING_UPDATES', False)
+# Целевое время от запуска процесса до обработки первого обновления (сек)
+FIRST_UPDATE_TARGET = env_float('FIRST_UPDATE_TARGET', 3.0)
+
+# Отчет о памяти: период (сек, 0 — выключен) и количество мест выделения в отчете tracemalloc.
+# tracemalloc замедляет каждое выделение памяти, поэтому включается только командой
+# /memory trace on или MEMORY_TRACE_ALLOCATIONS=1
+MEMORY_REPORT_INTERVAL = env_float('MEMORY_REPORT_INTERVAL', 0.0)
+MEMORY_TOP_ALLOCATIONS = env_int('MEMORY_TOP_ALLOCATIONS', 10)
+MEMORY_TRACE_ALLOCATIONS = env_bool('MEMORY_TRACE_ALLOCATIONS', False)
+
+# Исходящие запросы к Bot API: одновременных запросов, общий лимит (запросов/сек) и веса полос
+OUTBOUND_MAX_CONCURRENT = env_int('OUTBOUND_MAX_CONCURRENT', 16)
+OUTBOUND_RATE = env_float('OUTBOUND_RATE', 30.0)
+OUTBOUND_LANE_WEIGHTS = {
+    'interactive': env_float('OUTBOUND_WEIGHT_INTERACTIVE', 8.0),
+    'notification': env_float('OUTBOUND_WEIGHT_NOTIFICATION', 3.0),
+    'bulk': env_float('OUTBOUND_WEIGHT_BULK', 1.0),
+}
+
+# Автоматический выключатель запросов к Bot API
+BREAKER_WINDOW = env_int('BREAKER_WINDOW', 50)  # сколько последних запросов учитывать
+BREAKER_MIN_CALLS = env_int('BREAKER_MIN_CALLS', 10)  # минимум запросов для решения
+BREAKER_FAILURE_RATIO = env_float('BREAKER_FAILURE_RATIO', 0.5)  # доля ошибок для размыкания
+BREAKER_SLOW_CALL_SECONDS = env_float('BREAKER_SLOW_CALL_SECONDS', 5.0)  # медленный запрос = ошибка
+BREAKER_OPEN_SECONDS = env_float('BREAKER_OPEN_SECONDS', 30.0)  # пауза перед пробными запросами
+BREAKER_HALF_OPEN_PROBES = env_int('BREAKER_HALF_OPEN_PROBES', 1)  # одновременных пробных запросов
+BREAKER_DEFERRED_LIMIT = env_int('BREAKER_DEFERRED_LIMIT', 10000)  # отложенных уведомлений максимум
+
+# Инлайн-поиск игр
+INLINE_RESULTS_LIMIT = env_int('INLINE_RESULTS_LIMIT', 20)  # результатов на страницу (не больше 50)
+INLINE_CACHE_TTL = env_float('INLINE_CACHE_TTL', 30.0)  # время жизни ответа в кэше бота
+INLINE_CACHE_SIZE = env_int('INLINE_CACHE_SIZE', 1000)  # ответов в кэше бота
+INLINE_CACHE_TIME = env_int('INLINE_CACHE_TIME', 5)  # cache_time для кэша Telegram
+INLINE_MAX_OFFSET = env_int('INLINE_MAX_OFFSET', 500)  # дальше этого смещения страницы не выдаются
+
+# Лист ожидания: сколько секунд место ждет подтверждения (0 — переводить в участники сразу)
+WAITLIST_CONFIRM_SECONDS = env_float('WAITLIST_CONFIRM_SECONDS', 0.0)
+
+# Пересечения игр по времени: длительность игры по умолчанию и реакция при входе (warn, block, off)
+GAME_DEFAULT_DURATION_MINUTES = env_int('GAME_DEFAULT_DURATION_MINUTES', 180)
+SCHEDULE_CONFLICT_MODE = os.getenv('SCHEDULE_CONFLICT_MODE', 'warn').lower()
+
+# Отбрасывание повторно доставленных обновлений
+DEDUPE_WINDOW = env_float('DEDUPE_WINDOW', 600.0)  # сколько секунд помнить update_id
+DEDUPE_MAX_ENTRIES = env_int('DEDUPE_MAX_ENTRIES', 10000)  # не больше записей в памяти
+DEDUPE_MARK_PATH = os.getenv('DEDUPE_MARK_PATH', 'data/update_mark')  # файл наибольшего update_id
+
+# Несколько ботов в одном процессе: "имя=токен,имя=токен" (пусто — один бот из TELEGRAM_BOT_TOKEN)
+HOSTED_BOTS = [
+    tuple(part.strip() for part in item.split('=', 1))
+    for item in os.getenv('TELEGRAM_BOTS', '').split(',') if item.strip()
+]
+SHARED_API_POOL_SIZE = env_int('SHARED_API_POOL_SIZE', 128)  # общий пул вызовов API для всех ботов
+
+# Выгрузка данных (/export и tools/export.py)
+EXPORT_PART_SIZE = env_int('EXPORT_PART_SIZE', 45 * 1024 * 1024)  # размер части (лимит документа Bot API — 50 МБ)
+EXPORT_MAX_BYTES = env_int('EXPORT_MAX_BYTES', 200 * 1024 * 1024)  # предел всей выгрузки (сжатой)
+EXPORT_COMPRESS_LEVEL = env_int('EXPORT_COMPRESS_LEVEL', 6)
+
+# Статистика для /stats
+STATS_SKETCH_ACCURACY = env_float('STATS_SKETCH_ACCURACY', 0.02)  # относительная погрешность квантилей
+STATS_TOP_CAPACITY = env_int('STATS_TOP_CAPACITY', 100)  # названий в таблице топа
+STATS_TOP_SHOWN = env_int('STATS_TOP_SHOWN', 5)  # названий в отчете
+
+# Сводки уведомлений (/digest): час дневной сводки и пользователей в одной пачке рассылки
+DIGEST_DAILY_HOUR = env_int('DIGEST_DAILY_HOUR', 9)
+DIGEST_BATCH_SIZE = env_int('DIGEST_BATCH_SIZE', 30)
@@ -0,0 +1,226 @@
+import importlib.util
+import logging
+import time
+import httpx
+from telegram.error import NetworkError
+from telegram.request import BaseRequest, HTTPXRequest
+from config import settings
+from utils import metrics
+from utils.breaker import CircuitBreaker, build_api_breaker
+from utils.outbound import OutboundScheduler, current_lane
+
+logger = logging.getLogger(__name__)
+
+# События httpcore, означающие что соединение из пула уже получено
+CONNECTION_ACQUIRED_EVENTS = (
+    'connection.connect_tcp.started',
+    'http11.send_request_headers.started',
+    'http2.send_request_headers.started',
+)
+
+
+def make_pool_wait_hook(pool_name: str):
+    """
+    Создает httpx event hook, который измеряет время ожидания
+    свободного соединения в пуле через trace-расширение httpcore
+    """
+    metric_name = f"http.{pool_name}.pool_wait"
+
+    async def on_request(request: httpx.Request):
+        started = time.perf_counter()
+        measured = False
+
+        async def trace(event_name: str, info: dict):
+            nonlocal measured
+            if measured or event_name not in CONNECTION_ACQUIRED_EVENTS:
+                return
+            measured = True
+            wait = time.perf_counter() - started
+            metrics.observe(metric_name, wait)
+            if wait >= settings.POOL_WAIT_WARN_THRESHOLD:
+                logger.warning(f"⏳ Ожидание соединения в пуле '{pool_name}': {wait:.3f}с "
+                               f"({request.url.path.rsplit('/', 1)[-1]})")
+
+        request.extensions['trace'] = trace
+        metrics.increment(f"http.{pool_name}.requests")
+
+    return on_request
+
+
+def http_version() -> str:
+    """Версия HTTP для пулов: HTTP/2 только если он включен и установлен пакет h2"""
+    if not settings.HTTP2_ENABLED:
+        return '1.1'
+    if importlib.util.find_spec('h2') is None:
+        logger.warning("⚠️ HTTP2_ENABLED включен, но пакет h2 не установлен — используется HTTP/1.1 "
+                       "(pip install \"python-telegram-bot[http2]\")")
+        return '1.1'
+    return '2'
+
+
+def build_request(pool_name: str, pool_size: int, connect_timeout: float,
+                  read_timeout: float, write_timeout: float, pool_timeout: float) -> HTTPXRequest:
+    """Создает HTTPXRequest с настроенным пулом соединений и keep-alive"""
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=min(pool_size, settings.KEEPALIVE_CONNECTIONS),
+        keepalive_expiry=settings.KEEPALIVE_EXPIRY,
+    )
+    version = http_version()
+    logger.info(f"🌐 Пул '{pool_name}': соединений={pool_size}, "
+                f"keep-alive={limits.max_keepalive_connections}/{settings.KEEPALIVE_EXPIRY}с, "
+                f"HTTP/{version}")
+    return HTTPXRequest(
+        connection_pool_size=pool_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
+        pool_timeout=pool_timeout,
+        http_version=version,
+        httpx_kwargs={
+            'limits': limits,
+            'event_hooks': {'request': [make_pool_wait_hook(pool_name)]},
+        },
+    )
+
+
+class ScheduledRequest(BaseRequest):
+    """
+    Транспорт Bot API, пропускающий все запросы через планировщик полос:
+    ответы пользователям не ждут за массовыми рассылками. Перед очередью
+    стоит выключатель: при деградации Telegram запросы отклоняются сразу
+    """
+
+    def __init__(self, inner: BaseRequest, scheduler: OutboundScheduler, breaker: CircuitBreaker):
+        self.inner = inner
+        self.scheduler = scheduler
+        self.breaker = breaker
+
+    @property
+    def read_timeout(self):
+        return self.inner.read_timeout
+
+    async def initialize(self):
+        await self.inner.initialize()
+
+    async def shutdown(self):
+        await self.scheduler.close()
+        await self.inner.shutdown()
+
+    async def do_request(self, url, method, request_data=None, read_timeout=BaseRequest.DEFAULT_NONE,
+                         write_timeout=BaseRequest.DEFAULT_NONE, connect_timeout=BaseRequest.DEFAULT_NONE,
+                         pool_timeout=BaseRequest.DEFAULT_NONE):
+        probe = self.breaker.before_request()
+
+        async def send():
+            started = time.monotonic()
+            try:
+                code, payload = await self.inner.do_request(
+                    url, method, request_data,
+                    read_timeout=read_timeout,
+                    write_timeout=write_timeout,
+                    connect_timeout=connect_timeout,
+                    pool_timeout=pool_timeout
+                )
+            except NetworkError:
+                self.breaker.record(True)
+                raise
+            # 429 и 5xx — признаки перегрузки на стороне Telegram
+            self.breaker.record(code == 429 or code >= 500, time.monotonic() - started)
+            return code, payload
+
+        # Исход (успех или сбой) учитывает send; слот пробы освобождается при любом исходе,
+        # включая отмену и исключения, не связанные с сетью
+        try:
+            return await self.scheduler.submit(current_lane.get(), send)
+        finally:
+            self.breaker.release_probe(probe)
+
+
+class SharedRequest(BaseRequest):
+    """
+    Транспорт, общий для нескольких ботов одного процесса: пул соединений
+    открывается при первой инициализации и закрывается после остановки
+    последнего бота
+    """
+
+    def __init__(self, inner: BaseRequest):
+        self.inner = inner
+        self.users = 0
+
+    @property
+    def read_timeout(self):
+        return self.inner.read_timeout
+
+    async def initialize(self):
+        self.users += 1
+        if self.users == 1:
+            await self.inner.initialize()
+
+    async def shutdown(self):
+        if self.users == 0:
+            return
+        self.users -= 1
+        if self.users == 0:
+            await self.inner.shutdown()
+
+    async def do_request(self, url, method, request_data=None, read_timeout=BaseRequest.DEFAULT_NONE,
+                         write_timeout=BaseRequest.DEFAULT_NONE, connect_timeout=BaseRequest.DEFAULT_NONE,
+                         pool_timeout=BaseRequest.DEFAULT_NONE):
+        return await self.inner.do_request(
+            url, method, request_data,
+            read_timeout=read_timeout,
+            write_timeout=write_timeout,
+            connect_timeout=connect_timeout,
+            pool_timeout=pool_timeout
+        )
+
+
+def build_api_request(http_request: BaseRequest = None, name: str = None) -> BaseRequest:
+    """
+    Пул для вызовов Bot API (через планировщик полос и выключатель). Планировщик
+    и выключатель у каждого бота свои — лимиты Telegram действуют на токен,
+    пул соединений может быть общим.
+    """
+    scheduler = OutboundScheduler(
+        settings.OUTBOUND_LANE_WEIGHTS,
+        settings.OUTBOUND_MAX_CONCURRENT,
+        settings.OUTBOUND_RATE
+    )
+    breaker = build_api_breaker(f"api.{name}" if name else 'api')
+    return ScheduledRequest(http_request or build_http_api_request(), scheduler, breaker)
+
+
+def build_http_api_request(pool_size: int = None) -> HTTPXRequest:
+    """Пул HTTP-соединений для вызовов Bot API"""
+    return build_request(
+        'api',
+        pool_size or settings.API_POOL_SIZE,
+        settings.API_CONNECT_TIMEOUT,
+        settings.API_READ_TIMEOUT,
+        settings.API_WRITE_TIMEOUT,
+        settings.API_POOL_TIMEOUT,
+    )
+
+
+def build_updates_request(pool_size: int = None) -> HTTPXRequest:
+    """Отдельный пул для get_updates"""
+    return build_request(
+        'updates',
+        pool_size or settings.UPDATES_POOL_SIZE,
+        settings.UPDATES_CONNECT_TIMEOUT,
+        settings.UPDATES_READ_TIMEOUT,
+        settings.API_WRITE_TIMEOUT,
+        settings.UPDATES_POOL_TIMEOUT,
+    )
+
+
+def build_shared_requests(bot_count: int) -> tuple:
+    """
+    Общие пулы для нескольких ботов: (вызовы API, get_updates).
+    Каждый бот держит свое долгое соединение get_updates, поэтому этот пул растет с числом ботов.
+    """
+    return (
+        SharedRequest(build_http_api_request(settings.SHARED_API_POOL_SIZE)),
+        SharedRequest(build_updates_request(settings.UPDATES_POOL_SIZE * bot_count)),
+    )
@@ -0,0 +1,127 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+import logging
+import os
+import shutil
+import tempfile
+from config import settings
+from utils import profiler
+from utils.memory import start_allocation_tracing, stop_allocation_tracing
+from utils.outbound import outbound_lane
+from .keyboards import get_main_keyboard
+from .memory import build_memory_report
+from .stats import build_stats_report
+from .export import EXPORT_FORMATS, write_export, export_prefix
+
+logger = logging.getLogger(__name__)
+
+
+def is_admin(user_id: int) -> bool:
+    """Проверяет, является ли пользователь администратором бота"""
+    return user_id in settings.ADMIN_IDS
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /profile (только для администраторов)
+    /profile 30 — профилировать 30 секунд
+    /profile 100u — профилировать 100 обновлений
+    /profile stop — остановить профилирование
+    """
+    user_id = update.effective_user.id
+    if not is_admin(user_id):
+        logger.warning(f"⚠️ Пользователь {user_id} без прав вызвал /profile")
+        return
+    
+    argument = context.args[0] if context.args else ''
+    
+    if argument == 'stop':
+        paths = profiler.stop_profiling()
+        text = (f"🔬 Профиль сохранен:\n{paths[0]}\n{paths[1]}" if paths
+                else "ℹ️ Профилирование не запущено")
+    else:
+        try:
+            if argument.endswith('u'):
+                started = profiler.start_profiling(context.application, updates=int(argument[:-1]))
+            else:
+                seconds = float(argument) if argument else None
+                started = profiler.start_profiling(context.application, seconds=seconds)
+        except ValueError:
+            await update.message.reply_text("❌ Формат: /profile [секунды | Nu | stop]")
+            return
+        text = "🔬 Профилирование запущено" if started else "⚠️ Профилирование уже идет"
+    
+    await update.message.reply_text(text, reply_markup=get_main_keyboard())
+
+
+async def memory_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /memory (только для администраторов)
+    /memory — размеры структур (и рост выделений, если трассировка включена)
+    /memory trace on — включить tracemalloc, следующий /memory покажет рост
+    /memory trace off — выключить tracemalloc
+    """
+    user_id = update.effective_user.id
+    if not is_admin(user_id):
+        logger.warning(f"⚠️ Пользователь {user_id} без прав вызвал /memory")
+        return
+    
+    if context.args:
+        argument = ' '.join(context.args).lower()
+        if argument == 'trace on':
+            text = ("🧠 Трассировка выделений включена, рост покажет следующий /memory"
+                    if start_allocation_tracing() else "⚠️ Трассировка выделений уже включена")
+        elif argument == 'trace off':
+            text = ("🧠 Трассировка выделений выключена"
+                    if stop_allocation_tracing() else "ℹ️ Трассировка выделений не включена")
+        else:
+            text = "❌ Формат: /memory [trace on | trace off]"
+        await update.message.reply_text(text, reply_markup=get_main_keyboard())
+        return
+    
+    report = await build_memory_report(context.application)
+    logger.info(report.replace("<b>", "").replace("</b>", ""))
+    await update.message.reply_text(report, parse_mode='HTML', reply_markup=get_main_keyboard())
+
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /stats (только для администраторов): сводка по играм"""
+    user_id = update.effective_user.id
+    if not is_admin(user_id):
+        logger.warning(f"⚠️ Пользователь {user_id} без прав вызвал /stats")
+        return
+    
+    await update.message.reply_text(build_stats_report(), parse_mode='HTML', reply_markup=get_main_keyboard())
+
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /export [csv|jsonl] (только для администраторов):
+    выгрузка игр, участия и уведомлений сжатыми документами
+    """
+    user_id = update.effective_user.id
+    if not is_admin(user_id):
+        logger.warning(f"⚠️ Пользователь {user_id} без прав вызвал /export")
+        return
+    
+    export_format = context.args[0].lower() if context.args else 'jsonl'
+    if export_format not in EXPORT_FORMATS:
+        await update.message.reply_text(f"❌ Формат: /export [{' | '.join(EXPORT_FORMATS)}]")
+        return
+    
+    directory = tempfile.mkdtemp(prefix='gatherbot-export-')
+    try:
+        result = await write_export(export_prefix(directory), export_format)
+        # Документы идут в массовой полосе и не задерживают ответы пользователям
+        with outbound_lane('bulk'):
+            for path in result['paths']:
+                with open(path, 'rb') as document:
+                    await update.message.reply_document(document, filename=os.path.basename(path))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    
+    text = (f"📦 Выгрузка готова: частей {len(result['paths'])}, строк {result['lines']}, "
+            f"{result['bytes'] // 1024} КБ")
+    if result['truncated']:
+        text += f"\n⚠️ Выгрузка обрезана на пределе {settings.EXPORT_MAX_BYTES // (1024 * 1024)} МБ"
+    await update.message.reply_text(text, reply_markup=get_main_keyboard())
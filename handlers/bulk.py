@@ -0,0 +1,353 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+import logging
+from config import settings
+from . import stats
+from .keyboards import (
+    games,
+    created_by_user,
+    get_main_keyboard,
+    get_game_by_id,
+    unregister_game,
+    remove_player_from_game,
+    promote_from_waitlist,
+    touch_game
+)
+from .delivery import (
+    MESSAGE_LIMIT,
+    send_notification,
+    send_group_notification,
+    wants_direct_messages,
+    collect_notifications,
+    send_collected_notifications,
+    pack_messages
+)
+from .cards import schedule_card_update, close_game_cards
+from .schedule import add_to_schedule, remove_from_schedule, find_conflict
+from .states import validate_game_date
+from .waitlist import waitlists, seat_offers, clear_waitlist, remove_from_waitlist, take_offer
+
+logger = logging.getLogger(__name__)
+
+BULK_USAGE = (
+    "🧰 <b>Действия с несколькими играми</b> (только для своих игр)\n\n"
+    "<code>/cancelgames all</code> или <code>/cancelgames 3 5 7</code> — отменить игры\n"
+    "<code>/kick Имя или ID | all</code> или <code>/kick Имя | 3 5 7</code> — убрать участника из игр\n"
+    "<code>/move 3 | ДД.ММ.ГГГГ ЧЧ:ММ</code> — перенести игру\n\n"
+    "Каждый затронутый участник получает одно сообщение обо всех изменениях."
+)
+
+
+def game_line(game: dict) -> str:
+    """Строка игры в объединенном уведомлении"""
+    return f"🎮 {game.get('title')} — 📅 {game.get('date')}, 📍 {game.get('location')}"
+
+
+def add_line(lines_by_target: dict, target: int, line: str):
+    """Добавляет строку в объединенное уведомление получателя"""
+    lines_by_target.setdefault(target, []).append(line)
+
+
+async def send_merged_notifications(application, header: str, user_lines: dict, group_lines: dict = None):
+    """
+    Рассылает объединенные уведомления: одно сообщение каждому пользователю
+    и каждому групповому чату, сколько бы игр его ни касалось
+    """
+    limit = MESSAGE_LIMIT - len(header) - 2
+    for user_id, lines in user_lines.items():
+        for text in pack_messages(lines, "\n", limit):
+            await send_notification(application, user_id, f"{header}\n\n{text}")
+    for chat_id, lines in (group_lines or {}).items():
+        for text in pack_messages(lines, "\n", limit):
+            await send_group_notification(application, chat_id, f"{header}\n\n{text}")
+
+
+def parse_game_ids(argument: str, user_id: int):
+    """ID игр из 'all' или списка через пробел/запятую; None — ошибка формата"""
+    argument = argument.strip()
+    if argument.lower() == 'all':
+        return sorted(created_by_user.get(user_id, ()))
+    try:
+        game_ids = [int(part) for part in argument.replace(',', ' ').split()]
+    except ValueError:
+        return None
+    # Повторы убираем, порядок сохраняем
+    return list(dict.fromkeys(game_ids)) or None
+
+
+def own_games(game_ids: list, user_id: int):
+    """Игры создателя по ID: (игры, None) или (None, текст ошибки), если хоть одна недоступна"""
+    selected = []
+    for game_id in game_ids:
+        game = get_game_by_id(game_id)
+        if not game:
+            return None, f"Игра {game_id} не найдена"
+        if game.get('creator_id') != user_id:
+            logger.warning(f"⚠️ Попытка изменить чужую игру: Игра={game_id}, Пользователь={user_id}")
+            return None, f"Игра {game_id} создана не вами"
+        selected.append(game)
+    if not selected:
+        return None, "У вас нет игр"
+    return selected, None
+
+
+async def cancel_games(game_ids: list, user_id: int, application) -> dict:
+    """
+    Отменяет несколько игр создателя. Игры проверяются и удаляются из хранилища
+    целиком (без переключения задач); затем каждый участник и ожидающий получает
+    одно сообщение со списком всех своих отмененных игр
+    """
+    selected, error = own_games(game_ids, user_id)
+    if error:
+        return {'success': False, 'message': error}
+
+    user_lines = {}
+    group_lines = {}
+    selected_ids = set()
+    for game in selected:
+        line = game_line(game)
+        for player_id in game.get('player_ids', []):
+            if player_id != user_id and wants_direct_messages(game, player_id):
+                add_line(user_lines, player_id, line)
+        for waiting_user_id in clear_waitlist(game['id']):
+            add_line(user_lines, waiting_user_id, line)
+        if game.get('group_chat_id'):
+            add_line(group_lines, game['group_chat_id'], line)
+        unregister_game(game)
+        selected_ids.add(game['id'])
+    # Один проход по списку вместо удаления каждой игры по отдельности
+    games[:] = [game for game in games if game['id'] not in selected_ids]
+    logger.info(f"🗑️ Игры удалены: ID={sorted(selected_ids)}, Создатель={user_id}")
+
+    with collect_notifications() as collector:
+        await send_merged_notifications(
+            application,
+            f"❌ <b>{'ИГРЫ ОТМЕНЕНЫ' if len(selected) > 1 else 'ИГРА ОТМЕНЕНА'}!</b>\n"
+            f"Создатель отменил мероприятия:",
+            user_lines, group_lines
+        )
+    await send_collected_notifications(application, collector)
+    for game in selected:
+        if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+            await close_game_cards(application, game, "❌ <b>Игра отменена</b>")
+
+    return {
+        'success': True,
+        'games': selected,
+        'message': f"Отменено игр: {len(selected)}. Уведомлено участников: {len(user_lines)}."
+    }
+
+
+def find_member(selected: list, player: str):
+    """
+    Участник (user_id, имя) игр по ID или имени без учета регистра.
+    Возвращает ((user_id, имя), None) или (None, текст ошибки)
+    """
+    player = player.strip()
+    found = {}
+    for game in selected:
+        members = list(zip(game.get('player_ids', []), game.get('players', [])))
+        members += list(waitlists.get(game['id'], {}).items())
+        offer = seat_offers.get(game['id'])
+        if offer:
+            members.append((offer['user_id'], offer['user_name']))
+        for member_id, name in members:
+            if str(member_id) == player or str(name).casefold() == player.casefold():
+                found.setdefault(member_id, name)
+    if not found:
+        return None, f"Участник «{player}» не найден в выбранных играх"
+    if len(found) > 1:
+        return None, f"Несколько участников с именем «{player}», укажите ID: {', '.join(map(str, found))}"
+    return next(iter(found.items())), None
+
+
+async def kick_player(game_ids: list, player: str, user_id: int, application) -> dict:
+    """
+    Убирает участника из нескольких игр создателя (из участников, листа ожидания
+    или с предложенного места). Убранный получает одно сообщение со списком игр,
+    остальные участники — одно сообщение о его выходе из их игр
+    """
+    selected, error = own_games(game_ids, user_id)
+    if error:
+        return {'success': False, 'message': error}
+    member, error = find_member(selected, player)
+    if error:
+        return {'success': False, 'message': error}
+    player_id, player_name = member
+    if player_id == user_id:
+        return {'success': False, 'message': 'Нельзя убрать из игры ее создателя'}
+
+    # Изменения во всех играх — без переключения задач
+    seated = []
+    was_full = {}
+    freed = []
+    for game in selected:
+        game_id = game['id']
+        if player_id in game.get('player_ids', []):
+            was_full[game_id] = game.get('status') == 'gathering'
+            remove_player_from_game(game, player_id)
+            seated.append(game)
+            freed.append(game)
+        elif remove_from_waitlist(game_id, player_id):
+            freed.append(game)
+        elif seat_offers.get(game_id, {}).get('user_id') == player_id:
+            take_offer(game_id)
+            freed.append(game)
+    if not freed:
+        return {'success': False, 'message': f"{player_name} не участвует в выбранных играх"}
+    logger.info(f"🚪 Участник {player_id} убран из игр {[game['id'] for game in freed]} создателем {user_id}")
+
+    # Уведомления о переводе из листа ожидания тоже входят в общее сообщение получателя
+    with collect_notifications() as collector:
+        # Освободившиеся места получают ожидающие, затем обновляется статус (как при выходе)
+        for game in freed:
+            await promote_from_waitlist(game, application)
+        for game in seated:
+            if len(game.get('players', [])) < game.get('max_players', 0):
+                game['status'] = 'active'
+                game['notified_gathering'] = False
+            stats.record_leave(game, was_full[game['id']])
+
+        user_lines = {player_id: [game_line(game) for game in freed]}
+        member_lines = {}
+        group_lines = {}
+        for game in seated:
+            line = f"{game_line(game)} — 👥 {len(game.get('players', []))}/{game.get('max_players', 0)}"
+            if not settings.GAME_CARDS_ENABLED:
+                for member_id in game.get('player_ids', []):
+                    if member_id != user_id and wants_direct_messages(game, member_id):
+                        add_line(member_lines, member_id, line)
+            if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+                schedule_card_update(application, game)
+        await send_merged_notifications(
+            application, "🚪 <b>ВАС УБРАЛИ ИЗ ИГР</b>\nСоздатель убрал вас из игр:", user_lines
+        )
+        await send_merged_notifications(
+            application, f"🚪 <b>УЧАСТНИК ВЫШЕЛ</b>\n👤 {player_name} больше не участвует в играх:",
+            member_lines, group_lines
+        )
+    await send_collected_notifications(application, collector)
+
+    return {
+        'success': True,
+        'games': freed,
+        'message': f"{player_name} убран из игр: {len(freed)}."
+    }
+
+
+async def move_game(game_id: int, new_date: str, user_id: int, application) -> dict:
+    """
+    Переносит игру на другое время: расписания участников переиндексируются,
+    участники и ожидающие получают одно сообщение о переносе
+    """
+    selected, error = own_games([game_id], user_id)
+    if error:
+        return {'success': False, 'message': error}
+    game = selected[0]
+    old_date = game.get('date')
+    if new_date == old_date:
+        return {'success': False, 'message': 'Игра уже назначена на это время'}
+
+    # Интервал в расписании зависит от даты: убираем по старой, добавляем по новой
+    for player_id in game.get('player_ids', []):
+        remove_from_schedule(player_id, game)
+    
+    # Новое время не должно пересекаться с другими играми участников (как при входе в игру)
+    conflicts = {}
+    if settings.SCHEDULE_CONFLICT_MODE != 'off':
+        moved = dict(game, date=new_date)
+        for player_id, player_name in zip(game.get('player_ids', []), game.get('players', [])):
+            conflict_game = get_game_by_id(find_conflict(player_id, moved))
+            if conflict_game:
+                conflicts[player_id] = (player_name, conflict_game)
+    conflict_text = "; ".join(
+        f"{player_name} — «{conflict_game.get('title')}» ({conflict_game.get('date')})"
+        for player_name, conflict_game in conflicts.values()
+    )
+    if conflicts and settings.SCHEDULE_CONFLICT_MODE == 'block':
+        for player_id in game.get('player_ids', []):
+            add_to_schedule(player_id, game)
+        logger.info(f"📅 Игра {game_id} не перенесена: пересечения у участников {list(conflicts)}")
+        return {'success': False, 'message': f"Новое время пересекается с играми участников: {conflict_text}"}
+    
+    game['date'] = new_date
+    touch_game(game)
+    for player_id in game.get('player_ids', []):
+        add_to_schedule(player_id, game)
+    logger.info(f"🕒 Игра {game_id} перенесена: {old_date} -> {new_date}, Создатель={user_id}")
+
+    line = f"🎮 {game.get('title')}\n📅 {old_date} → <b>{new_date}</b>\n📍 {game.get('location')}"
+    user_lines = {}
+    for member_id in game.get('player_ids', []):
+        if member_id != user_id and wants_direct_messages(game, member_id):
+            member_line = line
+            if member_id in conflicts:
+                conflict_game = conflicts[member_id][1]
+                member_line += (f"\n⚠️ Пересекается с вашей игрой «{conflict_game.get('title')}» "
+                                f"({conflict_game.get('date')})")
+            add_line(user_lines, member_id, member_line)
+    for waiting_user_id in waitlists.get(game_id, {}):
+        add_line(user_lines, waiting_user_id, line)
+    offer = seat_offers.get(game_id)
+    if offer:
+        add_line(user_lines, offer['user_id'], line)
+    group_lines = {game['group_chat_id']: [line]} if game.get('group_chat_id') else {}
+    with collect_notifications() as collector:
+        await send_merged_notifications(application, "🕒 <b>ИГРА ПЕРЕНЕСЕНА</b>", user_lines, group_lines)
+    await send_collected_notifications(application, collector)
+    if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+        schedule_card_update(application, game)
+
+    message = f"Игра перенесена на {new_date}."
+    if conflicts:
+        message += f"\n⚠️ Пересечения у участников: {conflict_text}"
+    return {'success': True, 'game': game, 'message': message}
+
+
+async def reply_result(update: Update, result: dict):
+    """Ответ создателю по результату действия"""
+    text = f"✅ {result['message']}" if result['success'] else f"❌ <b>{result['message']}</b>"
+    await update.message.reply_text(text, parse_mode='HTML', reply_markup=get_main_keyboard())
+
+
+def command_arguments(update: Update) -> list:
+    """Поля после команды, разделенные '|' (пробелы в полях сохраняются)"""
+    return [field.strip() for field in update.message.text.partition(' ')[2].split('|')]
+
+
+async def cancel_games_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /cancelgames all | ID ID ..."""
+    user_id = update.effective_user.id
+    game_ids = parse_game_ids(command_arguments(update)[0], user_id)
+    if game_ids is None:
+        await update.message.reply_text(BULK_USAGE, parse_mode='HTML')
+        return
+    result = await cancel_games(game_ids, user_id, context.application)
+    await reply_result(update, result)
+
+
+async def kick_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /kick Имя или ID | all | ID ID ..."""
+    user_id = update.effective_user.id
+    fields = command_arguments(update)
+    game_ids = parse_game_ids(fields[1], user_id) if len(fields) == 2 and fields[0] else None
+    if game_ids is None:
+        await update.message.reply_text(BULK_USAGE, parse_mode='HTML')
+        return
+    result = await kick_player(game_ids, fields[0], user_id, context.application)
+    await reply_result(update, result)
+
+
+async def move_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /move ID | ДД.ММ.ГГГГ ЧЧ:ММ"""
+    user_id = update.effective_user.id
+    fields = command_arguments(update)
+    if len(fields) != 2 or not fields[0].isdigit():
+        await update.message.reply_text(BULK_USAGE, parse_mode='HTML')
+        return
+    error = validate_game_date(fields[1])
+    if error:
+        await update.message.reply_text(error)
+        return
+    result = await move_game(int(fields[0]), fields[1], user_id, context.application)
+    await reply_result(update, result)
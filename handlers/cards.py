@@ -0,0 +1,230 @@
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.error import BadRequest
+import logging
+import time
+from config import settings
+from utils.outbound import outbound_lane
+from .delivery import (
+    is_user_reachable,
+    is_permanent_delivery_error,
+    mark_user_unreachable,
+    wants_direct_messages,
+    track_delivery,
+    wait_or_shutdown
+)
+
+logger = logging.getLogger(__name__)
+
+# Карточки игр: game_id -> {user_id: message_id}
+game_cards = {}
+# Запланированные обновления карточек: game_id -> asyncio.Task
+card_update_tasks = {}
+# Время последнего обновления карточек игры: game_id -> time.monotonic()
+last_card_update = {}
+
+STATUS_TITLES = {
+    'active': '🟡 Идет набор',
+    'gathering': '✅ Комната собралась',
+}
+
+
+def render_game_card(game: dict) -> str:
+    """Формирует текст карточки игры"""
+    players = game.get('players', [])
+    text = (
+        f"📌 <b>{game.get('title')}</b> [{game.get('id')}]\n\n"
+        f"📅 {game.get('date')}\n"
+        f"📍 {game.get('location')}\n"
+        f"📊 {STATUS_TITLES.get(game.get('status'), game.get('status'))}\n"
+        f"👥 Участники: {len(players)}/{game.get('max_players', 0)}\n"
+    )
+    for i, player in enumerate(players, 1):
+        text += f"{i}. {player}\n"
+    return text
+
+
+def get_roster_keyboard(game: dict) -> InlineKeyboardMarkup:
+    """Кнопки входа/выхода под списком участников в группе"""
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("➕ Войти", callback_data=f"join:{game['id']}"),
+        InlineKeyboardButton("➖ Выйти", callback_data=f"leave:{game['id']}")
+    ]])
+
+
+async def post_group_roster(application, game: dict, chat_id: int) -> bool:
+    """
+    Публикует список участников игры в групповом чате и привязывает игру к нему.
+    Прежний список (при повторной привязке) закрывается: его кнопки больше не работают
+    """
+    try:
+        message = await application.bot.send_message(
+            chat_id=chat_id,
+            text=render_game_card(game),
+            parse_mode='HTML',
+            reply_markup=get_roster_keyboard(game)
+        )
+    except Exception as e:
+        logger.error(f"Ошибка публикации игры {game['id']} в группе {chat_id}: {e}")
+        return False
+    
+    if game.get('group_message_id'):
+        await update_group_roster(
+            application, game, render_game_card(game) + "\n🔁 Список участников перенесен в другое сообщение."
+        )
+    game['group_chat_id'] = chat_id
+    game['group_message_id'] = message.message_id
+    logger.info(f"👥 Игра {game['id']} привязана к группе {chat_id}")
+    return True
+
+
+async def update_group_roster(application, game: dict, text: str, reply_markup=None):
+    """Редактирует общий список участников в группе"""
+    if not game.get('group_message_id'):
+        return
+    try:
+        await application.bot.edit_message_text(
+            chat_id=game['group_chat_id'],
+            message_id=game['group_message_id'],
+            text=text,
+            parse_mode='HTML',
+            reply_markup=reply_markup
+        )
+    except BadRequest as e:
+        if 'not modified' not in str(e).lower():
+            logger.error(f"Ошибка обновления списка игры {game['id']} в группе: {e}")
+    except Exception as e:
+        logger.error(f"Ошибка обновления списка игры {game['id']} в группе: {e}")
+
+
+def forget_card(game_id: int, user_id: int):
+    """Удаляет запись о карточке пользователя"""
+    cards = game_cards.get(game_id)
+    if cards is not None:
+        cards.pop(user_id, None)
+        if not cards:
+            del game_cards[game_id]
+
+
+async def send_card(application, game: dict, user_id: int, text: str):
+    """Отправляет и закрепляет новую карточку игры"""
+    try:
+        message = await application.bot.send_message(chat_id=user_id, text=text, parse_mode='HTML')
+    except Exception as e:
+        if is_permanent_delivery_error(e):
+            mark_user_unreachable(user_id, str(e))
+        else:
+            logger.error(f"Ошибка отправки карточки игры {game['id']} пользователю {user_id}: {e}")
+        return
+    
+    game_cards.setdefault(game['id'], {})[user_id] = message.message_id
+    try:
+        await application.bot.pin_chat_message(
+            chat_id=user_id,
+            message_id=message.message_id,
+            disable_notification=True
+        )
+    except Exception as e:
+        logger.debug(f"Не удалось закрепить карточку игры {game['id']} у {user_id}: {e}")
+
+
+async def edit_card(application, game_id: int, user_id: int, message_id: int, text: str) -> bool:
+    """Редактирует карточку, возвращает False если карточки больше нет"""
+    try:
+        await application.bot.edit_message_text(
+            chat_id=user_id,
+            message_id=message_id,
+            text=text,
+            parse_mode='HTML'
+        )
+        return True
+    except BadRequest as e:
+        if 'not modified' in str(e).lower():
+            return True
+        if is_permanent_delivery_error(e):
+            mark_user_unreachable(user_id, str(e))
+        logger.info(f"🗂️ Карточка игры {game_id} у {user_id} недоступна: {e}")
+        return False
+    except Exception as e:
+        if is_permanent_delivery_error(e):
+            mark_user_unreachable(user_id, str(e))
+            return False
+        logger.error(f"Ошибка обновления карточки игры {game_id} у {user_id}: {e}")
+        return True
+
+
+async def update_game_cards(application, game: dict):
+    """
+    Приводит карточки игры к текущему состоянию: редактирует список в группе и
+    карточки участников, отправляет карточки тем, у кого их нет, и закрывает карточки вышедших
+    """
+    game_id = game['id']
+    last_card_update[game_id] = time.monotonic()
+    text = render_game_card(game)
+    
+    # Одно редактирование общего списка вместо личных сообщений каждому
+    if game.get('group_chat_id'):
+        await update_group_roster(application, game, text, get_roster_keyboard(game))
+    
+    if not settings.GAME_CARDS_ENABLED:
+        return
+    
+    member_ids = {user_id for user_id in game.get('player_ids', []) if wants_direct_messages(game, user_id)}
+    cards = dict(game_cards.get(game_id, {}))
+    
+    for user_id, message_id in cards.items():
+        if user_id in member_ids and is_user_reachable(user_id):
+            if not await edit_card(application, game_id, user_id, message_id, text):
+                forget_card(game_id, user_id)
+        else:
+            forget_card(game_id, user_id)
+            if is_user_reachable(user_id):
+                await edit_card(application, game_id, user_id, message_id,
+                                text + "\n🚪 <i>Вы больше не участвуете в этой игре</i>")
+    
+    for user_id in member_ids:
+        if user_id not in game_cards.get(game_id, {}) and is_user_reachable(user_id):
+            await send_card(application, game, user_id, text)
+    
+    logger.info(f"🗂️ Карточки игры {game_id} обновлены: {len(game_cards.get(game_id, {}))}")
+
+
+async def delayed_card_update(application, game: dict, delay: float):
+    """Ждет окончания интервала (или начала остановки) и обновляет карточки"""
+    await wait_or_shutdown(delay)
+    card_update_tasks.pop(game['id'], None)
+    with outbound_lane('notification'):
+        await update_game_cards(application, game)
+
+
+def schedule_card_update(application, game: dict):
+    """
+    Планирует обновление карточек игры не чаще раза в GAME_CARD_EDIT_INTERVAL.
+    Изменения, пришедшие до запланированного обновления, объединяются в одно.
+    """
+    game_id = game['id']
+    if game_id in card_update_tasks:
+        return
+    elapsed = time.monotonic() - last_card_update.get(game_id, 0.0)
+    delay = max(0.0, settings.GAME_CARD_EDIT_INTERVAL - elapsed)
+    card_update_tasks[game_id] = track_delivery(
+        delayed_card_update(application, game, delay),
+        name=f"game_card_update_{game_id}"
+    )
+
+
+async def close_game_cards(application, game: dict, note: str):
+    """Отменяет запланированное обновление и закрывает карточки игры (при отмене игры)"""
+    game_id = game['id']
+    task = card_update_tasks.pop(game_id, None)
+    if task:
+        task.cancel()
+    last_card_update.pop(game_id, None)
+    
+    text = render_game_card(game) + f"\n{note}"
+    with outbound_lane('notification'):
+        if game.get('group_chat_id'):
+            await update_group_roster(application, game, text)
+        
+        for user_id, message_id in game_cards.pop(game_id, {}).items():
+            if is_user_reachable(user_id):
+                await edit_card(application, game_id, user_id, message_id, text)
@@ -1,7 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
-from .keyboards import get_main_keyboard
+from .keyboards import get_main_keyboard, mark_user_reachable
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +40,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         reply_markup=get_main_keyboard()
     )
     
+    # Пользователь снова доступен для уведомлений
+    mark_user_reachable(user.id)
+    
     # Сохраняем информацию о пользователе
     context.user_data['user_id'] = user.id
     context.user_data['first_name'] = user.first_name
@@ -81,13 +84,21 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "/start — Начало работы\n"
         "/help — Эта справка\n"
         "/menu — Главное меню\n"
+        "/newgame Название | ДД.ММ.ГГГГ ЧЧ:ММ | Место | Игроков — Создать игру одним сообщением\n"
+        "/attach ID — Привязать игру к групповому чату (в группе)\n"
+        "/cancelgames all|ID ID — Отменить несколько своих игр\n"
+        "/kick Имя | all|ID ID — Убрать участника из своих игр\n"
+        "/move ID | ДД.ММ.ГГГГ ЧЧ:ММ — Перенести свою игру\n"
+        "/dm on|off — Личные сообщения по играм групповых чатов\n"
+        "/digest realtime|hourly|daily — Уведомления сразу или сводкой раз в час/день\n"
+        "@бот запрос — Поиск игр в любом чате (инлайн-режим)\n"
         "/confirm_ID_userID — Подтвердить запрос (для создателей)\n"
         "/decline_ID_userID — Отклонить запрос (для создателей)\n\n"
         
         "<b>🎨 ОБОЗНАЧЕНИЯ:</b>\n"
         "👑 — Игры, которые вы создали\n"
         "✅ — Игры, в которых вы участвуете\n"
-        "⏳ — Игры с вашим pending запросом\n"
+        "⏳ — Игры, где вы в листе ожидания\n"
         "🎮 — Другие активные игры\n\n"
         
         "📧 <b>Поддержка:</b> По вопросам пишите @ваш_username"
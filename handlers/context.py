@@ -0,0 +1,41 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+import logging
+from .keyboards import get_user_game_ids
+
+logger = logging.getLogger(__name__)
+
+# Группа обработчика, заполняющего контекст (сборка O(1), поэтому порядок относительно анти-флуда не важен)
+USER_CONTEXT_GROUP = -2
+
+
+def build_user_context(user) -> dict:
+    """
+    Собирает контекст пользователя: ID созданных игр, игр где он участник,
+    игр где он в листе ожидания. Множества берутся из индексов без копирования.
+    """
+    game_ids = get_user_game_ids(user.id)
+    return {
+        'user_id': user.id,
+        'created': game_ids['created'],
+        'joined': game_ids['joined'],
+        'pending': game_ids['pending'],
+    }
+
+
+async def load_user_context(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Заполняет контекст пользователя один раз на обновление"""
+    if update.effective_user:
+        context.user_context = build_user_context(update.effective_user)
+
+
+def get_user_context(update: Update, context: ContextTypes.DEFAULT_TYPE) -> dict:
+    """
+    Возвращает контекст пользователя для текущего обновления.
+    Если пре-обработчик не отработал (например, в задачах), контекст собирается на месте.
+    """
+    user_context = getattr(context, 'user_context', None)
+    if user_context is None or user_context['user_id'] != update.effective_user.id:
+        user_context = build_user_context(update.effective_user)
+        context.user_context = user_context
+    return user_context
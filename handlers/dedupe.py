@@ -0,0 +1,103 @@
+from telegram import Update
+from telegram.ext import ContextTypes, ApplicationHandlerStop
+from collections import OrderedDict
+import logging
+import os
+import struct
+import time
+from config import settings
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Группа фильтра повторов: раньше всех остальных обработчиков
+DEDUPE_GROUP = -1002
+
+# Недавно обработанные обновления: update_id -> time.monotonic() (в порядке поступления)
+seen_updates = OrderedDict()
+# Наибольший принятый update_id и граница, восстановленная после перезапуска
+dedupe_state = {'high_water_mark': 0, 'restored_mark': 0, 'flushed_mark': 0, 'path': None}
+
+# Файл отметки: наибольший update_id и время записи (unix time)
+MARK_FORMAT = struct.Struct('<qd')
+# Telegram хранит недоставленные обновления не дольше суток; более старая отметка
+# не нужна, а после недели простоя нумерация обновлений может начаться заново
+MARK_TTL = 24 * 60 * 60
+
+
+def evict_seen(now: float):
+    """Удаляет записи старше окна и сверх лимита размера"""
+    horizon = now - settings.DEDUPE_WINDOW
+    while seen_updates:
+        update_id, seen_at = next(iter(seen_updates.items()))
+        if seen_at >= horizon and len(seen_updates) <= settings.DEDUPE_MAX_ENTRIES:
+            break
+        seen_updates.popitem(last=False)
+
+
+def is_duplicate(update_id: int) -> bool:
+    """Проверяет обновление и запоминает его; True — обновление уже обрабатывалось"""
+    if update_id in seen_updates or update_id <= dedupe_state['restored_mark']:
+        return True
+
+    now = time.monotonic()
+    seen_updates[update_id] = now
+    evict_seen(now)
+    if update_id > dedupe_state['high_water_mark']:
+        dedupe_state['high_water_mark'] = update_id
+    return False
+
+
+async def drop_duplicate_updates(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Фильтр повторно доставленных обновлений (вебхук, возобновление опроса после сбоя).
+    Повтор отбрасывается до всех обработчиков, чтобы не выполнять действие дважды.
+    """
+    if not is_duplicate(update.update_id):
+        return
+
+    metrics.increment('dedupe.dropped')
+    logger.warning(f"♻️ Повторное обновление {update.update_id} отброшено")
+    raise ApplicationHandlerStop
+
+
+def restore_mark(mark: int, saved_at: float):
+    """Принимает отметку из снимка или файла отметки, если она не устарела"""
+    if time.time() - saved_at > MARK_TTL:
+        logger.info(f"♻️ Отметка обновлений {mark} устарела и не используется")
+        return
+    if mark > dedupe_state['restored_mark']:
+        dedupe_state['restored_mark'] = mark
+        dedupe_state['high_water_mark'] = max(dedupe_state['high_water_mark'], mark)
+        dedupe_state['flushed_mark'] = dedupe_state['high_water_mark']
+
+
+def load_mark(path: str = None):
+    """Читает файл отметки (пишется после каждого сохранения снимка)"""
+    path = dedupe_state['path'] = path or settings.DEDUPE_MARK_PATH
+    try:
+        with open(path, 'rb') as mark_file:
+            mark, saved_at = MARK_FORMAT.unpack(mark_file.read(MARK_FORMAT.size))
+    except (OSError, struct.error):
+        return
+    restore_mark(mark, saved_at)
+    logger.info(f"♻️ Отметка обновлений: {dedupe_state['restored_mark']}")
+
+
+def flush_mark(mark: int, path: str = None):
+    """
+    Записывает отметку атомарно, если она изменилась. Вызывается только после
+    сохранения снимка с той же отметкой: после аварийной остановки Telegram
+    повторит обновления, чье действие не попало в снимок, и они не будут отброшены
+    """
+    if mark <= dedupe_state['flushed_mark']:
+        return
+    path = path or dedupe_state['path'] or settings.DEDUPE_MARK_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as mark_file:
+        mark_file.write(MARK_FORMAT.pack(mark, time.time()))
+    os.replace(temp_path, path)
+    dedupe_state['flushed_mark'] = mark
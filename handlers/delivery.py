@@ -0,0 +1,297 @@
+from telegram.error import Forbidden, BadRequest
+from collections import deque
+from datetime import datetime
+import asyncio
+import contextlib
+import contextvars
+import logging
+from config import settings
+from utils import metrics
+from utils.breaker import CLOSED, CircuitOpenError
+from utils.outbound import outbound_lane
+
+logger = logging.getLogger(__name__)
+
+# Словарь для хранения уведомлений: user_id -> список уведомлений
+notifications = {}
+# Уведомления, еще не прочитанные из снимка: user_id -> функция загрузки списка
+deferred_notifications = {}
+# Недоступные пользователи (заблокировали бота и т.п.): user_id -> причина
+unreachable_users = {}
+# Пользователи, включившие личные сообщения по играм групповых чатов
+group_dm_opt_in = set()
+# Режим доставки уведомлений: user_id -> 'hourly' | 'daily' (нет записи — сразу)
+digest_modes = {}
+# События, ожидающие сводки: user_id -> список {'message', 'timestamp'}
+digest_queue = {}
+# Отложенные отправки (задачи), которые нужно дождаться при остановке
+pending_deliveries = set()
+# Уведомления, не отправленные из-за разомкнутого выключателя:
+# (application, user_id, message); отправляются после восстановления API
+held_notifications = deque(maxlen=settings.BREAKER_DEFERRED_LIMIT)
+# Устанавливается при остановке: отложенные отправки выполняются сразу
+shutdown_requested = asyncio.Event()
+# Сборщик уведомлений текущей массовой операции (см. collect_notifications)
+current_collector = contextvars.ContextVar('notification_collector', default=None)
+
+# Предел длины сообщения Bot API
+MESSAGE_LIMIT = 4096
+# Разделитель уведомлений, объединенных в одно сообщение
+MERGED_SEPARATOR = "\n\n〰️〰️〰️\n\n"
+
+# Фрагменты текста BadRequest, означающие что чат недоступен навсегда
+PERMANENT_BAD_REQUEST_ERRORS = (
+    'chat not found',
+    'user not found',
+    'peer_id_invalid',
+)
+
+def load_deferred_notifications(user_id: int):
+    """Подгружает уведомления пользователя из снимка при первом обращении"""
+    loader = deferred_notifications.pop(user_id, None)
+    if loader is not None:
+        notifications[user_id] = loader() + notifications.get(user_id, [])
+
+def load_all_deferred_notifications():
+    """Подгружает все отложенные уведомления (перед сохранением снимка)"""
+    for user_id in list(deferred_notifications):
+        load_deferred_notifications(user_id)
+
+def add_notification(user_id: int, message: str):
+    """Добавляет уведомление пользователю"""
+    load_deferred_notifications(user_id)
+    if user_id in unreachable_users:
+        logger.debug(f"🚫 Пользователь {user_id} недоступен, уведомление не сохранено")
+        return
+    if user_id not in notifications:
+        notifications[user_id] = []
+    notifications[user_id].append({
+        'message': message,
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+    logger.info(f"📢 Уведомление для {user_id}: {message}")
+
+def get_notifications(user_id: int) -> list:
+    """Получает уведомления пользователя"""
+    load_deferred_notifications(user_id)
+    return notifications.get(user_id, [])
+
+def clear_notifications(user_id: int):
+    """Очищает уведомления пользователя"""
+    deferred_notifications.pop(user_id, None)
+    if user_id in notifications:
+        notifications[user_id] = []
+
+def is_user_reachable(user_id: int) -> bool:
+    """Проверяет, можно ли отправлять сообщения пользователю"""
+    return user_id not in unreachable_users
+
+def mark_user_unreachable(user_id: int, reason: str):
+    """Помечает пользователя недоступным и очищает его уведомления"""
+    unreachable_users[user_id] = reason
+    notifications.pop(user_id, None)
+    deferred_notifications.pop(user_id, None)
+    digest_queue.pop(user_id, None)
+    logger.warning(f"🚫 Пользователь {user_id} помечен недоступным: {reason}")
+
+def mark_user_reachable(user_id: int):
+    """Снимает пометку недоступности (пользователь снова нажал /start)"""
+    if unreachable_users.pop(user_id, None) is not None:
+        logger.info(f"✅ Пользователь {user_id} снова доступен")
+
+def is_permanent_delivery_error(error: Exception) -> bool:
+    """Определяет, является ли ошибка отправки постоянной"""
+    if isinstance(error, Forbidden):
+        return True
+    if isinstance(error, BadRequest):
+        error_text = str(error).lower()
+        return any(fragment in error_text for fragment in PERMANENT_BAD_REQUEST_ERRORS)
+    return False
+
+async def send_notification(application, user_id: int, message: str) -> bool:
+    """
+    Сохраняет уведомление и отправляет его пользователю.
+    Недоступные пользователи пропускаются, после постоянной ошибки
+    пользователь помечается недоступным. Пользователям со сводками
+    уведомление не отправляется, а ждет ближайшей сводки.
+    """
+    if not is_user_reachable(user_id):
+        logger.debug(f"🚫 Пропуск отправки недоступному пользователю {user_id}")
+        return False
+    
+    add_notification(user_id, message)
+    collector = current_collector.get()
+    if collector is not None and collector['open']:
+        collector['messages'].setdefault(user_id, []).append(message)
+        return True
+    return await dispatch_notification(application, user_id, message)
+
+async def dispatch_notification(application, user_id: int, message: str) -> bool:
+    """Отправляет сохраненное уведомление сразу или откладывает до сводки пользователя"""
+    if user_id in digest_modes:
+        digest_queue.setdefault(user_id, []).append({
+            'message': message,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+        return True
+    return await deliver_notification(application, user_id, message)
+
+@contextlib.contextmanager
+def collect_notifications():
+    """
+    Собирает уведомления, отправляемые внутри блока (во входящие они сохраняются
+    как обычно), чтобы затем отправить каждому пользователю одно сообщение
+    (send_collected_notifications). Задачи, запущенные внутри блока, после его
+    окончания отправляют уведомления сразу.
+    """
+    collector = {'open': True, 'messages': {}}
+    token = current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        collector['open'] = False
+        current_collector.reset(token)
+
+def pack_messages(messages: list, separator: str, limit: int = MESSAGE_LIMIT) -> list:
+    """Объединяет сообщения в как можно меньше текстов не длиннее limit"""
+    packed = []
+    for message in messages:
+        if packed and len(packed[-1]) + len(separator) + len(message) <= limit:
+            packed[-1] += separator + message
+        else:
+            packed.append(message)
+    return packed
+
+async def send_collected_notifications(application, collector: dict) -> int:
+    """
+    Отправляет собранные уведомления: одно сообщение на пользователя
+    (несколько — только если не помещаются в предел длины)
+    """
+    for user_id, messages in collector['messages'].items():
+        if is_user_reachable(user_id):
+            for text in pack_messages(messages, MERGED_SEPARATOR):
+                await dispatch_notification(application, user_id, text)
+    return len(collector['messages'])
+
+async def deliver_notification(application, user_id: int, message: str,
+                               lane: str = 'notification', hold: bool = True) -> bool:
+    """
+    Отправляет уже сохраненное уведомление. Пока выключатель разомкнут,
+    уведомление откладывается до восстановления API (во входящих оно уже есть);
+    при hold=False неотправленное уведомление сохраняет вызывающий.
+    """
+    try:
+        # Уведомления идут в своей полосе и не задерживают ответы пользователям
+        with outbound_lane(lane):
+            await application.bot.send_message(
+                chat_id=user_id,
+                text=message,
+                parse_mode='HTML'
+            )
+        return True
+    except CircuitOpenError:
+        if not hold:
+            return False
+        if len(held_notifications) == held_notifications.maxlen:
+            # Самое старое отложенное уведомление вытесняется (во входящих оно остается)
+            _, dropped_user_id, _ = held_notifications[0]
+            metrics.increment('delivery.held_dropped')
+            logger.warning(f"⚠️ Очередь отложенных уведомлений заполнена ({held_notifications.maxlen}), "
+                           f"уведомление пользователю {dropped_user_id} не будет отправлено")
+        held_notifications.append((application, user_id, message))
+        metrics.set_gauge('delivery.held', len(held_notifications))
+        return False
+    except Exception as e:
+        if is_permanent_delivery_error(e):
+            mark_user_unreachable(user_id, str(e))
+        else:
+            logger.error(f"Ошибка отправки уведомления пользователю {user_id}: {e}")
+        return False
+
+async def flush_held_notifications():
+    """Отправляет уведомления, отложенные на время недоступности API"""
+    count = len(held_notifications)
+    logger.info(f"📤 API восстановлен, отправка отложенных уведомлений: {count}")
+    for _ in range(count):
+        if not held_notifications:
+            break
+        application, user_id, message = held_notifications.popleft()
+        if is_user_reachable(user_id):
+            # При повторном размыкании уведомление вернется в очередь
+            await deliver_notification(application, user_id, message)
+    metrics.set_gauge('delivery.held', len(held_notifications))
+
+def on_breaker_transition(state: str):
+    """После замыкания выключателя запускает отправку отложенных уведомлений"""
+    if state == CLOSED and held_notifications:
+        track_delivery(flush_held_notifications(), name='flush-held-notifications')
+
+def watch_api_breaker(application):
+    """Подписывает отправку отложенных уведомлений на выключатель своего бота"""
+    breaker = getattr(application.bot.request, 'breaker', None)
+    if breaker is not None and on_breaker_transition not in breaker.listeners:
+        breaker.add_listener(on_breaker_transition)
+
+def wants_direct_messages(game: dict, user_id: int) -> bool:
+    """
+    Нужны ли пользователю личные сообщения по игре:
+    для обычных игр — всегда, для игр группового чата — только по подписке (/dm on)
+    """
+    return not game.get('group_chat_id') or user_id in group_dm_opt_in
+
+async def send_group_notification(application, chat_id: int, message: str) -> bool:
+    """Отправляет уведомление по игре в групповой чат"""
+    try:
+        with outbound_lane('notification'):
+            await application.bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
+        return True
+    except Exception as e:
+        logger.error(f"Ошибка отправки уведомления в группу {chat_id}: {e}")
+        return False
+
+async def notify_game_members(application, game: dict, message: str,
+                              exclude_user_id: int = None, to_group: bool = True):
+    """
+    Рассылает уведомление по игре: одно сообщение в групповой чат (если игра к нему привязана)
+    и личные сообщения участникам, которым они нужны
+    """
+    group_chat_id = game.get('group_chat_id')
+    if group_chat_id and to_group:
+        await send_group_notification(application, group_chat_id, message)
+    
+    for player_id in game.get('player_ids', []):
+        if player_id != exclude_user_id and wants_direct_messages(game, player_id):
+            await send_notification(application, player_id, message)
+
+def track_delivery(coroutine, name: str = None) -> asyncio.Task:
+    """Запускает отложенную отправку и регистрирует ее для дренажа при остановке"""
+    task = asyncio.get_running_loop().create_task(coroutine, name=name)
+    pending_deliveries.add(task)
+    task.add_done_callback(pending_deliveries.discard)
+    return task
+
+async def wait_or_shutdown(delay: float):
+    """Ждет delay секунд, но прерывается сразу при начале остановки"""
+    if delay <= 0 or shutdown_requested.is_set():
+        return
+    try:
+        await asyncio.wait_for(shutdown_requested.wait(), timeout=delay)
+    except asyncio.TimeoutError:
+        pass
+
+async def drain_deliveries(timeout: float) -> int:
+    """
+    Выполняет все отложенные отправки, ожидая не дольше timeout секунд.
+    Возвращает количество отправок, которые не успели завершиться.
+    """
+    shutdown_requested.set()
+    if not pending_deliveries:
+        return 0
+    
+    logger.info(f"📤 Дренаж исходящих отправок: {len(pending_deliveries)}")
+    done, pending = await asyncio.wait(set(pending_deliveries), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"⚠️ Не успели отправить до остановки: {len(pending)}")
+    return len(pending)
@@ -0,0 +1,162 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from datetime import datetime, timedelta
+import asyncio
+import logging
+from config import settings
+from utils import metrics
+from .delivery import (
+    MESSAGE_LIMIT,
+    digest_modes,
+    digest_queue,
+    is_user_reachable,
+    deliver_notification,
+    track_delivery
+)
+
+logger = logging.getLogger(__name__)
+
+DIGEST_MODES = ('realtime', 'hourly', 'daily')
+DIGEST_TITLES = {'hourly': "СВОДКА ЗА ЧАС", 'daily': "СВОДКА ЗА ДЕНЬ"}
+# Задача рассылки сводок
+digest_task = {'task': None}
+
+
+def set_digest_mode(user_id: int, mode: str):
+    """Устанавливает режим доставки уведомлений пользователя"""
+    if mode == 'realtime':
+        digest_modes.pop(user_id, None)
+    else:
+        digest_modes[user_id] = mode
+
+
+def event_time(timestamp: str, mode: str) -> str:
+    """Время события в сводке: ЧЧ:ММ, для дневной — ДД.ММ ЧЧ:ММ"""
+    if mode == 'daily':
+        return f"{timestamp[8:10]}.{timestamp[5:7]} {timestamp[11:16]}"
+    return timestamp[11:16]
+
+
+def render_digest(items: list, mode: str) -> str:
+    """
+    Одно сообщение со всеми событиями окна. События не разрезаются:
+    не поместившиеся в предел длины заменяются строкой с их количеством
+    """
+    header = f"📬 <b>{DIGEST_TITLES.get(mode, 'СВОДКА')}</b> — событий: {len(items)}"
+    parts = [header]
+    length = len(header)
+    for position, item in enumerate(items):
+        # Пустые строки внутри уведомления в сводке не нужны
+        lines = [line for line in item['message'].splitlines() if line.strip()]
+        entry = f"🕒 {event_time(item['timestamp'], mode)}\n" + "\n".join(lines)
+        rest = f"…и еще {len(items) - position}, все они в разделе уведомлений"
+        # Место под строку о пропущенных событиях оставляем всегда, кроме последнего события
+        reserve = 0 if position == len(items) - 1 else len(rest) + 2
+        if length + len(entry) + 2 + reserve > MESSAGE_LIMIT:
+            parts.append(rest)
+            break
+        parts.append(entry)
+        length += len(entry) + 2
+    return "\n\n".join(parts)
+
+
+async def send_digest(application, user_id: int, mode: str) -> bool:
+    """
+    Отправляет пользователю накопленную сводку (в полосе массовых рассылок).
+    При временной ошибке события возвращаются в очередь и уйдут следующей сводкой
+    """
+    items = digest_queue.pop(user_id, None)
+    if not items or not is_user_reachable(user_id):
+        return False
+    if await deliver_notification(application, user_id, render_digest(items, mode), lane='bulk', hold=False):
+        return True
+    # Недоступному пользователю (постоянная ошибка) и перешедшему на мгновенные уведомления
+    # сводка не нужна — события остаются во входящих
+    if is_user_reachable(user_id) and user_id in digest_modes:
+        digest_queue[user_id] = items + digest_queue.get(user_id, [])
+    return False
+
+
+async def send_digests(application, modes) -> int:
+    """
+    Рассылает сводки пользователям с указанными режимами пачками по
+    DIGEST_BATCH_SIZE; скорость ограничивает планировщик исходящих запросов
+    """
+    user_ids = [user_id for user_id in digest_queue if digest_modes.get(user_id) in modes]
+    sent = 0
+    for start in range(0, len(user_ids), settings.DIGEST_BATCH_SIZE):
+        batch = user_ids[start:start + settings.DIGEST_BATCH_SIZE]
+        results = await asyncio.gather(*(
+            send_digest(application, user_id, digest_modes.get(user_id)) for user_id in batch
+        ))
+        sent += sum(results)
+    metrics.increment('digest.sent', sent)
+    if user_ids:
+        logger.info(f"📬 Сводки ({', '.join(modes)}): отправлено {sent} из {len(user_ids)}")
+    return sent
+
+
+def due_modes(moment: datetime) -> list:
+    """Режимы, чье окно заканчивается в начале часа moment"""
+    modes = ['hourly']
+    if moment.hour == settings.DIGEST_DAILY_HOUR:
+        modes.append('daily')
+    return modes
+
+
+async def digest_loop(application):
+    """Рассылает сводки в начале каждого часа (дневные — в DIGEST_DAILY_HOUR)"""
+    while True:
+        now = datetime.now()
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        await asyncio.sleep((next_hour - now).total_seconds())
+        try:
+            await send_digests(application, due_modes(next_hour))
+        except Exception as e:
+            logger.error(f"Ошибка рассылки сводок: {e}")
+
+
+def start_digests(application):
+    """Запускает рассылку сводок (вызывать из event loop)"""
+    if digest_task['task'] is None:
+        digest_task['task'] = asyncio.get_running_loop().create_task(
+            digest_loop(application), name="digest"
+        )
+
+
+def stop_digests():
+    """Останавливает рассылку сводок (накопленные события сохраняются в снимке)"""
+    if digest_task['task'] is not None:
+        digest_task['task'].cancel()
+        digest_task['task'] = None
+
+
+async def digest_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /digest realtime|hourly|daily — режим доставки уведомлений"""
+    user_id = update.effective_user.id
+    argument = context.args[0].lower() if context.args else ''
+
+    if argument not in DIGEST_MODES:
+        mode = digest_modes.get(user_id, 'realtime')
+        await update.message.reply_text(
+            f"ℹ️ Режим уведомлений: {mode}.\nФормат: /digest realtime, /digest hourly или /digest daily"
+        )
+        return
+
+    previous = digest_modes.get(user_id)
+    set_digest_mode(user_id, argument)
+    if argument == 'realtime':
+        text = "🔔 Уведомления будут приходить сразу."
+        # Накопленное за текущее окно отправляем сразу, не дожидаясь сводки
+        if previous and digest_queue.get(user_id):
+            track_delivery(send_digest(context.application, user_id, previous), name=f"digest-{user_id}")
+    elif argument == 'hourly':
+        text = "📬 Уведомления будут приходить сводкой раз в час."
+    else:
+        text = f"📬 Уведомления будут приходить сводкой раз в день ({settings.DIGEST_DAILY_HOUR:02d}:00)."
+    if argument != 'realtime':
+        # Рассылка запускается при первом включении сводок
+        start_digests(context.application)
+    logger.info(f"📬 Пользователь {user_id}: режим уведомлений {argument}")
+
+    await update.message.reply_text(text)
@@ -0,0 +1,218 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from datetime import datetime
+from config import settings
+from . import keyboards, delivery, waitlist
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+# Колонки CSV: записи разных типов в одном файле, лишние поля пустые
+CSV_COLUMNS = (
+    'record', 'game_id', 'user_id', 'name', 'role', 'title', 'date', 'location',
+    'max_players', 'players', 'status', 'created_at', 'updated_at', 'timestamp', 'message',
+)
+# Байт на завершение gzip-части (последний блок и трейлер)
+PART_FINISH_OVERHEAD = 64
+# Через сколько записей отдавать управление event loop
+YIELD_EVERY = 500
+
+
+def game_records():
+    """Игры и участие в них: запись игры, затем участники и лист ожидания"""
+    for game in list(keyboards.games):
+        game_id = game['id']
+        yield {
+            'record': 'game',
+            'game_id': game_id,
+            'user_id': game.get('creator_id'),
+            'name': game.get('creator'),
+            'title': game.get('title'),
+            'date': game.get('date'),
+            'location': game.get('location'),
+            'max_players': game.get('max_players'),
+            'players': len(game.get('player_ids', [])),
+            'status': game.get('status'),
+            'created_at': game.get('created_at'),
+            'updated_at': game.get('updated_at'),
+        }
+        creator_id = game.get('creator_id')
+        for user_id, name in list(zip(game.get('player_ids', []), game.get('players', []))):
+            yield {
+                'record': 'membership',
+                'game_id': game_id,
+                'user_id': user_id,
+                'name': name,
+                'role': 'creator' if user_id == creator_id else 'player',
+            }
+        for user_id, name in list(waitlist.waitlists.get(game_id, {}).items()):
+            yield {
+                'record': 'membership',
+                'game_id': game_id,
+                'user_id': user_id,
+                'name': name,
+                'role': 'waiting',
+            }
+
+
+def notification_records():
+    """
+    События уведомлений. Еще не загруженные из снимка уведомления
+    читаются по одному пользователю и не остаются в памяти.
+    """
+    for user_id in list(delivery.notifications.keys() | delivery.deferred_notifications.keys()):
+        loader = delivery.deferred_notifications.get(user_id)
+        items = list(delivery.notifications.get(user_id, []))
+        if loader is not None:
+            items = loader() + items
+        for item in items:
+            yield {
+                'record': 'notification',
+                'user_id': user_id,
+                'timestamp': item.get('timestamp'),
+                'message': item.get('message'),
+            }
+
+
+def export_records():
+    """Все записи выгрузки по порядку"""
+    yield from game_records()
+    yield from notification_records()
+
+
+def encode_jsonl(records):
+    """Записи в строки JSON Lines"""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def encode_csv(records):
+    """Записи в строки CSV (с заголовком)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Пустая выгрузка — только заголовок
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+ENCODERS = {'csv': encode_csv, 'jsonl': encode_jsonl}
+
+
+class PartWriter:
+    """
+    Пишет поток строк в gzip-файлы ограниченного размера. Каждая часть —
+    самостоятельный gzip-файл; после max_bytes сжатых данных запись прекращается.
+    """
+
+    def __init__(self, path_prefix: str, extension: str, part_size: int, max_bytes: int):
+        self.path_prefix = path_prefix
+        self.extension = extension
+        self.part_size = part_size
+        self.max_bytes = max_bytes
+        self.paths = []
+        self.written = 0  # сжатых байт во всех частях
+        self.truncated = False
+        self.file = None
+        self.part_written = 0
+        self.unflushed = 0  # несжатых байт, отданных компрессору после последнего сброса
+        self.compressor = None
+
+    def open_part(self):
+        """Начинает новую часть"""
+        path = f"{self.path_prefix}.part{len(self.paths) + 1}.{self.extension}.gz"
+        self.paths.append(path)
+        self.file = open(path, 'wb')
+        self.part_written = 0
+        self.unflushed = 0
+        # wbits=31 — формат gzip
+        self.compressor = zlib.compressobj(settings.EXPORT_COMPRESS_LEVEL, zlib.DEFLATED, 31)
+
+    def write_bytes(self, data: bytes):
+        """Пишет сжатые данные в текущую часть"""
+        if data:
+            self.file.write(data)
+            self.part_written += len(data)
+            self.written += len(data)
+
+    def close_part(self):
+        """Завершает текущую часть"""
+        if self.file is None:
+            return
+        self.write_bytes(self.compressor.flush(zlib.Z_FINISH))
+        self.file.close()
+        self.file = None
+
+    def fits(self, size: int) -> bool:
+        """Поместятся ли size несжатых байт в часть (сжатые данные не больше несжатых)"""
+        return self.part_written + self.unflushed + size + PART_FINISH_OVERHEAD <= self.part_size
+
+    def write(self, line: str) -> bool:
+        """Пишет строку; False — достигнут предел общего размера"""
+        if self.written >= self.max_bytes:
+            self.truncated = True
+            return False
+        data = line.encode('utf-8')
+        if self.file is None:
+            self.open_part()
+        elif not self.fits(len(data)):
+            # У границы части сбрасываем компрессор, чтобы узнать точный размер
+            self.write_bytes(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+            self.unflushed = 0
+            if not self.fits(len(data)):
+                self.close_part()
+                self.open_part()
+        self.write_bytes(self.compressor.compress(data))
+        self.unflushed += len(data)
+        return True
+
+
+async def write_export(path_prefix: str, export_format: str = 'jsonl',
+                       part_size: int = None, max_bytes: int = None) -> dict:
+    """
+    Выгружает игры, участие и уведомления в сжатые файлы path_prefix.partN.<формат>.gz.
+    Данные идут через цепочку генераторов построчно, в памяти нет всей выгрузки;
+    управление периодически возвращается event loop.
+    Возвращает {'paths': [...], 'lines': N, 'bytes': N, 'truncated': bool}.
+    """
+    if export_format not in ENCODERS:
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+    directory = os.path.dirname(path_prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    writer = PartWriter(
+        path_prefix, export_format,
+        part_size or settings.EXPORT_PART_SIZE,
+        max_bytes or settings.EXPORT_MAX_BYTES
+    )
+    lines = 0
+    try:
+        for line in ENCODERS[export_format](export_records()):
+            if not writer.write(line):
+                logger.warning(f"⚠️ Выгрузка обрезана на пределе {writer.max_bytes} байт")
+                break
+            lines += 1
+            if lines % YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+    finally:
+        writer.close_part()
+
+    logger.info(f"📦 Выгрузка: частей={len(writer.paths)}, строк={lines}, "
+                f"размер={writer.written} байт, обрезана={writer.truncated}")
+    return {'paths': writer.paths, 'lines': lines, 'bytes': writer.written, 'truncated': writer.truncated}
+
+
+def export_prefix(directory: str) -> str:
+    """Префикс файлов выгрузки с меткой времени"""
+    return os.path.join(directory, f"gatherbot-export-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
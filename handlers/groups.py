@@ -0,0 +1,94 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+import logging
+from .keyboards import get_game_by_id, join_game, leave_game
+from .delivery import group_dm_opt_in
+from .cards import post_group_roster
+
+logger = logging.getLogger(__name__)
+
+GROUP_CHAT_TYPES = ('group', 'supergroup')
+# Предел длины ответа на нажатие кнопки (ограничение Telegram)
+CALLBACK_ANSWER_LIMIT = 200
+
+
+async def attach_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /attach ID в групповом чате:
+    привязывает игру к группе и публикует общий список участников
+    """
+    chat = update.effective_chat
+    user_id = update.effective_user.id
+    
+    if chat.type not in GROUP_CHAT_TYPES:
+        await update.message.reply_text("ℹ️ Команда /attach работает только в групповом чате.")
+        return
+    
+    try:
+        game_id = int(context.args[0])
+    except (IndexError, ValueError):
+        await update.message.reply_text("❌ Формат: /attach ID_игры")
+        return
+    
+    game = get_game_by_id(game_id)
+    if not game:
+        await update.message.reply_text("❌ Игра не найдена.")
+        return
+    
+    if game.get('creator_id') != user_id:
+        logger.warning(f"⚠️ Попытка привязать чужую игру: Игра={game_id}, Пользователь={user_id}")
+        await update.message.reply_text("❌ Привязать игру к группе может только ее создатель.")
+        return
+    
+    await post_group_roster(context.application, game, chat.id)
+
+
+async def dm_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /dm on|off — личные сообщения по играм групповых чатов"""
+    user_id = update.effective_user.id
+    argument = context.args[0].lower() if context.args else ''
+    
+    if argument == 'on':
+        group_dm_opt_in.add(user_id)
+        text = "🔔 Вы будете получать личные сообщения по играм групповых чатов."
+    elif argument == 'off':
+        group_dm_opt_in.discard(user_id)
+        text = "🔕 Личные сообщения по играм групповых чатов отключены."
+    else:
+        state = "включены" if user_id in group_dm_opt_in else "отключены"
+        text = f"ℹ️ Личные сообщения по играм групповых чатов {state}.\nФормат: /dm on или /dm off"
+    
+    await update.message.reply_text(text)
+
+
+async def handle_roster_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик кнопок входа/выхода под списком участников в группе
+    и кнопок подтверждения места из листа ожидания
+    """
+    query = update.callback_query
+    action, game_id = query.data.split(':')
+    user = query.from_user
+    
+    logger.info(f"👥 Пользователь {user.id}: {action} игры {game_id}")
+    
+    if action in ('join', 'claim'):
+        result = await join_game(int(game_id), user.first_name, user.id, context.application)
+    else:
+        result = await leave_game(int(game_id), user.id, context.application)
+    
+    # Ответ видит только нажавший; общий список обновится редактированием
+    answer = result['message']
+    if result.get('warning'):
+        answer += f"\n⚠️ {result['warning']}"
+    # Слишком длинный ответ Telegram отклоняет, и список не обновился бы
+    if len(answer) > CALLBACK_ANSWER_LIMIT:
+        answer = answer[:CALLBACK_ANSWER_LIMIT - 1] + "…"
+    await query.answer(answer, show_alert=bool(result.get('warning')))
+    
+    # Предложение места одноразовое — убираем кнопки
+    if action in ('claim', 'pass') and query.message:
+        try:
+            await query.edit_message_reply_markup(reply_markup=None)
+        except Exception as e:
+            logger.debug(f"Не удалось убрать кнопки предложения места: {e}")
@@ -1,7 +1,42 @@
-from telegram import ReplyKeyboardMarkup, KeyboardButton
+from telegram import ReplyKeyboardMarkup, KeyboardButton, WebAppInfo
 from datetime import datetime
 import logging
 import asyncio
+from config import settings
+from .delivery import (
+    notifications,
+    deferred_notifications,
+    unreachable_users,
+    digest_queue,
+    add_notification,
+    get_notifications,
+    clear_notifications,
+    is_user_reachable,
+    mark_user_unreachable,
+    mark_user_reachable,
+    send_notification,
+    notify_game_members,
+    wants_direct_messages
+)
+from .cards import schedule_card_update, close_game_cards
+from .search import index_game, unindex_game, rebuild_search_index
+from . import stats
+from .schedule import add_to_schedule, remove_from_schedule, find_conflict, reset_schedules
+from .waitlist import (
+    waitlists,
+    waiting_by_user,
+    seat_offers,
+    reset_waitlists,
+    is_waiting,
+    queue_position,
+    add_to_waitlist,
+    remove_from_waitlist,
+    next_waiting,
+    pop_next_waiting,
+    take_offer,
+    clear_waitlist,
+    offer_seat
+)
 
 logger = logging.getLogger(__name__)
 
@@ -10,13 +45,16 @@ CREATE_GAME = "🎮 Создать игру"
 GAME_LIST = "📋 Список игр"
 CONFIRMED_GAMES = "✅ Подтвержденные игры"
 MY_GAMES = "👤 Мои игры"
+QUICK_CREATE_GAME = "⚡ Быстрое создание"
 BACK_TO_MENU = "⬅️ Назад в меню"
 
 # Хранилище данных
 games = []  # Список всех игр
 game_id_counter = 1  # Счетчик для ID игр
-# Словарь для хранения уведомлений: user_id -> список уведомлений
-notifications = {}
+# Индексы: game_id -> игра, user_id -> ID созданных игр / ID игр, где пользователь в player_ids
+games_by_id = {}
+created_by_user = {}
+joined_by_user = {}
 
 def get_main_keyboard(with_back: bool = False) -> ReplyKeyboardMarkup:
     """Создает главную клавиатуру с 4 кнопками"""
@@ -27,29 +65,31 @@ def get_main_keyboard(with_back: bool = False) -> ReplyKeyboardMarkup:
         [KeyboardButton(MY_GAMES)]
     ]
     
+    # Форма создания игры в одно действие (если настроен Web App)
+    if settings.GAME_FORM_WEBAPP_URL:
+        keyboard.insert(1, [KeyboardButton(QUICK_CREATE_GAME, web_app=WebAppInfo(settings.GAME_FORM_WEBAPP_URL))])
+    
     if with_back:
         keyboard.append([KeyboardButton(BACK_TO_MENU)])
     
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
 
-def add_notification(user_id: int, message: str):
-    """Добавляет уведомление пользователю"""
-    if user_id not in notifications:
-        notifications[user_id] = []
-    notifications[user_id].append({
-        'message': message,
-        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
-    logger.info(f"📢 Уведомление для {user_id}: {message}")
-
-def get_notifications(user_id: int) -> list:
-    """Получает уведомления пользователя"""
-    return notifications.get(user_id, [])
-
-def clear_notifications(user_id: int):
-    """Очищает уведомления пользователя"""
-    if user_id in notifications:
-        notifications[user_id] = []
+def reset_store():
+    """Очищает хранилище игр, индексы и уведомления"""
+    global game_id_counter
+    games.clear()
+    games_by_id.clear()
+    created_by_user.clear()
+    joined_by_user.clear()
+    notifications.clear()
+    deferred_notifications.clear()
+    unreachable_users.clear()
+    digest_queue.clear()
+    reset_waitlists()
+    reset_schedules()
+    rebuild_search_index(games)
+    stats.reset_stats()
+    game_id_counter = 1
 
 def add_game(game_data: dict, application) -> dict:
     """Добавляет игру в список и возвращает полные данные игры"""
@@ -72,15 +112,45 @@ def add_game(game_data: dict, application) -> dict:
         'status': 'active',  # active, gathering, completed
         'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'notified_gathering': False  # Было ли отправлено уведомление о сборе
+        'duration': game_data.get('duration'),  # Длительность в минутах (None — по умолчанию)
+        'notified_gathering': False,  # Было ли отправлено уведомление о сборе
+        'version': 0,  # Увеличивается при каждом изменении (для кэшей)
+        'group_chat_id': game_data.get('group_chat_id'),  # Групповой чат игры (если привязана)
+        'group_message_id': None  # Сообщение со списком участников в группе
     }
     
     games.append(full_game_data)
+    games_by_id[game_id] = full_game_data
+    created_by_user.setdefault(full_game_data['creator_id'], set()).add(game_id)
+    joined_by_user.setdefault(full_game_data['creator_id'], set()).add(game_id)
+    add_to_schedule(full_game_data['creator_id'], full_game_data)
+    index_game(full_game_data)
+    stats.record_game_created(full_game_data)
     logger.info(f"✅ Игра добавлена: ID={game_id}, Название='{full_game_data['title']}', "
                 f"Длина названия={len(full_game_data['title'])}, Создатель={full_game_data['creator_id']}")
     
     return full_game_data
 
+def rebuild_indexes():
+    """Перестраивает индексы по списку игр (после загрузки снимка)"""
+    games_by_id.clear()
+    created_by_user.clear()
+    joined_by_user.clear()
+    reset_schedules()
+    for game in games:
+        games_by_id[game['id']] = game
+        created_by_user.setdefault(game.get('creator_id'), set()).add(game['id'])
+        for player_id in game.get('player_ids', []):
+            joined_by_user.setdefault(player_id, set()).add(game['id'])
+            add_to_schedule(player_id, game)
+    rebuild_search_index(games)
+    stats.rebuild_gauges(games)
+
+def touch_game(game: dict):
+    """Отмечает изменение игры: время обновления и версия для кэшей"""
+    game['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    game['version'] = game.get('version', 0) + 1
+
 async def check_game_gathering(game_id: int, application):
     """Проверяет, собралась ли комната"""
     await asyncio.sleep(0.1)  # Небольшая задержка
@@ -95,7 +165,8 @@ async def check_game_gathering(game_id: int, application):
     if current_players >= max_players and not game.get('notified_gathering'):
         game['notified_gathering'] = True
         game['status'] = 'gathering'  # Меняем статус на "собирается"
-        game['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        touch_game(game)
+        stats.record_filled(game)
         
         # Отправляем уведомление всем участникам
         notification_msg = (
@@ -107,17 +178,10 @@ async def check_game_gathering(game_id: int, application):
             f"Приятной игры! 🎲"
         )
         
-        for player_id in game.get('player_ids', []):
-            add_notification(player_id, notification_msg)
-            try:
-                # Пытаемся отправить уведомление через бота
-                await application.bot.send_message(
-                    chat_id=player_id,
-                    text=notification_msg,
-                    parse_mode='HTML'
-                )
-            except Exception as e:
-                logger.error(f"Ошибка отправки уведомления пользователю {player_id}: {e}")
+        await notify_game_members(application, game, notification_msg)
+        
+        if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+            schedule_card_update(application, game)
         
         logger.info(f"🎉 Комната собралась: Игра {game_id}")
 
@@ -129,25 +193,34 @@ def get_confirmed_games() -> list:
     """Возвращает список игр где все участники собрались"""
     return [game for game in games if game.get('status') == 'gathering']
 
-def get_user_games(user_id: int) -> dict:
+def get_user_game_ids(user_id: int) -> dict:
+    """Возвращает множества ID игр пользователя из индексов (без копирования)"""
+    return {
+        'created': created_by_user.get(user_id, frozenset()),
+        'joined': joined_by_user.get(user_id, frozenset()),
+        'pending': waiting_by_user.get(user_id, frozenset())
+    }
+
+def games_from_ids(game_ids) -> list:
+    """Возвращает активные игры по множеству ID в порядке создания"""
+    result = []
+    for game_id in sorted(game_ids):
+        game = games_by_id.get(game_id)
+        if game and game.get('status') in ['active', 'gathering']:
+            result.append(game)
+    return result
+
+def get_user_games(user_id: int, user_context: dict = None) -> dict:
     """Возвращает игры пользователя разделенные по категориям"""
-    created_games = []
-    joined_games = []
+    game_ids = user_context or get_user_game_ids(user_id)
     
-    for game in games:
-        if game.get('status') not in ['active', 'gathering']:
-            continue
-            
-        # Игры созданные пользователем
-        if game.get('creator_id') == user_id:
-            created_games.append(game)
-        # Игры где пользователь участник
-        elif user_id in game.get('player_ids', []):
-            joined_games.append(game)
+    created_games = games_from_ids(game_ids['created'])
+    # Игры где пользователь участник, но не создатель
+    joined_games = games_from_ids(game_ids['joined'] - game_ids['created'])
     
-    logger.info(f"👤 Игры пользователя {user_id}: "
-                f"создано={len(created_games)}, "
-                f"участвует={len(joined_games)}")
+    logger.debug(f"👤 Игры пользователя {user_id}: "
+                 f"создано={len(created_games)}, "
+                 f"участвует={len(joined_games)}")
     
     return {
         'created': created_games,
@@ -156,10 +229,7 @@ def get_user_games(user_id: int) -> dict:
 
 def get_game_by_id(game_id: int):
     """Находит игру по ID"""
-    for game in games:
-        if game.get('id') == game_id:
-            return game
-    return None
+    return games_by_id.get(game_id)
 
 def get_game_by_title_partial(title_part: str):
     """Находит игру по части названия"""
@@ -174,7 +244,7 @@ def get_game_by_title_partial(title_part: str):
     logger.warning(f"❌ Игра с частью названия '{title_part}' не найдена")
     return None
 
-def format_game_button(game: dict, user_id: int = None) -> str:
+def format_game_button(game: dict, user_id: int = None, user_context: dict = None) -> str:
     """Форматирует текст для кнопки игры"""
     game_title = game.get('title', 'Без названия')
     players = len(game.get('players', []))
@@ -194,11 +264,20 @@ def format_game_button(game: dict, user_id: int = None) -> str:
     # Определяем префикс в зависимости от статуса пользователя
     prefix = status_icon  # По умолчанию для других игр
     
-    if user_id:
+    if user_context:
+        if game_id in user_context['created']:
+            prefix = "👑"
+        elif game_id in user_context['joined']:
+            prefix = "✅"
+        elif game_id in user_context['pending']:
+            prefix = "⏳"
+    elif user_id:
         if game.get('creator_id') == user_id:
             prefix = "👑"
         elif user_id in game.get('player_ids', []):
             prefix = "✅"
+        elif is_waiting(game_id, user_id):
+            prefix = "⏳"
     
     # Формат: префикс + обрезанное название + игроки + ID в конце
     button_text = f"{prefix} {display_title} ({players}/{max_players}) [{game_id}]"
@@ -266,10 +345,12 @@ def parse_game_button(button_text: str):
         logger.error(f"❌ Ошибка парсинга кнопки '{button_text}': {e}")
         return None
 
-def get_games_keyboard(user_id: int = None) -> ReplyKeyboardMarkup:
+def get_games_keyboard(user_id: int = None, user_context: dict = None) -> ReplyKeyboardMarkup:
     """Создает клавиатуру со списком игр с разделением"""
-    user_games = get_user_games(user_id) if user_id else {'created': [], 'joined': []}
-    active_games = get_active_games()
+    if user_id and not user_context:
+        user_context = get_user_game_ids(user_id)
+    user_games = get_user_games(user_id, user_context) if user_context else {'created': [], 'joined': []}
+    created_ids = user_context['created'] if user_context else frozenset()
     
     keyboard = []
     
@@ -278,11 +359,11 @@ def get_games_keyboard(user_id: int = None) -> ReplyKeyboardMarkup:
         keyboard.append([KeyboardButton("📌 МОИ СОЗДАННЫЕ ИГРЫ 📌")])
         
         for game in user_games['created'][:5]:  # Ограничиваем 5 играми
-            button_text = format_game_button(game, user_id)
+            button_text = format_game_button(game, user_id, user_context)
             keyboard.append([KeyboardButton(button_text)])
     
     # Затем другие активные игры
-    other_games = [g for g in active_games if g not in user_games['created']]
+    other_games = [g for g in get_active_games() if g['id'] not in created_ids]
     
     if other_games:
         if user_games['created']:
@@ -291,7 +372,7 @@ def get_games_keyboard(user_id: int = None) -> ReplyKeyboardMarkup:
         keyboard.append([KeyboardButton("🎮 ДРУГИЕ АКТИВНЫЕ ИГРЫ 🎮")])
         
         for game in other_games[:10]:  # Ограничиваем 10 играми
-            button_text = format_game_button(game, user_id)
+            button_text = format_game_button(game, user_id, user_context)
             keyboard.append([KeyboardButton(button_text)])
     
     keyboard.append([KeyboardButton(BACK_TO_MENU)])
@@ -303,6 +384,28 @@ def get_games_keyboard(user_id: int = None) -> ReplyKeyboardMarkup:
     
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
+def add_player_to_game(game: dict, user_name: str, user_id: int):
+    """Добавляет участника в игру и обновляет индекс"""
+    game['players'].append(user_name)
+    game['player_ids'].append(user_id)
+    touch_game(game)
+    joined_by_user.setdefault(user_id, set()).add(game['id'])
+    add_to_schedule(user_id, game)
+
+def remove_player_from_game(game: dict, user_id: int) -> str:
+    """Удаляет участника из игры, обновляет индекс и возвращает его имя"""
+    user_idx = game['player_ids'].index(user_id)
+    user_name = game['players'].pop(user_idx)
+    game['player_ids'].pop(user_idx)
+    touch_game(game)
+    joined_ids = joined_by_user.get(user_id)
+    if joined_ids is not None:
+        joined_ids.discard(game['id'])
+        if not joined_ids:
+            del joined_by_user[user_id]
+    remove_from_schedule(user_id, game)
+    return user_name
+
 async def join_game(game_id: int, user_name: str, user_id: int, application) -> dict:
     """Вход пользователя в игру"""
     game = get_game_by_id(game_id)
@@ -321,12 +424,43 @@ async def join_game(game_id: int, user_name: str, user_id: int, application) ->
         logger.info(f"ℹ️ Пользователь {user_id} уже участвует в игре {game_id}")
         return {'success': False, 'message': 'Вы уже участвуете в этой игре'}
     
-    # Проверяем есть ли свободные места
+    # Пересечение по времени с другими играми пользователя
+    conflict_game = None
+    if settings.SCHEDULE_CONFLICT_MODE != 'off':
+        conflict_game = get_game_by_id(find_conflict(user_id, game))
+    if conflict_game and settings.SCHEDULE_CONFLICT_MODE == 'block':
+        logger.info(f"📅 Пользователь {user_id} не вошел в игру {game_id}: пересечение с игрой {conflict_game['id']}")
+        return {
+            'success': False,
+            'message': f"Время игры пересекается с игрой «{conflict_game.get('title')}» ({conflict_game.get('date')})"
+        }
+    
+    # Предложенное пользователю место из листа ожидания — вход его подтверждает
+    offer = seat_offers.get(game_id)
+    claimed = bool(offer and offer['user_id'] == user_id)
+    if claimed:
+        take_offer(game_id)
+        offer = None
+    
+    # Проверяем есть ли свободные места. Пока есть очередь, свободные места принадлежат ей:
+    # место, предложенное другому, занято, остальные достаются ожидающим по порядку
     current_players = len(game.get('players', []))
     max_players = game.get('max_players', 0)
-    
-    if current_players >= max_players:
-        return {'success': False, 'message': 'Все места заняты'}
+    free_seats = max_players - current_players - (1 if offer else 0)
+    
+    position = 0 if claimed else queue_position(game_id, user_id)
+    
+    if position >= free_seats:
+        if is_waiting(game_id, user_id):
+            return {'success': False, 'waitlisted': True, 'message': 'Вы уже в листе ожидания'}
+        position = add_to_waitlist(game_id, user_id, user_name)
+        logger.info(f"⏳ Пользователь {user_id} в листе ожидания игры {game_id}, место {position}")
+        return {
+            'success': False,
+            'waitlisted': True,
+            'message': f'Все места заняты. Вы в листе ожидания (место {position}), '
+                       f'при освобождении места оно достанется вам автоматически'
+        }
     
     # Проверяем не отклонил ли уже пользователь
     if user_id in game.get('declined_users', []):
@@ -334,9 +468,10 @@ async def join_game(game_id: int, user_name: str, user_id: int, application) ->
         game['declined_users'].remove(user_id)
     
     # Добавляем в участники
-    game['players'].append(user_name)
-    game['player_ids'].append(user_id)
-    game['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    add_player_to_game(game, user_name, user_id)
+    stats.record_join(game)
+    # Вошедший напрямую больше не ждет места
+    remove_from_waitlist(game_id, user_id)
     
     logger.info(f"✅ Пользователь вошел в игру: Игра={game_id}, Пользователь={user_id}")
     
@@ -348,27 +483,29 @@ async def join_game(game_id: int, user_name: str, user_id: int, application) ->
         f"👥 Теперь участников: {current_players + 1}/{max_players}"
     )
     
-    for player_id in game.get('player_ids', []):
-        if player_id != user_id:  # Не отправляем уведомление самому себе
-            add_notification(player_id, notification_msg)
-            try:
-                await application.bot.send_message(
-                    chat_id=player_id,
-                    text=notification_msg,
-                    parse_mode='HTML'
-                )
-            except Exception as e:
-                logger.error(f"Ошибка отправки уведомления о входе пользователю {player_id}: {e}")
+    if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+        # Участники видят изменение в карточке игры и списке в группе
+        schedule_card_update(application, game)
+    if not settings.GAME_CARDS_ENABLED:
+        # Не отправляем уведомление самому себе
+        await notify_game_members(application, game, notification_msg, exclude_user_id=user_id, to_group=False)
     
     # Проверяем, собралась ли комната
     if current_players + 1 >= max_players:
         await check_game_gathering(game_id, application)
+    elif game_id in waitlists:
+        # Подтвержденное предложение: оставшиеся свободные места — следующим в очереди
+        await promote_from_waitlist(game, application)
     
-    return {
+    result = {
         'success': True, 
         'message': 'Вы успешно вошли в игру!',
         'game': game
     }
+    if conflict_game:
+        result['warning'] = (f"Время игры пересекается с игрой «{conflict_game.get('title')}» "
+                             f"({conflict_game.get('date')})")
+    return result
 
 async def leave_game(game_id: int, user_id: int, application) -> dict:
     """Выход пользователя из игры"""
@@ -381,23 +518,29 @@ async def leave_game(game_id: int, user_id: int, application) -> dict:
     player_ids = game.get('player_ids', [])
     
     if user_id not in player_ids:
+        offer = seat_offers.get(game_id)
+        if offer and offer['user_id'] == user_id:
+            await pass_seat(game_id, user_id, application)
+            return {'success': True, 'waitlisted': True, 'message': 'Вы отказались от места', 'game': game}
+        if remove_from_waitlist(game_id, user_id):
+            logger.info(f"⏳ Пользователь {user_id} покинул лист ожидания игры {game_id}")
+            return {'success': True, 'waitlisted': True, 'message': 'Вы вышли из листа ожидания', 'game': game}
         logger.info(f"ℹ️ Пользователь {user_id} не участвует в игре {game_id}")
         return {'success': False, 'message': 'Вы не участвуете в этой игре'}
     
-    # Получаем имя пользователя перед удалением
-    user_idx = player_ids.index(user_id)
-    user_name = game['players'][user_idx]
+    # Удаляем из обоих списков, получая имя пользователя
+    was_full = game.get('status') == 'gathering'
+    user_name = remove_player_from_game(game, user_id)
     
-    # Удаляем из обоих списков
-    game['players'].pop(user_idx)
-    game['player_ids'].pop(user_idx)
-    game['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # Освободившееся место сразу получает первый в листе ожидания
+    await promote_from_waitlist(game, application)
     
     # Обновляем статус
     current_players = len(game.get('players', []))
     if current_players < game.get('max_players', 0):
         game['status'] = 'active'
         game['notified_gathering'] = False  # Сбрасываем флаг сбора
+    stats.record_leave(game, was_full)
     
     logger.info(f"➖ Пользователь вышел из игры: Игра={game_id}, Пользователь={user_id}")
     
@@ -409,29 +552,16 @@ async def leave_game(game_id: int, user_id: int, application) -> dict:
         f"👥 Теперь участников: {current_players}/{game.get('max_players', 0)}"
     )
     
-    for player_id in game.get('player_ids', []):
-        add_notification(player_id, notification_msg)
-        try:
-            await application.bot.send_message(
-                chat_id=player_id,
-                text=notification_msg,
-                parse_mode='HTML'
-            )
-        except Exception as e:
-            logger.error(f"Ошибка отправки уведомления о выходе пользователю {player_id}: {e}")
-    
-    # Создателю тоже отправляем уведомление
-    if game.get('creator_id') != user_id:
+    if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+        # Участники видят изменение в карточке игры и списке в группе
+        schedule_card_update(application, game)
+    if not settings.GAME_CARDS_ENABLED:
+        await notify_game_members(application, game, notification_msg, to_group=False)
+        
+        # Создателю тоже отправляем уведомление
         creator_id = game.get('creator_id')
-        add_notification(creator_id, notification_msg)
-        try:
-            await application.bot.send_message(
-                chat_id=creator_id,
-                text=notification_msg,
-                parse_mode='HTML'
-            )
-        except Exception as e:
-            logger.error(f"Ошибка отправки уведомления создателю {creator_id}: {e}")
+        if creator_id != user_id and wants_direct_messages(game, creator_id):
+            await send_notification(application, creator_id, notification_msg)
     
     return {
         'success': True,
@@ -439,6 +569,25 @@ async def leave_game(game_id: int, user_id: int, application) -> dict:
         'game': game
     }
 
+def unregister_game(game: dict):
+    """Удаляет записи игры из индексов (сама игра из списка games удаляется отдельно)"""
+    game_id = game['id']
+    del games_by_id[game_id]
+    unindex_game(game_id)
+    stats.record_game_deleted(game)
+    created_ids = created_by_user.get(game.get('creator_id'))
+    if created_ids is not None:
+        created_ids.discard(game_id)
+        if not created_ids:
+            del created_by_user[game.get('creator_id')]
+    for player_id in game.get('player_ids', []):
+        joined_ids = joined_by_user.get(player_id)
+        if joined_ids is not None:
+            joined_ids.discard(game_id)
+            if not joined_ids:
+                del joined_by_user[player_id]
+        remove_from_schedule(player_id, game)
+
 async def delete_game(game_id: int, user_id: int, application) -> dict:
     """Удаляет игру (только для создателя)"""
     game = get_game_by_id(game_id)
@@ -452,7 +601,6 @@ async def delete_game(game_id: int, user_id: int, application) -> dict:
         return {'success': False, 'message': 'Вы не можете удалить чужую игру'}
     
     game_title = game.get('title')
-    player_ids = game.get('player_ids', [])
     
     # Отправляем уведомление всем участникам об отмене
     notification_msg = (
@@ -463,23 +611,81 @@ async def delete_game(game_id: int, user_id: int, application) -> dict:
         f"Создатель игры отменил мероприятие."
     )
     
-    for player_id in player_ids:
-        if player_id != user_id:  # Не отправляем уведомление создателю
-            add_notification(player_id, notification_msg)
-            try:
-                await application.bot.send_message(
-                    chat_id=player_id,
-                    text=notification_msg,
-                    parse_mode='HTML'
-                )
-            except Exception as e:
-                logger.error(f"Ошибка отправки уведомления об отмене пользователю {player_id}: {e}")
-    
-    # Удаляем игру
+    # Не отправляем уведомление создателю
+    await notify_game_members(application, game, notification_msg, exclude_user_id=user_id)
+    
+    # Ожидавшие места тоже узнают об отмене
+    for waiting_user_id in clear_waitlist(game_id):
+        await send_notification(application, waiting_user_id, notification_msg)
+    
+    # Закрываем карточки игры и список в группе
+    if settings.GAME_CARDS_ENABLED or game.get('group_chat_id'):
+        await close_game_cards(application, game, "❌ <b>Игра отменена</b>")
+    
+    # Удаляем игру и ее записи в индексах
     games.remove(game)
+    unregister_game(game)
     logger.info(f"🗑️ Игра удалена: ID={game_id}, Создатель={user_id}")
     
     return {
         'success': True,
         'message': 'Игра удалена. Все участники уведомлены.'
-    }
\ No newline at end of file
+    }
+
+async def promote_from_waitlist(game: dict, application):
+    """
+    Отдает свободные места игры первым в листе ожидания: сразу или,
+    если настроено окно подтверждения, через предложение места
+    """
+    game_id = game['id']
+    while game_id not in seat_offers and len(game['player_ids']) < game.get('max_players', 0):
+        if settings.WAITLIST_CONFIRM_SECONDS > 0:
+            waiting = pop_next_waiting(game_id)
+            if waiting is None:
+                return
+            user_id, user_name = waiting
+            if await offer_seat(application, game, user_id, user_name, pass_seat):
+                logger.info(f"🎟️ Место в игре {game_id} предложено пользователю {user_id}")
+                return
+            continue
+        
+        # Первый в очереди входит сам (вход убирает его из листа ожидания),
+        # проверка мест и вход происходят без переключения задач
+        waiting = next_waiting(game_id)
+        if waiting is None:
+            return
+        user_id, user_name = waiting
+        result = await join_game(game_id, user_name, user_id, application)
+        if not result['success']:
+            remove_from_waitlist(game_id, user_id)
+            # Например, пересечение по времени в режиме block: место достается следующему
+            logger.info(f"🎟️ Пользователь {user_id} не переведен в игру {game_id}: {result['message']}")
+            await send_notification(
+                application, user_id,
+                f"🎟️ <b>ОСВОБОДИЛОСЬ МЕСТО</b>\n\n"
+                f"🎮 Игра: {game.get('title')}\n"
+                f"📅 Дата: {game.get('date')}\n\n"
+                f"Перевести вас в участники не удалось: {result['message']}.\n"
+                f"Вы исключены из листа ожидания."
+            )
+            continue
+        logger.info(f"🎟️ Пользователь {user_id} переведен из листа ожидания в игру {game_id}")
+        message = (
+            f"🎟️ <b>ОСВОБОДИЛОСЬ МЕСТО!</b>\n\n"
+            f"🎮 Игра: {game.get('title')}\n"
+            f"📅 Дата: {game.get('date')}\n\n"
+            f"Вы переведены из листа ожидания в участники."
+        )
+        if result.get('warning'):
+            message += f"\n⚠️ {result['warning']}"
+        await send_notification(application, user_id, message)
+
+async def pass_seat(game_id: int, user_id: int, application):
+    """Снимает предложение места (отказ или истекшее время) и передает место следующему"""
+    offer = seat_offers.get(game_id)
+    if not offer or offer['user_id'] != user_id:
+        return
+    take_offer(game_id)
+    game = get_game_by_id(game_id)
+    if game:
+        await promote_from_waitlist(game, application)
@@ -0,0 +1,110 @@
+import asyncio
+import html
+import logging
+from telegram.ext import ConversationHandler
+from config import settings
+from utils import metrics
+from utils.memory import (
+    deep_sizeof,
+    entry_count,
+    allocation_diff,
+    start_allocation_tracing
+)
+from . import keyboards, delivery, cards, throttle
+
+logger = logging.getLogger(__name__)
+
+# Задача периодического отчета
+report_task = {'task': None}
+
+
+def conversation_states(application) -> dict:
+    """Собирает словари состояний всех ConversationHandler"""
+    states = {}
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if isinstance(handler, ConversationHandler):
+                states[handler.name or repr(handler)] = getattr(handler, '_conversations', {})
+    return states
+
+
+def collect_structures(application) -> dict:
+    """Основные структуры данных бота: имя -> объект"""
+    return {
+        'games': keyboards.games,
+        'games_index': (keyboards.games_by_id, keyboards.created_by_user, keyboards.joined_by_user),
+        'notifications': delivery.notifications,
+        'deferred_notifications': delivery.deferred_notifications,
+        'digest_queue': delivery.digest_queue,
+        'unreachable_users': delivery.unreachable_users,
+        'game_cards': cards.game_cards,
+        'throttle_buckets': throttle.user_buckets,
+        # user_data/chat_data отдаются как mappingproxy — копируем ссылки в dict для обхода
+        'user_data': dict(application.user_data),
+        'chat_data': dict(application.chat_data),
+        'conversations': conversation_states(application),
+    }
+
+
+def measure_structures(structures: dict) -> dict:
+    """Размеры структур: имя -> байты или None, если структура изменилась во время обхода"""
+    sizes = {}
+    for name, structure in structures.items():
+        try:
+            sizes[name] = deep_sizeof(structure)
+        except RuntimeError:
+            sizes[name] = None
+    return sizes
+
+
+async def build_memory_report(application) -> str:
+    """
+    Формирует отчет: размеры структур и (если включен tracemalloc) самые
+    выросшие места выделения памяти. Обход структур идет в отдельном потоке,
+    чтобы не блокировать event loop
+    """
+    lines = ["🧠 <b>ПАМЯТЬ</b>\n"]
+    structures = collect_structures(application)
+    sizes = await asyncio.to_thread(measure_structures, structures)
+    for name, structure in structures.items():
+        size = sizes[name]
+        count = entry_count(structure)
+        if size is None:
+            lines.append(f"{name}: изменилась во время подсчета, записей={count}")
+            continue
+        metrics.set_gauge(f"memory.{name}.bytes", size)
+        metrics.set_gauge(f"memory.{name}.entries", count)
+        lines.append(f"{name}: {size / 1024:.1f} КБ, записей={count}")
+    
+    top = allocation_diff(settings.MEMORY_TOP_ALLOCATIONS)
+    if top:
+        lines.append("\n<b>Рост выделений с прошлого отчета:</b>")
+        for location, size_diff, count_diff in top:
+            lines.append(f"{html.escape(location)}: {size_diff / 1024:+.1f} КБ ({count_diff:+d})")
+    
+    return "\n".join(lines)
+
+
+async def memory_report_loop(application):
+    """Периодически пишет отчет о памяти в лог и метрики"""
+    if settings.MEMORY_TRACE_ALLOCATIONS:
+        start_allocation_tracing()
+    while True:
+        await asyncio.sleep(settings.MEMORY_REPORT_INTERVAL)
+        report = await build_memory_report(application)
+        logger.info(report.replace("<b>", "").replace("</b>", ""))
+
+
+def start_memory_reports(application):
+    """Запускает периодический отчет (вызывать из event loop)"""
+    if report_task['task'] is None:
+        report_task['task'] = asyncio.get_running_loop().create_task(
+            memory_report_loop(application), name="memory_report"
+        )
+
+
+def stop_memory_reports():
+    """Останавливает периодический отчет (трассировку выделений процесса выключает main)"""
+    if report_task['task'] is not None:
+        report_task['task'].cancel()
+        report_task['task'] = None
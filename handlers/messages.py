@@ -18,8 +18,10 @@ from .keyboards import (
     leave_game,
     delete_game,
     get_notifications,
-    clear_notifications
+    clear_notifications,
+    is_user_reachable
 )
+from .context import get_user_context
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +38,8 @@ async def handle_my_games(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await show_notifications(update, context, user_id)
         return
     
-    user_games = get_user_games(user_id)
+    user_context = get_user_context(update, context)
+    user_games = get_user_games(user_id, user_context)
     
     response = "👤 <b>МОИ ИГРЫ</b>\n\n"
     
@@ -75,7 +78,7 @@ async def handle_my_games(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         text=response,
         parse_mode='HTML',
-        reply_markup=get_games_keyboard(user_id)
+        reply_markup=get_games_keyboard(user_id, user_context)
     )
 
 async def show_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
@@ -165,18 +168,24 @@ async def show_game_details(update: Update, context: ContextTypes.DEFAULT_TYPE,
     # Список участников
     if players:
         details += "<b>📋 Список участников:</b>\n"
-        for i, player in enumerate(players, 1):
-            details += f"{i}. {player}\n"
+        for i, (player, player_id) in enumerate(zip(players, player_ids), 1):
+            # Помечаем участников, которым бот не может доставить сообщения
+            unreachable_mark = "" if is_user_reachable(player_id) else " 🚫 (недоступен)"
+            details += f"{i}. {player}{unreachable_mark}\n"
         details += "\n"
     
     # Статус текущего пользователя
-    is_creator = game.get('creator_id') == user_id
-    is_player = user_id in player_ids
+    user_context = get_user_context(update, context)
+    is_creator = game_id in user_context['created']
+    is_player = game_id in user_context['joined']
+    is_waiting = game_id in user_context['pending']
     
     if is_creator:
         details += "👑 <b>Вы создатель этой игры</b>\n"
     elif is_player:
         details += "✅ <b>Вы участвуете в этой игре</b>\n"
+    elif is_waiting:
+        details += "⏳ <b>Вы в листе ожидания</b>\n"
     else:
         if len(players) < game.get('max_players', 0):
             details += "🟢 <b>Есть свободные места</b>\n"
@@ -190,16 +199,15 @@ async def show_game_details(update: Update, context: ContextTypes.DEFAULT_TYPE,
         # Для создателя: удаление игры
         keyboard.append([KeyboardButton(f"🗑️ Удалить игру {game_id}")])
     
-    elif is_player:
-        # Для участника: выход из игры
+    elif is_player or is_waiting:
+        # Для участника и ожидающего: выход из игры или листа ожидания
         keyboard.append([KeyboardButton(f"➖ Выйти из игры {game_id}")])
     
     else:
-        # Для других пользователей: вход в игру
-        if len(players) < game.get('max_players', 0):
-            keyboard.append([KeyboardButton(f"➕ Войти в игру {game_id}")])
-        else:
-            details += "\n⚠️ <i>Все места заняты</i>\n"
+        # Для других пользователей: вход в игру или в лист ожидания
+        keyboard.append([KeyboardButton(f"➕ Войти в игру {game_id}")])
+        if len(players) >= game.get('max_players', 0):
+            details += "\n⚠️ <i>Все места заняты — можно встать в лист ожидания</i>\n"
     
     keyboard.append([KeyboardButton(BACK_TO_MENU)])
     
@@ -227,7 +235,7 @@ async def handle_game_selection(update: Update, context: ContextTypes.DEFAULT_TY
     if "📌 МОИ СОЗДАННЫЕ ИГРЫ 📌" in text or "🎮 ДРУГИЕ АКТИВНЫЕ ИГРЫ 🎮" in text:
         await update.message.reply_text(
             "👇 Выберите игру:",
-            reply_markup=get_games_keyboard(user_id)
+            reply_markup=get_games_keyboard(user_id, get_user_context(update, context))
         )
         return
     
@@ -242,7 +250,7 @@ async def handle_game_selection(update: Update, context: ContextTypes.DEFAULT_TY
             "❌ <b>Ошибка:</b> Не удалось найти выбранную игру.\n"
             "Пожалуйста, выберите игру из списка снова.",
             parse_mode='HTML',
-            reply_markup=get_games_keyboard(user_id)
+            reply_markup=get_games_keyboard(user_id, get_user_context(update, context))
         )
 
 async def handle_join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -262,10 +270,17 @@ async def handle_join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             result = await join_game(game_id, user_name, user_id, application)
             
-            if result['success']:
+            if result.get('waitlisted'):
+                await update.message.reply_text(
+                    f"⏳ <b>{result['message']}</b>",
+                    parse_mode='HTML',
+                    reply_markup=get_main_keyboard()
+                )
+            elif result['success']:
+                warning = f"\n\n⚠️ {result['warning']}" if result.get('warning') else ""
                 await update.message.reply_text(
                     "✅ <b>Вы успешно вошли в игру!</b>\n\n"
-                    f"Все участники игры получили уведомление о вашем входе.",
+                    f"Все участники игры получили уведомление о вашем входе.{warning}",
                     parse_mode='HTML',
                     reply_markup=get_main_keyboard()
                 )
@@ -298,7 +313,13 @@ async def handle_leave_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             result = await leave_game(game_id, user_id, application)
             
-            if result['success']:
+            if result.get('waitlisted'):
+                await update.message.reply_text(
+                    f"⏳ <b>{result['message']}</b>",
+                    parse_mode='HTML',
+                    reply_markup=get_main_keyboard()
+                )
+            elif result['success']:
                 await update.message.reply_text(
                     "➖ <b>Вы вышли из игры</b>\n\n"
                     "Все участники игры получили уведомление о вашем выходе.\n"
@@ -389,7 +410,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "📋 <b>Список всех активных игр:</b>\n"
             "👇 Выберите игру для просмотра деталей:",
             parse_mode='HTML',
-            reply_markup=get_games_keyboard(user_id)
+            reply_markup=get_games_keyboard(user_id, get_user_context(update, context))
         )
     
     elif text == CONFIRMED_GAMES:
@@ -0,0 +1,89 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+import logging
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Формат даты игры
+GAME_DATE_FORMAT = "%d.%m.%Y %H:%M"
+
+# Интервальные индексы расписаний: user_id -> {'intervals': [...], 'max_end': [...]}.
+# intervals — отсортированные (начало, конец, game_id), max_end[i] — (самый поздний
+# конец среди intervals[0..i], его game_id). Проверка пересечения — один бинарный поиск.
+schedules = {}
+
+
+def game_interval(game: dict):
+    """Интервал игры (начало, конец) или None, если дата не разбирается"""
+    try:
+        start = datetime.strptime(game.get('date', ''), GAME_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    duration = game.get('duration') or settings.GAME_DEFAULT_DURATION_MINUTES
+    return start, start + timedelta(minutes=duration)
+
+
+def rebuild_max_end(schedule: dict, position: int):
+    """Пересчитывает префиксные максимумы концов начиная с position"""
+    intervals = schedule['intervals']
+    max_end = schedule['max_end']
+    del max_end[position:]
+    best = max_end[-1] if max_end else None
+    for start, end, game_id in intervals[position:]:
+        if best is None or end > best[0]:
+            best = (end, game_id)
+        max_end.append(best)
+
+
+def add_to_schedule(user_id: int, game: dict):
+    """Добавляет игру в расписание пользователя"""
+    interval = game_interval(game)
+    if interval is None:
+        return
+    schedule = schedules.setdefault(user_id, {'intervals': [], 'max_end': []})
+    entry = (interval[0], interval[1], game['id'])
+    insort(schedule['intervals'], entry)
+    rebuild_max_end(schedule, bisect_left(schedule['intervals'], entry))
+
+
+def remove_from_schedule(user_id: int, game: dict):
+    """Удаляет игру из расписания пользователя"""
+    schedule = schedules.get(user_id)
+    interval = game_interval(game)
+    if schedule is None or interval is None:
+        return
+    entry = (interval[0], interval[1], game['id'])
+    position = bisect_left(schedule['intervals'], entry)
+    if position < len(schedule['intervals']) and schedule['intervals'][position] == entry:
+        del schedule['intervals'][position]
+        if schedule['intervals']:
+            rebuild_max_end(schedule, position)
+        else:
+            del schedules[user_id]
+
+
+def find_conflict(user_id: int, game: dict):
+    """
+    Возвращает ID игры пользователя, пересекающейся по времени с game, или None.
+    Бинарный поиск по началам: пересечение есть, если среди игр, начинающихся
+    до конца game, самый поздний конец позже ее начала — O(log k).
+    """
+    schedule = schedules.get(user_id)
+    interval = game_interval(game)
+    if schedule is None or interval is None:
+        return None
+    start, end = interval
+    # Игры, начинающиеся строго до конца новой игры
+    position = bisect_left(schedule['intervals'], (end,))
+    if position == 0:
+        return None
+    latest_end, game_id = schedule['max_end'][position - 1]
+    if latest_end > start:
+        return game_id
+    return None
+
+
+def reset_schedules():
+    """Очищает расписания пользователей"""
+    schedules.clear()
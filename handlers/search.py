@@ -0,0 +1,238 @@
+from telegram import Update, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import ContextTypes
+from collections import OrderedDict
+import heapq
+import logging
+import time
+from config import settings
+from utils import metrics
+from .cards import render_game_card, get_roster_keyboard
+
+logger = logging.getLogger(__name__)
+
+# Индексированные игры: game_id -> игра (в порядке создания)
+indexed_games = {}
+# Триграммы названий и мест: триграмма -> множество ID игр
+trigram_index = {}
+# Короткие префиксы слов (1-2 символа): префикс -> множество ID игр
+prefix_index = {}
+# Нормализованный текст игры для проверки совпадения: game_id -> строка
+search_text = {}
+# Меняется при добавлении и удалении игр из индекса
+index_generation = 0
+
+# Кэш ответов: (запрос, смещение) -> запись кэша (LRU)
+results_cache = OrderedDict()
+
+SEARCH_STATUSES = ('active', 'gathering')
+SHORT_PREFIX_LENGTH = 2
+EMPTY = frozenset()
+
+
+def normalize(text: str) -> str:
+    """Приводит текст к виду для поиска: нижний регистр, ё -> е, одиночные пробелы"""
+    return ' '.join(text.lower().replace('ё', 'е').split())
+
+
+def trigrams(word: str) -> set:
+    """Триграммы слова"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def index_keys(text: str):
+    """Ключи индексов для нормализованного текста: (триграммы, короткие префиксы)"""
+    grams = set()
+    prefixes = set()
+    for word in text.split():
+        grams |= trigrams(word)
+        for length in range(1, SHORT_PREFIX_LENGTH + 1):
+            prefixes.add(word[:length])
+    return grams, prefixes
+
+
+def index_game(game: dict):
+    """Добавляет игру в поисковые индексы"""
+    global index_generation
+    game_id = game['id']
+    text = normalize(f"{game.get('title', '')} {game.get('location', '')}")
+    grams, prefixes = index_keys(text)
+    for gram in grams:
+        trigram_index.setdefault(gram, set()).add(game_id)
+    for prefix in prefixes:
+        prefix_index.setdefault(prefix, set()).add(game_id)
+    indexed_games[game_id] = game
+    search_text[game_id] = text
+    index_generation += 1
+
+
+def unindex_game(game_id: int):
+    """Удаляет игру из поисковых индексов"""
+    global index_generation
+    text = search_text.pop(game_id, None)
+    indexed_games.pop(game_id, None)
+    if text is None:
+        return
+    grams, prefixes = index_keys(text)
+    for index, keys in ((trigram_index, grams), (prefix_index, prefixes)):
+        for key in keys:
+            game_ids = index.get(key)
+            if game_ids is not None:
+                game_ids.discard(game_id)
+                if not game_ids:
+                    del index[key]
+    index_generation += 1
+
+
+def rebuild_search_index(games: list):
+    """Перестраивает поисковые индексы по списку игр"""
+    global index_generation
+    indexed_games.clear()
+    trigram_index.clear()
+    prefix_index.clear()
+    search_text.clear()
+    results_cache.clear()
+    for game in games:
+        index_game(game)
+    index_generation += 1
+
+
+def token_sets(token: str) -> list:
+    """Множества ID игр из индексов, в которых должна быть игра, содержащая token"""
+    if len(token) <= SHORT_PREFIX_LENGTH:
+        return [prefix_index.get(token, EMPTY)]
+    return [trigram_index.get(gram, EMPTY) for gram in trigrams(token)]
+
+
+def newest_first(game_ids: set):
+    """
+    ID игр по убыванию (от новых). Куча строится за O(k), каждая следующая
+    игра извлекается за O(log k) — полная сортировка не нужна, если хватит первых
+    """
+    heap = [-game_id for game_id in game_ids]
+    heapq.heapify(heap)
+    while heap:
+        yield -heapq.heappop(heap)
+
+
+def find_game_ids(query: str, stop: int) -> list:
+    """
+    Находит не больше stop игр по запросу (все слова должны встретиться
+    в названии или месте). Пустой запрос — последние созданные игры.
+    Новые игры идут первыми.
+    """
+    tokens = query.split()
+    sets = [game_ids for token in tokens for game_ids in token_sets(token)]
+    sets.sort(key=len)
+    # Триграммы могут совпасть в разных местах текста — длинные слова проверяем подстрокой
+    long_tokens = [token for token in tokens if len(token) > 3]
+
+    if sets:
+        # Кандидаты — самое маленькое множество (от новых игр), остальные только
+        # проверяются на вхождение: работа ограничена им, а не размером индекса
+        game_ids = newest_first(sets[0])
+        sets = sets[1:]
+    else:
+        # Пустой запрос: последние созданные игры
+        game_ids = reversed(indexed_games)
+
+    result = []
+    for game_id in game_ids:
+        if (all(game_id in game_set for game_set in sets)
+                and all(token in search_text[game_id] for token in long_tokens)
+                and indexed_games[game_id].get('status') in SEARCH_STATUSES):
+            result.append(game_id)
+            if len(result) >= stop:
+                break
+    return result
+
+
+def build_result(game: dict) -> InlineQueryResultArticle:
+    """Результат инлайн-запроса: карточка игры с кнопками входа/выхода"""
+    players = len(game.get('players', []))
+    return InlineQueryResultArticle(
+        id=str(game['id']),
+        title=f"{game.get('title')} ({players}/{game.get('max_players', 0)})",
+        description=f"📅 {game.get('date')} · 📍 {game.get('location')}",
+        input_message_content=InputTextMessageContent(render_game_card(game), parse_mode='HTML'),
+        reply_markup=get_roster_keyboard(game)
+    )
+
+
+def game_versions(game_ids: list) -> tuple:
+    """Версии игр, из которых собраны результаты"""
+    return tuple(indexed_games[game_id].get('version', 0) for game_id in game_ids)
+
+
+def cached_results(key: tuple, now: float):
+    """Возвращает закэшированный ответ, если он не устарел и игры в нем не менялись"""
+    entry = results_cache.get(key)
+    if entry is None:
+        return None
+    if (entry['expires_at'] < now or entry['generation'] != index_generation
+            or game_versions(entry['game_ids']) != entry['versions']):
+        del results_cache[key]
+        return None
+    results_cache.move_to_end(key)
+    return entry
+
+
+def search_results(query: str, offset: int = 0) -> dict:
+    """
+    Возвращает страницу результатов поиска: {'results': [...], 'next_offset': str}.
+    Ответ кэшируется по нормализованному запросу и смещению.
+    """
+    key = (normalize(query), offset)
+    now = time.monotonic()
+    entry = cached_results(key, now)
+    if entry is not None:
+        metrics.increment('inline.cache_hit')
+        return entry
+
+    metrics.increment('inline.cache_miss')
+    limit = settings.INLINE_RESULTS_LIMIT
+    # Одна лишняя игра показывает, есть ли следующая страница
+    game_ids = find_game_ids(key[0], offset + limit + 1)
+    page_ids = game_ids[offset:offset + limit]
+    entry = {
+        'results': [build_result(indexed_games[game_id]) for game_id in page_ids],
+        'next_offset': (
+            str(offset + limit)
+            if len(game_ids) > offset + limit and offset + limit <= settings.INLINE_MAX_OFFSET
+            else ''
+        ),
+        'game_ids': page_ids,
+        'versions': game_versions(page_ids),
+        'generation': index_generation,
+        'expires_at': now + settings.INLINE_CACHE_TTL,
+    }
+    results_cache[key] = entry
+    if len(results_cache) > settings.INLINE_CACHE_SIZE:
+        results_cache.popitem(last=False)
+    return entry
+
+
+async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик инлайн-запросов (@GatherBot мафия): поиск активных игр"""
+    inline_query = update.inline_query
+    try:
+        offset = max(0, int(inline_query.offset or 0))
+    except ValueError:
+        offset = 0
+    # Смещение приходит от клиента: подобранное значение не должно заставлять просматривать весь индекс
+    if offset > settings.INLINE_MAX_OFFSET:
+        await inline_query.answer([], cache_time=settings.INLINE_CACHE_TIME, is_personal=False)
+        return
+
+    with metrics.Timer('inline.search'):
+        page = search_results(inline_query.query, offset)
+
+    logger.debug(f"🔎 Инлайн-поиск '{inline_query.query}' от {inline_query.from_user.id}: "
+                 f"{len(page['results'])} результатов")
+
+    # Результаты одинаковы для всех пользователей, Telegram может кэшировать их общими
+    await inline_query.answer(
+        page['results'],
+        cache_time=settings.INLINE_CACHE_TIME,
+        is_personal=False,
+        next_offset=page['next_offset']
+    )
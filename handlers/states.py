@@ -1,6 +1,9 @@
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler, Application
 from .keyboards import get_main_keyboard, BACK_TO_MENU, add_game
+from .cards import post_group_roster
+from .schedule import GAME_DATE_FORMAT
+import json
 import logging
 from datetime import datetime
 
@@ -9,6 +12,120 @@ logger = logging.getLogger(__name__)
 # Состояния для создания игры
 GAME_TITLE, GAME_DATE, GAME_LOCATION, GAME_PLAYERS = range(4)
 
+# Ограничения на количество игроков и длительность игры (в минутах)
+MIN_PLAYERS = 2
+MAX_PLAYERS = 20
+MAX_DURATION_MINUTES = 24 * 60
+
+# Подсказка по быстрому созданию игры
+NEWGAME_USAGE = (
+    "⚡ <b>Быстрое создание игры</b>\n\n"
+    "Формат: <code>/newgame Название | ДД.ММ.ГГГГ ЧЧ:ММ | Место | Игроков [| Минут]</code>\n"
+    "Пример: <code>/newgame Мафия | 15.01.2024 19:00 | Кафе 'Игротека' | 6 | 120</code>\n"
+    "Длительность необязательна и нужна для проверки пересечений с другими играми."
+)
+
+def validate_game_date(game_date: str):
+    """Проверяет дату игры, возвращает текст ошибки или None"""
+    try:
+        datetime.strptime(game_date, GAME_DATE_FORMAT)
+    except ValueError:
+        return (
+            "❌ Неверный формат даты!\n"
+            "Используйте: ДД.ММ.ГГГГ ЧЧ:ММ\n"
+            "Пример: 15.01.2024 19:00"
+        )
+    return None
+
+def validate_max_players(players_input: str):
+    """Проверяет количество игроков, возвращает (число, текст ошибки)"""
+    if not players_input.isdigit():
+        return None, (
+            "❌ Введите только цифру!\n"
+            "Пример: 4, 6, 10"
+        )
+    
+    max_players = int(players_input)
+    
+    if max_players < MIN_PLAYERS:
+        return None, (
+            f"❌ Минимальное количество игроков - {MIN_PLAYERS}!\n"
+            f"Введите число больше {MIN_PLAYERS - 1}:"
+        )
+    
+    if max_players > MAX_PLAYERS:
+        return None, (
+            f"❌ Максимальное количество игроков - {MAX_PLAYERS}!\n"
+            f"Введите число до {MAX_PLAYERS}:"
+        )
+    
+    return max_players, None
+
+def validate_duration(duration_input: str):
+    """Проверяет длительность игры в минутах, возвращает (число или None, текст ошибки)"""
+    if not duration_input:
+        return None, None
+    if not duration_input.isdigit() or not 0 < int(duration_input) <= MAX_DURATION_MINUTES:
+        return None, f"❌ Длительность должна быть числом минут от 1 до {MAX_DURATION_MINUTES}!"
+    return int(duration_input), None
+
+def validate_game_fields(title: str, game_date: str, location: str, players_input: str,
+                         duration_input: str = None):
+    """
+    Проверяет все поля игры за один раз (длительность необязательна).
+    Возвращает (данные игры, текст ошибки).
+    """
+    title, game_date, location, players_input = (
+        str(value or '').strip() for value in (title, game_date, location, players_input)
+    )
+    
+    if not title:
+        return None, "❌ Укажите название игры!"
+    if not location:
+        return None, "❌ Укажите место проведения!"
+    
+    error = validate_game_date(game_date)
+    if error:
+        return None, error
+    
+    max_players, error = validate_max_players(players_input)
+    if error:
+        return None, error
+    
+    duration, error = validate_duration(str(duration_input or '').strip())
+    if error:
+        return None, error
+    
+    return {
+        'title': title,
+        'date': game_date,
+        'location': location,
+        'max_players': max_players,
+        'duration': duration
+    }, None
+
+def format_game_created_message(full_game_data: dict) -> str:
+    """Формирует сообщение об успешном создании игры"""
+    return (
+        f"🎉 <b>Игра успешно создана!</b>\n\n"
+        f"🎮 <b>Название:</b> {full_game_data['title']}\n"
+        f"📅 <b>Дата и время:</b> {full_game_data['date']}\n"
+        f"📍 <b>Место:</b> {full_game_data['location']}\n"
+        f"👥 <b>Макс. игроков:</b> {full_game_data['max_players']}\n"
+        f"👤 <b>Создатель:</b> {full_game_data['creator']}\n"
+        f"🆔 <b>ID игры:</b> {full_game_data['id']}\n\n"
+        
+        f"📢 <b>Теперь другие игроки могут войти в вашу игру!</b>\n\n"
+        
+        f"ℹ️ <b>Правила:</b>\n"
+        f"• Игроки могут входить/выходить из игры\n"
+        f"• Когда все места будут заняты, все получат уведомление\n"
+        f"• За час до начала, если все на месте, игра подтверждается\n"
+        f"• За час до начала вход/выход/удаление становятся невозможны\n\n"
+        
+        f"👇 Используйте кнопки для управления игрой:"
+    )
+
 async def start_game_creation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Начало создания игры - запрос названия"""
     await update.message.reply_text(
@@ -65,15 +182,9 @@ async def process_game_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
     
     # Проверяем формат даты
-    try:
-        datetime.strptime(game_date, "%d.%m.%Y %H:%M")
-    except ValueError:
-        await update.message.reply_text(
-            "❌ Неверный формат даты!\n"
-            "Используйте: ДД.ММ.ГГГГ ЧЧ:ММ\n"
-            "Пример: 15.01.2024 19:00\n\n"
-            "Попробуйте еще раз:"
-        )
+    error = validate_game_date(game_date)
+    if error:
+        await update.message.reply_text(error + "\n\nПопробуйте еще раз:")
         return GAME_DATE
     
     # Сохраняем дату
@@ -122,29 +233,12 @@ async def process_game_players(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return ConversationHandler.END
     
-    # Проверяем, что введено число
-    if not players_input.isdigit():
-        await update.message.reply_text(
-            "❌ Введите только цифру!\n"
-            "Пример: 4, 6, 10\n\n"
-            "Попробуйте еще раз:"
-        )
-        return GAME_PLAYERS
-    
-    max_players = int(players_input)
-    
-    if max_players < 2:
-        await update.message.reply_text(
-            "❌ Минимальное количество игроков - 2!\n"
-            "Введите число больше 1:"
-        )
-        return GAME_PLAYERS
-    
-    if max_players > 20:
-        await update.message.reply_text(
-            "❌ Максимальное количество игроков - 20!\n"
-            "Введите число до 20:"
-        )
+    # Проверяем количество игроков
+    max_players, error = validate_max_players(players_input)
+    if error:
+        if not players_input.isdigit():
+            error += "\n\nПопробуйте еще раз:"
+        await update.message.reply_text(error)
         return GAME_PLAYERS
     
     # Получаем данные игры
@@ -175,23 +269,7 @@ async def process_game_players(update: Update, context: ContextTypes.DEFAULT_TYP
     context.user_data.pop('game_data', None)
     
     await update.message.reply_text(
-        f"🎉 <b>Игра успешно создана!</b>\n\n"
-        f"🎮 <b>Название:</b> {full_game_data['title']}\n"
-        f"📅 <b>Дата и время:</b> {full_game_data['date']}\n"
-        f"📍 <b>Место:</b> {full_game_data['location']}\n"
-        f"👥 <b>Макс. игроков:</b> {full_game_data['max_players']}\n"
-        f"👤 <b>Создатель:</b> {full_game_data['creator']}\n"
-        f"🆔 <b>ID игры:</b> {full_game_data['id']}\n\n"
-        
-        f"📢 <b>Теперь другие игроки могут войти в вашу игру!</b>\n\n"
-        
-        f"ℹ️ <b>Правила:</b>\n"
-        f"• Игроки могут входить/выходить из игры\n"
-        f"• Когда все места будут заняты, все получат уведомление\n"
-        f"• За час до начала, если все на месте, игра подтверждается\n"
-        f"• За час до начала вход/выход/удаление становятся невозможны\n\n"
-        
-        f"👇 Используйте кнопки для управления игрой:",
+        format_game_created_message(full_game_data),
         parse_mode='HTML',
         reply_markup=get_main_keyboard()
     )
@@ -207,4 +285,72 @@ async def cancel_game_creation(update: Update, context: ContextTypes.DEFAULT_TYP
         reply_markup=get_main_keyboard()
     )
     
-    return ConversationHandler.END
\ No newline at end of file
+    return ConversationHandler.END
+
+async def create_game_from_fields(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                  title, game_date, location, players_input, duration_input=None):
+    """Проверяет поля и создает игру одним ответом (быстрый путь)"""
+    game_data, error = validate_game_fields(title, game_date, location, players_input, duration_input)
+    
+    if error:
+        await update.message.reply_text(
+            f"{error}\n\n{NEWGAME_USAGE}",
+            parse_mode='HTML'
+        )
+        return None
+    
+    full_game_data = add_game({
+        **game_data,
+        'creator': update.effective_user.first_name,
+        'creator_id': update.effective_user.id
+    }, context.application)
+    
+    logger.info(f"⚡ Быстрое создание игры: ID={full_game_data['id']}, "
+                f"Создатель={update.effective_user.id}")
+    
+    # В групповом чате игра сразу привязывается к группе: ответом служит общий список
+    if update.effective_chat.type in ('group', 'supergroup'):
+        await post_group_roster(context.application, full_game_data, update.effective_chat.id)
+        return full_game_data
+    
+    await update.message.reply_text(
+        format_game_created_message(full_game_data),
+        parse_mode='HTML',
+        reply_markup=get_main_keyboard()
+    )
+    return full_game_data
+
+async def newgame_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /newgame Название | Дата | Место | Игроков [| Минут]"""
+    # Разбираем текст после команды целиком, чтобы сохранить пробелы в полях
+    arguments = update.message.text.partition(' ')[2]
+    fields = [field.strip() for field in arguments.split('|')]
+    
+    if len(fields) not in (4, 5):
+        await update.message.reply_text(NEWGAME_USAGE, parse_mode='HTML')
+        return
+    
+    await create_game_from_fields(update, context, *fields)
+
+async def process_web_app_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обработчик данных формы Telegram Web App.
+    Ожидается JSON: {"title": ..., "date": ..., "location": ..., "max_players": ..., "duration": ...}
+    (duration необязательно)
+    """
+    try:
+        form = json.loads(update.message.web_app_data.data)
+    except (ValueError, TypeError) as e:
+        logger.error(f"❌ Некорректные данные Web App от {update.effective_user.id}: {e}")
+        await update.message.reply_text("❌ Не удалось прочитать данные формы.")
+        return
+    
+    if not isinstance(form, dict):
+        await update.message.reply_text("❌ Не удалось прочитать данные формы.")
+        return
+    
+    await create_game_from_fields(
+        update, context,
+        form.get('title'), form.get('date'), form.get('location'), form.get('max_players'),
+        form.get('duration')
+    )
@@ -0,0 +1,239 @@
+import html
+import logging
+import math
+from datetime import datetime
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Формат created_at игры
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Квантили времени до сбора в отчете
+REPORT_QUANTILES = (0.5, 0.9, 0.99)
+
+# Статистика обновляется при каждом изменении игр, отчет не просматривает games.
+# totals — счетчики за всю историю и текущие значения:
+#   created, deleted, joins, leaves, filled (игр, собравшихся хотя бы раз) — история;
+#   open_games, full_games, seats_taken, seats_total — текущее состояние
+totals = {}
+# Логарифмическая гистограмма времени до сбора (секунды): индекс корзины -> количество.
+# Относительная погрешность квантилей — STATS_SKETCH_ACCURACY, число корзин
+# растет с логарифмом диапазона значений, а не с количеством игр
+fill_sketch = {'count': 0, 'buckets': {}}
+# Популярные названия (алгоритм Space-Saving): ключ -> {'title', 'count', 'error'},
+# не больше STATS_TOP_CAPACITY записей
+top_titles = {}
+# Игры, уже собиравшиеся хотя бы раз (время до сбора учитывается только для первого сбора);
+# хранится здесь, а не в словаре игры, чтобы не попадать в снимок игр и экспорт
+filled_game_ids = set()
+
+HISTORY_KEYS = ('created', 'deleted', 'joins', 'leaves', 'filled')
+GAUGE_KEYS = ('open_games', 'full_games', 'seats_taken', 'seats_total')
+
+
+def reset_stats():
+    """Очищает статистику"""
+    totals.clear()
+    totals.update(dict.fromkeys(HISTORY_KEYS + GAUGE_KEYS, 0))
+    fill_sketch['count'] = 0
+    fill_sketch['buckets'] = {}
+    top_titles.clear()
+    filled_game_ids.clear()
+
+
+def sketch_gamma() -> float:
+    """Основание логарифмических корзин для заданной точности"""
+    accuracy = settings.STATS_SKETCH_ACCURACY
+    return (1 + accuracy) / (1 - accuracy)
+
+
+def sketch_add(value: float):
+    """Добавляет значение в гистограмму (значения меньше секунды — в первую корзину)"""
+    index = math.ceil(math.log(max(value, 1.0), sketch_gamma()))
+    buckets = fill_sketch['buckets']
+    buckets[index] = buckets.get(index, 0) + 1
+    fill_sketch['count'] += 1
+
+
+def sketch_quantile(fraction: float) -> float:
+    """Оценка квантиля по гистограмме или 0.0, если значений нет"""
+    count = fill_sketch['count']
+    if not count:
+        return 0.0
+    gamma = sketch_gamma()
+    rank = fraction * (count - 1)
+    seen = 0
+    for index in sorted(fill_sketch['buckets']):
+        seen += fill_sketch['buckets'][index]
+        if seen > rank:
+            break
+    # Середина корзины (gamma^(i-1), gamma^i] с учетом относительной погрешности
+    return 2 * gamma ** index / (gamma + 1)
+
+
+def title_key(title: str) -> str:
+    """Ключ названия: без учета регистра и лишних пробелов"""
+    return ' '.join(str(title).casefold().split())
+
+
+def count_title(title: str):
+    """
+    Учитывает название в топе (Space-Saving): при заполненной таблице вытесняется
+    самая редкая запись, новая получает ее счетчик как верхнюю оценку
+    """
+    key = title_key(title)
+    if not key:
+        return
+    entry = top_titles.get(key)
+    if entry is not None:
+        entry['count'] += 1
+        return
+    if len(top_titles) < settings.STATS_TOP_CAPACITY:
+        top_titles[key] = {'title': title, 'count': 1, 'error': 0}
+        return
+    rarest_key = min(top_titles, key=lambda k: top_titles[k]['count'])
+    rarest = top_titles.pop(rarest_key)
+    top_titles[key] = {'title': title, 'count': rarest['count'] + 1, 'error': rarest['count']}
+
+
+def seconds_to_fill(game: dict):
+    """Секунды от создания игры до сбора или None, если время создания неизвестно"""
+    try:
+        created_at = datetime.strptime(game.get('created_at', ''), CREATED_AT_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (datetime.now() - created_at).total_seconds())
+
+
+def record_game_created(game: dict):
+    """Новая игра (создатель — первый участник)"""
+    totals['created'] += 1
+    totals['open_games'] += 1
+    totals['seats_taken'] += len(game.get('player_ids', []))
+    totals['seats_total'] += game.get('max_players', 0)
+    count_title(game.get('title', ''))
+
+
+def record_join(game: dict):
+    """Участник вошел в игру"""
+    totals['joins'] += 1
+    totals['seats_taken'] += 1
+
+
+def record_leave(game: dict, was_full: bool):
+    """Участник вышел из игры; was_full — игра до выхода считалась собравшейся"""
+    totals['leaves'] += 1
+    totals['seats_taken'] -= 1
+    if was_full and game.get('status') != 'gathering':
+        totals['full_games'] -= 1
+
+
+def record_filled(game: dict):
+    """Игра собралась; время до сбора учитывается только для первого сбора"""
+    totals['full_games'] += 1
+    if game['id'] in filled_game_ids:
+        return
+    filled_game_ids.add(game['id'])
+    totals['filled'] += 1
+    seconds = seconds_to_fill(game)
+    if seconds is not None:
+        sketch_add(seconds)
+
+
+def record_game_deleted(game: dict):
+    """Игра удалена (отменена создателем)"""
+    totals['deleted'] += 1
+    totals['open_games'] -= 1
+    totals['seats_taken'] -= len(game.get('player_ids', []))
+    totals['seats_total'] -= game.get('max_players', 0)
+    if game.get('status') == 'gathering':
+        totals['full_games'] -= 1
+    filled_game_ids.discard(game['id'])
+
+
+def rebuild_gauges(games: list):
+    """Пересчитывает текущие значения по списку игр (после загрузки снимка)"""
+    totals['open_games'] = len(games)
+    totals['full_games'] = sum(1 for game in games if game.get('status') == 'gathering')
+    totals['seats_taken'] = sum(len(game.get('player_ids', [])) for game in games)
+    totals['seats_total'] = sum(game.get('max_players', 0) for game in games)
+
+
+def snapshot_stats() -> dict:
+    """Историческая часть статистики для снимка"""
+    return {
+        'totals': {key: totals[key] for key in HISTORY_KEYS},
+        'fill_sketch': {'count': fill_sketch['count'], 'buckets': dict(fill_sketch['buckets'])},
+        'top_titles': {key: dict(entry) for key, entry in top_titles.items()},
+        'filled_game_ids': sorted(filled_game_ids),
+    }
+
+
+def restore_stats(state: dict, games: list):
+    """
+    Восстанавливает историю из снимка. В снимках без статистики история
+    оценивается по сохранившимся играм (удаленные игры в нее не попадают)
+    """
+    filled_game_ids.clear()
+    if state is None:
+        totals['created'] = len(games)
+        for game in games:
+            count_title(game.get('title', ''))
+            if game.get('status') == 'gathering':
+                totals['filled'] += 1
+                filled_game_ids.add(game['id'])
+        return
+    totals.update(state['totals'])
+    fill_sketch['count'] = state['fill_sketch']['count']
+    fill_sketch['buckets'] = dict(state['fill_sketch']['buckets'])
+    top_titles.clear()
+    top_titles.update(state['top_titles'])
+    # В ранних снимках отметка о сборе хранилась в самой игре
+    filled_game_ids.update(state.get('filled_game_ids', []))
+    for game in games:
+        if game.pop('filled_at', None):
+            filled_game_ids.add(game['id'])
+
+
+def format_duration(seconds: float) -> str:
+    """Длительность в читаемом виде"""
+    if seconds < 60:
+        return f"{seconds:.0f} с"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} мин"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} ч"
+    return f"{seconds / 86400:.1f} дн"
+
+
+def build_stats_report() -> str:
+    """Формирует отчет /stats из поддерживаемых счетчиков (без просмотра игр)"""
+    fill_rate = totals['filled'] / totals['created'] if totals['created'] else 0.0
+    occupancy = totals['seats_taken'] / totals['seats_total'] if totals['seats_total'] else 0.0
+    lines = [
+        "📊 <b>СТАТИСТИКА</b>\n",
+        f"🎮 Игр сейчас: {totals['open_games']}, собравшихся: {totals['full_games']}",
+        f"👥 Занято мест: {totals['seats_taken']}/{totals['seats_total']} ({occupancy:.0%})",
+        f"🆕 Создано игр: {totals['created']}, отменено: {totals['deleted']}",
+        f"🎉 Собралось игр: {totals['filled']} ({fill_rate:.0%} созданных)",
+        f"➕ Входов: {totals['joins']}, ➖ выходов: {totals['leaves']}",
+    ]
+    if fill_sketch['count']:
+        quantiles = ", ".join(
+            f"p{fraction * 100:g} {format_duration(sketch_quantile(fraction))}"
+            for fraction in REPORT_QUANTILES
+        )
+        lines.append(f"⏱️ Время до сбора: {quantiles}")
+
+    if top_titles:
+        lines.append("\n<b>Популярные названия:</b>")
+        ranked = sorted(top_titles.values(), key=lambda entry: entry['count'], reverse=True)
+        for entry in ranked[:settings.STATS_TOP_SHOWN]:
+            # Для вытеснявших записей счетчик — верхняя оценка
+            approx = "~" if entry['error'] else ""
+            lines.append(f"{html.escape(entry['title'])}: {approx}{entry['count']}")
+
+    return "\n".join(lines)
+
+
+reset_stats()
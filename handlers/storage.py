@@ -0,0 +1,240 @@
+import asyncio
+import functools
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import time
+from config import settings
+from . import keyboards, delivery, cards, waitlist, dedupe, stats
+
+logger = logging.getLogger(__name__)
+
+# Формат снимка:
+#   заголовок:   MAGIC, версия, количество секций
+#   оглавление:  (имя секции, смещение, длина) для каждой секции
+#   секции:      pickle (протокол 5); уведомления разбиты по пользователям,
+#                чтобы читать их из отображенного в память файла по требованию
+SNAPSHOT_MAGIC = b'GBSNAP'
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct('<6sHI')
+SECTION_ENTRY = struct.Struct('<16sQQ')
+NOTIFICATION_ENTRY = struct.Struct('<qQI')
+PICKLE_PROTOCOL = 5
+
+# Отображение текущего снимка в память (нужно для отложенной загрузки уведомлений)
+snapshot_map = None
+# Задача периодического сохранения снимка
+snapshot_task = {'task': None}
+
+
+def release_snapshot_map():
+    """
+    Закрывает отображение снимка (и его дескриптор файла), когда все отложенные
+    уведомления из него загружены или сброшены
+    """
+    global snapshot_map
+    if snapshot_map is None or delivery.deferred_notifications:
+        return
+    try:
+        snapshot_map.close()
+    except BufferError:
+        # На отображение еще ссылаются срезы — закроется при следующей попытке
+        logger.debug("Отображение снимка еще используется")
+        return
+    snapshot_map = None
+
+
+def collect_state() -> dict:
+    """Собирает состояние хранилища (кроме уведомлений) для снимка"""
+    return {
+        'game_id_counter': keyboards.game_id_counter,
+        'games': keyboards.games,
+        'unreachable_users': delivery.unreachable_users,
+        'group_dm_opt_in': delivery.group_dm_opt_in,
+        'digest_modes': delivery.digest_modes,
+        'digest_queue': delivery.digest_queue,
+        'game_cards': cards.game_cards,
+        'waitlists': waitlist.snapshot_waitlists(),
+        'update_mark': (dedupe.dedupe_state['high_water_mark'], time.time()),
+        'stats': stats.snapshot_stats(),
+    }
+
+
+def apply_state(state: dict):
+    """Восстанавливает хранилище (кроме уведомлений) из снимка"""
+    keyboards.reset_store()
+    keyboards.games.extend(state['games'])
+    keyboards.game_id_counter = state['game_id_counter']
+    keyboards.rebuild_indexes()
+    delivery.unreachable_users.update(state['unreachable_users'])
+    delivery.group_dm_opt_in.clear()
+    delivery.group_dm_opt_in.update(state['group_dm_opt_in'])
+    # Снимки до появления сводок их не содержат
+    delivery.digest_modes.clear()
+    delivery.digest_modes.update(state.get('digest_modes', {}))
+    delivery.digest_queue.update(state.get('digest_queue', {}))
+    cards.game_cards.clear()
+    cards.game_cards.update(state['game_cards'])
+    # Снимки до появления листов ожидания их не содержат
+    waitlist.waitlists.update(state.get('waitlists', {}))
+    waitlist.rebuild_waiting_index()
+    if 'update_mark' in state:
+        dedupe.restore_mark(*state['update_mark'])
+    stats.restore_stats(state.get('stats'), keyboards.games)
+
+
+def build_notification_sections() -> tuple:
+    """Сериализует уведомления: индекс (user_id, смещение, длина) и данные"""
+    delivery.load_all_deferred_notifications()
+    index = bytearray()
+    data = bytearray()
+    for user_id, items in delivery.notifications.items():
+        if not items:
+            continue
+        payload = pickle.dumps(items, protocol=PICKLE_PROTOCOL)
+        index += NOTIFICATION_ENTRY.pack(user_id, len(data), len(payload))
+        data += payload
+    return bytes(index), bytes(data)
+
+
+def save_snapshot(path: str = None) -> str:
+    """Записывает бинарный снимок состояния атомарно (через временный файл)"""
+    path = path or settings.SNAPSHOT_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    notification_index, notification_data = build_notification_sections()
+    # Все уведомления теперь в памяти, прежнее отображение больше не нужно
+    release_snapshot_map()
+    state = collect_state()
+    sections = [
+        ('state', pickle.dumps(state, protocol=PICKLE_PROTOCOL)),
+        ('notify_index', notification_index),
+        ('notify_data', notification_data),
+    ]
+    
+    offset = HEADER.size + SECTION_ENTRY.size * len(sections)
+    table = bytearray()
+    for name, payload in sections:
+        table += SECTION_ENTRY.pack(name.encode(), offset, len(payload))
+        offset += len(payload)
+    
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(sections)))
+        snapshot_file.write(table)
+        for _, payload in sections:
+            snapshot_file.write(payload)
+    os.replace(temp_path, path)
+    
+    # Отметка обновлений не опережает сохраненное состояние
+    try:
+        dedupe.flush_mark(state['update_mark'][0])
+    except OSError as e:
+        logger.error(f"Ошибка записи отметки обновлений: {e}")
+    
+    logger.info(f"💾 Снимок сохранен: {path}, игр={len(keyboards.games)}, размер={offset} байт")
+    return path
+
+
+async def snapshot_loop(path: str):
+    """Периодически сохраняет снимок, чтобы аварийная остановка теряла не больше SNAPSHOT_INTERVAL"""
+    while True:
+        await asyncio.sleep(settings.SNAPSHOT_INTERVAL)
+        try:
+            save_snapshot(path)
+        except OSError as e:
+            logger.error(f"Ошибка периодического сохранения снимка: {e}")
+
+
+def start_snapshots(path: str = None):
+    """Запускает периодическое сохранение снимка (вызывать из event loop)"""
+    if settings.SNAPSHOT_INTERVAL > 0 and snapshot_task['task'] is None:
+        snapshot_task['task'] = asyncio.get_running_loop().create_task(
+            snapshot_loop(path or settings.SNAPSHOT_PATH), name="snapshot"
+        )
+
+
+def stop_snapshots():
+    """Останавливает периодическое сохранение (последний снимок пишется при остановке)"""
+    if snapshot_task['task'] is not None:
+        snapshot_task['task'].cancel()
+        snapshot_task['task'] = None
+
+
+def read_sections(view: memoryview) -> dict:
+    """Читает оглавление снимка: имя секции -> срез отображения"""
+    magic, version, count = HEADER.unpack_from(view, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"неподдерживаемый снимок: {magic!r}, версия {version}")
+    
+    sections = {}
+    for position in range(count):
+        name, offset, length = SECTION_ENTRY.unpack_from(view, HEADER.size + position * SECTION_ENTRY.size)
+        sections[name.rstrip(b'\0').decode()] = view[offset:offset + length]
+    return sections
+
+
+def load_notification_slice(data: memoryview, offset: int, length: int) -> list:
+    """Читает уведомления одного пользователя из отображенного снимка"""
+    return pickle.loads(data[offset:offset + length])
+
+
+def load_legacy_json(path: str):
+    """Загружает снимок старого формата (JSON, версия 1)"""
+    with open(path, encoding='utf-8') as snapshot_file:
+        state = json.load(snapshot_file)
+    apply_state({
+        'game_id_counter': state['game_id_counter'],
+        'games': state['games'],
+        'unreachable_users': dict(state['unreachable_users']),
+        'group_dm_opt_in': state['group_dm_opt_in'],
+        'game_cards': {game_id: dict(user_cards) for game_id, user_cards in state['game_cards']},
+    })
+    delivery.notifications.update((user_id, items) for user_id, items in state['notifications'])
+
+
+def load_snapshot(path: str = None) -> bool:
+    """
+    Загружает снимок, если он есть. Файл отображается в память, состояние игр
+    читается сразу, уведомления — по требованию при первом обращении пользователя.
+    """
+    global snapshot_map
+    path = path or settings.SNAPSHOT_PATH
+    if not os.path.exists(path) or not os.path.getsize(path):
+        logger.info(f"💾 Снимок {path} не найден, начинаем с пустого хранилища")
+        return False
+    
+    with open(path, 'rb') as snapshot_file:
+        if snapshot_file.read(1) == b'{':
+            load_legacy_json(path)
+            release_snapshot_map()
+            logger.info(f"💾 Загружен снимок старого формата: {path}")
+            return True
+        new_map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    try:
+        sections = read_sections(memoryview(new_map))
+    except (ValueError, struct.error) as e:
+        logger.error(f"❌ Не удалось прочитать снимок {path}: {e}")
+        new_map.close()
+        return False
+    
+    apply_state(pickle.loads(sections['state']))
+    # Загрузчики прежнего снимка сброшены вместе с хранилищем — закрываем его отображение
+    release_snapshot_map()
+    
+    notification_data = sections['notify_data']
+    for user_id, offset, length in NOTIFICATION_ENTRY.iter_unpack(sections['notify_index']):
+        delivery.deferred_notifications[user_id] = functools.partial(
+            load_notification_slice, notification_data, offset, length
+        )
+    
+    snapshot_map = new_map
+    logger.info(f"💾 Снимок загружен: {path}, игр={len(keyboards.games)}, "
+                f"уведомлений отложено={len(delivery.deferred_notifications)}")
+    return True
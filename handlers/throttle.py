@@ -0,0 +1,108 @@
+from telegram import Update
+from telegram.ext import ContextTypes, ApplicationHandlerStop
+from collections import OrderedDict
+import logging
+import time
+from config import settings
+from utils import metrics
+from .keyboards import CREATE_GAME, GAME_LIST, CONFIRMED_GAMES, MY_GAMES, BACK_TO_MENU
+
+logger = logging.getLogger(__name__)
+
+# Состояние ведер: user_id -> {'seen': время, 'buckets': {класс: [токены, время]}, 'warned': set}
+# OrderedDict упорядочен по времени последней активности, что дает O(1) вытеснение
+user_buckets = OrderedDict()
+
+MENU_BUTTONS = {GAME_LIST, CONFIRMED_GAMES, MY_GAMES, BACK_TO_MENU}
+MEMBERSHIP_MARKERS = ('➕ Войти в игру', '➖ Выйти из игры', '🗑️ Удалить игру', 'join:', 'leave:', 'claim:', 'pass:')
+
+
+def classify_update(update: Update) -> str:
+    """Определяет класс действия для обновления"""
+    if update.inline_query:
+        return 'inline'
+    
+    text = ''
+    if update.callback_query and update.callback_query.data:
+        text = update.callback_query.data
+    elif update.effective_message and update.effective_message.text:
+        text = update.effective_message.text
+    
+    if text == CREATE_GAME or text.startswith('/newgame'):
+        return 'create'
+    if any(marker in text for marker in MEMBERSHIP_MARKERS):
+        return 'membership'
+    if text in MENU_BUTTONS or text.startswith('/'):
+        return 'menu'
+    return 'default'
+
+
+def evict_idle_users(now: float):
+    """Удаляет пользователей, бездействующих дольше THROTTLE_IDLE_TTL"""
+    while user_buckets:
+        user_id, state = next(iter(user_buckets.items()))
+        if now - state['seen'] < settings.THROTTLE_IDLE_TTL:
+            break
+        user_buckets.popitem(last=False)
+
+
+def consume_token(user_id: int, action: str, now: float = None) -> bool:
+    """Списывает токен из ведра пользователя, возвращает False если ведро пусто"""
+    now = time.monotonic() if now is None else now
+    evict_idle_users(now)
+    
+    state = user_buckets.get(user_id)
+    if state is None:
+        state = {'seen': now, 'buckets': {}, 'warned': set()}
+        user_buckets[user_id] = state
+    else:
+        user_buckets.move_to_end(user_id)
+        state['seen'] = now
+    
+    rate, burst = settings.THROTTLE_RATES.get(action, settings.THROTTLE_RATES['default'])
+    bucket = state['buckets'].get(action)
+    if bucket is None:
+        bucket = [float(burst), now]
+        state['buckets'][action] = bucket
+    
+    # Пополняем ведро с момента последнего обращения
+    bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+    bucket[1] = now
+    
+    if bucket[0] >= 1.0:
+        bucket[0] -= 1.0
+        state['warned'].discard(action)
+        return True
+    return False
+
+
+async def throttle_updates(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Анти-флуд фильтр, работает до всех остальных обработчиков (группа -1).
+    Лишние обновления отбрасываются, предупреждение отправляется
+    один раз на каждый период исчерпания ведра. Отброшенные нажатия
+    кнопок все равно подтверждаются, иначе у клиента крутится индикатор.
+    """
+    user = update.effective_user
+    if not user:
+        return
+    
+    action = classify_update(update)
+    if consume_token(user.id, action):
+        return
+    
+    metrics.increment(f"throttle.dropped.{action}")
+    logger.warning(f"🚦 Флуд от пользователя {user.id}: класс '{action}', обновление отброшено")
+    
+    warned = user_buckets[user.id]['warned']
+    warning = None
+    if action not in warned:
+        warned.add(action)
+        warning = "🐢 Слишком много запросов. Подождите немного и попробуйте снова."
+    
+    if update.callback_query:
+        await update.callback_query.answer(warning)
+    elif warning and update.effective_message:
+        await update.effective_message.reply_text(warning)
+    
+    raise ApplicationHandlerStop
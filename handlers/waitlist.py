@@ -0,0 +1,198 @@
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from collections import OrderedDict
+import asyncio
+import logging
+from config import settings
+from utils.outbound import outbound_lane
+from .delivery import is_user_reachable, is_permanent_delivery_error, mark_user_unreachable, send_notification
+
+logger = logging.getLogger(__name__)
+
+# Листы ожидания: game_id -> OrderedDict(user_id -> user_name) в порядке очереди
+waitlists = {}
+# Индекс: user_id -> ID игр, в листах ожидания которых стоит пользователь
+waiting_by_user = {}
+# Предложенные места, ждущие подтверждения: game_id -> {'user_id', 'user_name'}
+seat_offers = {}
+# Таймеры предложений: game_id -> asyncio.Task
+offer_tasks = {}
+
+
+def reset_waitlists():
+    """Очищает листы ожидания и предложения мест"""
+    for task in offer_tasks.values():
+        task.cancel()
+    waitlists.clear()
+    waiting_by_user.clear()
+    seat_offers.clear()
+    offer_tasks.clear()
+
+
+def rebuild_waiting_index():
+    """Перестраивает индекс пользователей по листам ожидания (после загрузки снимка)"""
+    waiting_by_user.clear()
+    for game_id, queue in waitlists.items():
+        for user_id in queue:
+            waiting_by_user.setdefault(user_id, set()).add(game_id)
+
+
+def snapshot_waitlists() -> dict:
+    """Листы ожидания для снимка: неподтвержденное предложение возвращается в начало очереди"""
+    result = {}
+    for game_id in waitlists.keys() | seat_offers.keys():
+        queue = OrderedDict()
+        offer = seat_offers.get(game_id)
+        if offer:
+            queue[offer['user_id']] = offer['user_name']
+        queue.update(waitlists.get(game_id, {}))
+        if queue:
+            result[game_id] = queue
+    return result
+
+
+def is_waiting(game_id: int, user_id: int) -> bool:
+    """Стоит ли пользователь в листе ожидания игры"""
+    return user_id in waitlists.get(game_id, ())
+
+
+def queue_position(game_id: int, user_id: int) -> int:
+    """
+    Сколько ожидающих стоит перед пользователем. Для не стоящего в листе
+    ожидания — длина очереди (он был бы последним)
+    """
+    queue = waitlists.get(game_id, {})
+    for position, waiting_id in enumerate(queue):
+        if waiting_id == user_id:
+            return position
+    return len(queue)
+
+
+def add_to_waitlist(game_id: int, user_id: int, user_name: str) -> int:
+    """Ставит пользователя в конец листа ожидания и возвращает его место в очереди"""
+    queue = waitlists.setdefault(game_id, OrderedDict())
+    queue[user_id] = user_name
+    waiting_by_user.setdefault(user_id, set()).add(game_id)
+    return len(queue)
+
+
+def forget_waiting(game_id: int, user_id: int):
+    """Удаляет игру из индекса пользователя"""
+    game_ids = waiting_by_user.get(user_id)
+    if game_ids is not None:
+        game_ids.discard(game_id)
+        if not game_ids:
+            del waiting_by_user[user_id]
+
+
+def remove_from_waitlist(game_id: int, user_id: int) -> bool:
+    """Убирает пользователя из листа ожидания"""
+    queue = waitlists.get(game_id)
+    if queue is None or queue.pop(user_id, None) is None:
+        return False
+    if not queue:
+        del waitlists[game_id]
+    forget_waiting(game_id, user_id)
+    return True
+
+
+def next_waiting(game_id: int):
+    """Первый в листе ожидания (без извлечения): (user_id, user_name) или None"""
+    queue = waitlists.get(game_id)
+    if not queue:
+        return None
+    return next(iter(queue.items()))
+
+
+def pop_next_waiting(game_id: int):
+    """Извлекает первого в листе ожидания: (user_id, user_name) или None"""
+    queue = waitlists.get(game_id)
+    if not queue:
+        return None
+    user_id, user_name = queue.popitem(last=False)
+    if not queue:
+        del waitlists[game_id]
+    forget_waiting(game_id, user_id)
+    return user_id, user_name
+
+
+def take_offer(game_id: int):
+    """Снимает предложение места и его таймер, возвращает предложение или None"""
+    task = offer_tasks.pop(game_id, None)
+    if task is not None and task is not asyncio.current_task():
+        task.cancel()
+    return seat_offers.pop(game_id, None)
+
+
+def clear_waitlist(game_id: int) -> list:
+    """Удаляет лист ожидания и предложение места игры, возвращает ID ожидавших пользователей"""
+    user_ids = []
+    offer = take_offer(game_id)
+    if offer:
+        user_ids.append(offer['user_id'])
+    for user_id in waitlists.pop(game_id, {}):
+        forget_waiting(game_id, user_id)
+        user_ids.append(user_id)
+    return user_ids
+
+
+def get_offer_keyboard(game_id: int) -> InlineKeyboardMarkup:
+    """Кнопки подтверждения предложенного места"""
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("✅ Занять место", callback_data=f"claim:{game_id}"),
+        InlineKeyboardButton("❌ Отказаться", callback_data=f"pass:{game_id}")
+    ]])
+
+
+async def expire_offer(application, game: dict, user_id: int, on_expire):
+    """Передает место следующему, если предложение не подтверждено вовремя"""
+    await asyncio.sleep(settings.WAITLIST_CONFIRM_SECONDS)
+    offer = seat_offers.get(game['id'])
+    if offer and offer['user_id'] == user_id:
+        logger.info(f"⌛ Предложение места в игре {game['id']} для {user_id} истекло")
+        await on_expire(game['id'], user_id, application)
+        await send_notification(
+            application, user_id,
+            f"⌛ Время на подтверждение места в игре «{game.get('title')}» истекло, "
+            f"место передано следующему в листе ожидания."
+        )
+
+
+async def offer_seat(application, game: dict, user_id: int, user_name: str, on_expire) -> bool:
+    """
+    Резервирует освободившееся место за пользователем на время подтверждения
+    и отправляет ему предложение. По истечении времени вызывается
+    on_expire(game_id, user_id, application). Возвращает False, если отправить не удалось.
+    """
+    if not is_user_reachable(user_id):
+        return False
+
+    game_id = game['id']
+    seat_offers[game_id] = {'user_id': user_id, 'user_name': user_name}
+    offer_tasks[game_id] = asyncio.get_running_loop().create_task(
+        expire_offer(application, game, user_id, on_expire), name=f"seat-offer-{game_id}"
+    )
+
+    minutes = max(1, round(settings.WAITLIST_CONFIRM_SECONDS / 60))
+    try:
+        with outbound_lane('notification'):
+            await application.bot.send_message(
+                chat_id=user_id,
+                text=(
+                    f"🎟️ <b>ОСВОБОДИЛОСЬ МЕСТО!</b>\n\n"
+                    f"🎮 Игра: {game.get('title')}\n"
+                    f"📅 Дата: {game.get('date')}\n\n"
+                    f"Место закреплено за вами на {minutes} мин. Подтвердите участие."
+                ),
+                parse_mode='HTML',
+                reply_markup=get_offer_keyboard(game_id)
+            )
+        return True
+    except Exception as e:
+        if is_permanent_delivery_error(e):
+            mark_user_unreachable(user_id, str(e))
+        else:
+            logger.error(f"Ошибка отправки предложения места пользователю {user_id}: {e}")
+        offer = seat_offers.get(game_id)
+        if offer and offer['user_id'] == user_id:
+            take_offer(game_id)
+        return False
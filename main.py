@@ -1,22 +1,22 @@
+import time
+
+# Момент запуска процесса — для измерения времени до первого обновления
+STARTED_AT = time.monotonic()
+
 import logging
-from telegram.ext import CommandHandler, MessageHandler, filters, ConversationHandler
+import signal
+import asyncio
+import importlib
+import sys
+from telegram import Update
+from telegram.ext import CommandHandler, MessageHandler, TypeHandler, CallbackQueryHandler, InlineQueryHandler, filters, ConversationHandler
 
 # Импортируем настройки из config
-from config.bot import create_application
-
-# Импортируем обработчики из handlers
-from handlers.commands import start_command, help_command, menu_command
-from handlers.messages import handle_text
-from handlers.states import (
-    start_game_creation,
-    process_game_title,
-    process_game_date,
-    process_game_location,
-    process_game_players,
-    cancel_game_creation,
-    GAME_TITLE, GAME_DATE, GAME_LOCATION, GAME_PLAYERS
-)
-from handlers.keyboards import CREATE_GAME
+from config.bot import create_application, create_hosted_applications
+from utils import watchdog, recorder, metrics
+from utils.lazy import lazy_callback
+from utils.namespaces import load_package_copy, namespaced_path
+from config import settings
 
 # Настройка логирования
 logging.basicConfig(
@@ -29,27 +29,65 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def handlers_module(application, name: str):
+    """Модуль обработчиков бота (у каждого бота процесса своя копия пакета handlers)"""
+    package = application.bot_data.get('handlers_package', 'handlers')
+    return importlib.import_module(f"{package}.{name}")
+
+def loaded_handlers_module(application, name: str):
+    """Модуль обработчиков бота, если он уже загружен (иначе None, без импорта)"""
+    package = application.bot_data.get('handlers_package', 'handlers')
+    return sys.modules.get(f"{package}.{name}")
+
 def setup_handlers(application):
     """
     Настройка и регистрация всех обработчиков бота
     """
     logger.info("🛠️ Настройка обработчиков...")
+    package = application.bot_data.get('handlers_package', 'handlers')
+    commands = handlers_module(application, 'commands')
+    messages = handlers_module(application, 'messages')
+    throttle = handlers_module(application, 'throttle')
+    user_context = handlers_module(application, 'context')
+    search = handlers_module(application, 'search')
+    dedupe = handlers_module(application, 'dedupe')
+    states = handlers_module(application, 'states')
+    keyboards = handlers_module(application, 'keyboards')
+    
+    # Повторно доставленные обновления отбрасываются раньше всех обработчиков
+    application.add_handler(TypeHandler(Update, dedupe.drop_duplicate_updates), group=dedupe.DEDUPE_GROUP)
+    
+    # Время до первого обновления после запуска
+    application.add_handler(first_update_handler, group=FIRST_UPDATE_GROUP)
+    
+    # Запоминаем текущее обновление для отчетов сторожа event loop
+    application.add_handler(TypeHandler(Update, watchdog.track_update), group=watchdog.TRACKER_GROUP)
+    
+    # Запись потока обновлений для воспроизведения (файл открывается в main, один на процесс)
+    if settings.RECORD_UPDATES_PATH:
+        application.add_handler(TypeHandler(Update, recorder.record_update), group=recorder.RECORDER_GROUP)
+    
+    # Анти-флуд фильтр перед всеми обработчиками
+    application.add_handler(TypeHandler(Update, throttle.throttle_updates), group=-1)
+    
+    # Контекст пользователя (его игры) собирается один раз на обновление
+    application.add_handler(TypeHandler(Update, user_context.load_user_context), group=user_context.USER_CONTEXT_GROUP)
     
     # ConversationHandler для создания игры
     game_creation_handler = ConversationHandler(
-        entry_points=[MessageHandler(filters.Regex(f'^{CREATE_GAME}$'), start_game_creation)],
+        entry_points=[MessageHandler(filters.ChatType.PRIVATE & filters.Regex(f'^{keyboards.CREATE_GAME}$'), states.start_game_creation)],
         states={
-            GAME_TITLE: [MessageHandler(filters.TEXT & ~filters.COMMAND, process_game_title)],
-            GAME_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, process_game_date)],
-            GAME_LOCATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, process_game_location)],
-            GAME_PLAYERS: [MessageHandler(filters.TEXT & ~filters.COMMAND, process_game_players)],
+            states.GAME_TITLE: [MessageHandler(filters.TEXT & ~filters.COMMAND, states.process_game_title)],
+            states.GAME_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, states.process_game_date)],
+            states.GAME_LOCATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, states.process_game_location)],
+            states.GAME_PLAYERS: [MessageHandler(filters.TEXT & ~filters.COMMAND, states.process_game_players)],
         },
         fallbacks=[
-            CommandHandler("start", start_command),
-            CommandHandler("menu", menu_command),
-            CommandHandler("help", help_command),
-            MessageHandler(filters.Regex('^⬅️ Назад в меню$'), cancel_game_creation),
-            MessageHandler(filters.COMMAND, cancel_game_creation)
+            CommandHandler("start", commands.start_command),
+            CommandHandler("menu", commands.menu_command),
+            CommandHandler("help", commands.help_command),
+            MessageHandler(filters.Regex('^⬅️ Назад в меню$'), states.cancel_game_creation),
+            MessageHandler(filters.COMMAND, states.cancel_game_creation)
         ],
         allow_reentry=True,
         name="game_creation",
@@ -57,27 +95,204 @@ def setup_handlers(application):
     )
     
     # Регистрируем команды
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("menu", menu_command))
+    application.add_handler(CommandHandler("start", commands.start_command))
+    application.add_handler(CommandHandler("help", commands.help_command))
+    application.add_handler(CommandHandler("menu", commands.menu_command))
+    # Редко используемые команды загружаются при первом вызове
+    application.add_handler(CommandHandler("profile", lazy_callback(f'{package}.admin', 'profile_command')))
+    application.add_handler(CommandHandler("memory", lazy_callback(f'{package}.admin', 'memory_command')))
+    application.add_handler(CommandHandler("stats", lazy_callback(f'{package}.admin', 'stats_command')))
+    application.add_handler(CommandHandler("export", lazy_callback(f'{package}.admin', 'export_command')))
+    
+    # Быстрое создание игры одним сообщением или формой Web App
+    application.add_handler(CommandHandler("newgame", states.newgame_command))
+    application.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, states.process_web_app_game))
+    
+    # Игры групповых чатов: привязка, общий список с кнопками, подписка на личные сообщения
+    # (те же кнопки подтверждают место из листа ожидания)
+    application.add_handler(CommandHandler("attach", lazy_callback(f'{package}.groups', 'attach_command')))
+    application.add_handler(CommandHandler("dm", lazy_callback(f'{package}.groups', 'dm_command')))
+    application.add_handler(CommandHandler("cancelgames", lazy_callback(f'{package}.bulk', 'cancel_games_command')))
+    application.add_handler(CommandHandler("kick", lazy_callback(f'{package}.bulk', 'kick_command')))
+    application.add_handler(CommandHandler("move", lazy_callback(f'{package}.bulk', 'move_command')))
+    application.add_handler(CommandHandler("digest", lazy_callback(f'{package}.digest', 'digest_command')))
+    application.add_handler(CallbackQueryHandler(
+        lazy_callback(f'{package}.groups', 'handle_roster_button'),
+        pattern=r'^(join|leave|claim|pass):\d+$'
+    ))
+    
+    # Инлайн-поиск игр (@GatherBot мафия)
+    application.add_handler(InlineQueryHandler(search.handle_inline_query))
     
     # Регистрируем ConversationHandler для создания игры
     application.add_handler(game_creation_handler)
     
-    # Регистрируем общий обработчик текста
+    # Регистрируем общий обработчик текста (только личные чаты, в группах бот отвечает на команды и кнопки)
     application.add_handler(
-        MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text)
+        MessageHandler(filters.ChatType.PRIVATE & filters.TEXT & ~filters.COMMAND, messages.handle_text)
     )
     
     logger.info("✅ Обработчики настроены")
 
+def toggle_profiling(application):
+    """Обработчик SIGUSR1: модуль профилировщика загружается только при первом сигнале"""
+    importlib.import_module('utils.profiler').toggle_profiling(application)
+
+async def report_first_update(update: Update, context):
+    """Измеряет время от запуска процесса до первого обновления (срабатывает один раз)"""
+    elapsed = time.monotonic() - STARTED_AT
+    context.application.remove_handler(first_update_handler, group=FIRST_UPDATE_GROUP)
+    metrics.set_gauge('startup.time_to_first_update', round(elapsed, 3))
+    if elapsed > settings.FIRST_UPDATE_TARGET:
+        logger.warning(f"⏱️ Первое обновление через {elapsed:.2f}с (цель {settings.FIRST_UPDATE_TARGET}с)")
+    else:
+        logger.info(f"⏱️ Первое обновление через {elapsed:.2f}с")
+
+# Разовый обработчик первого обновления (раньше всех остальных групп)
+FIRST_UPDATE_GROUP = -1001
+first_update_handler = TypeHandler(Update, report_first_update)
+
+def start_shared_services(application):
+    """
+    Общие для процесса службы (один раз, сколько бы ботов ни работало):
+    сторож event loop и профилирование по SIGUSR1
+    """
+    # SIGUSR1 включает/выключает профилирование (профилируется весь процесс)
+    if hasattr(signal, 'SIGUSR1'):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR1, toggle_profiling, application
+        )
+        logger.info("🔬 SIGUSR1 включает/выключает профилирование")
+    
+    # Сторож блокировок event loop
+    watchdog.start_watchdog()
+
+def stop_shared_services():
+    """Останавливает общие службы процесса (после остановки всех ботов)"""
+    if 'utils.profiler' in sys.modules:
+        sys.modules['utils.profiler'].stop_profiling()
+    if 'utils.memory' in sys.modules:
+        sys.modules['utils.memory'].stop_allocation_tracing()
+    watchdog.stop_watchdog()
+
+async def init_bot(application):
+    """Действия после инициализации одного бота, внутри event loop"""
+    # Восстанавливаем состояние, сохраненное при прошлой остановке (у каждого бота свои файлы)
+    namespace = application.bot_data.get('namespace')
+    storage = handlers_module(application, 'storage')
+    snapshot_path = namespaced_path(settings.SNAPSHOT_PATH, namespace)
+    storage.load_snapshot(snapshot_path)
+    handlers_module(application, 'dedupe').load_mark(namespaced_path(settings.DEDUPE_MARK_PATH, namespace))
+    storage.start_snapshots(snapshot_path)
+    handlers_module(application, 'delivery').watch_api_breaker(application)
+    metrics.set_gauge('startup.time_to_ready', round(time.monotonic() - STARTED_AT, 3))
+    
+    # Периодический отчет о памяти
+    if settings.MEMORY_REPORT_INTERVAL > 0:
+        handlers_module(application, 'memory').start_memory_reports(application)
+    
+    # Сводки уведомлений по расписанию — только если их кто-то включил
+    # (иначе модуль загрузится и запустит рассылку при первой команде /digest)
+    if handlers_module(application, 'delivery').digest_modes:
+        handlers_module(application, 'digest').start_digests(application)
+
+async def stop_bot(application):
+    """
+    Корректное завершение бота: прием обновлений уже остановлен и обработка текущих закончена.
+    Дожидаемся отложенных отправок (с ограничением по времени) и сохраняем снимок.
+    """
+    logger.info("🛑 Завершение работы: дренаж отправок и сохранение состояния")
+    namespace = application.bot_data.get('namespace')
+    digest = loaded_handlers_module(application, 'digest')
+    if digest:
+        digest.stop_digests()
+    storage = handlers_module(application, 'storage')
+    storage.stop_snapshots()
+    await handlers_module(application, 'delivery').drain_deliveries(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    storage.save_snapshot(namespaced_path(settings.SNAPSHOT_PATH, namespace))
+    memory = loaded_handlers_module(application, 'memory')
+    if memory:
+        memory.stop_memory_reports()
+
+async def post_init(application):
+    """Действия после инициализации приложения (один бот в процессе)"""
+    await init_bot(application)
+    start_shared_services(application)
+
+async def post_stop(application):
+    """Корректное завершение (один бот в процессе)"""
+    await stop_bot(application)
+    stop_shared_services()
+
+def create_hosted_bots() -> list:
+    """
+    Приложения для нескольких ботов одного процесса (TELEGRAM_BOTS).
+    Первый бот использует пакет handlers, остальные — его копии со своим хранилищем.
+    """
+    applications = create_hosted_applications(settings.HOSTED_BOTS, post_init=init_bot, post_stop=stop_bot)
+    for position, application in enumerate(applications):
+        namespace = application.bot_data['namespace']
+        application.bot_data['handlers_package'] = (
+            'handlers' if position == 0 else load_package_copy('handlers', namespace)
+        )
+        setup_handlers(application)
+    return applications
+
+async def run_hosted_bots(applications: list):
+    """
+    Запускает несколько ботов в одном event loop (тот же порядок шагов, что у run_polling)
+    и останавливает их по SIGINT/SIGTERM. Общие службы процесса запускаются один раз
+    и останавливаются после остановки всех ботов
+    """
+    stop_requested = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(stop_signal, stop_requested.set)
+    
+    initialized = []
+    started = []
+    try:
+        for application in applications:
+            await application.initialize()
+            initialized.append(application)
+            await init_bot(application)
+            if len(initialized) == 1:
+                start_shared_services(application)
+            await application.updater.start_polling(
+                allowed_updates=None,
+                drop_pending_updates=settings.DROP_PENDING_UPDATES
+            )
+            await application.start()
+            started.append(application)
+            logger.info(f"🚀 Бот '{application.bot_data['namespace']}' (@{application.bot.username}) запущен")
+        await stop_requested.wait()
+    finally:
+        for application in reversed(started):
+            if application.updater.running:
+                await application.updater.stop()
+            await application.stop()
+            await stop_bot(application)
+        if initialized:
+            stop_shared_services()
+        for application in reversed(initialized):
+            await application.shutdown()
+
 def main():
     """
     Главная функция запуска бота
     """
     try:
+        # Запись потока обновлений — один файл на процесс для всех ботов
+        if settings.RECORD_UPDATES_PATH:
+            recorder.start_recording()
+        
+        # Несколько ботов в одном процессе
+        if settings.HOSTED_BOTS:
+            asyncio.run(run_hosted_bots(create_hosted_bots()))
+            return
+        
         # Создаем приложение
-        application = create_application()
+        application = create_application(post_init=post_init, post_stop=post_stop)
         
         # Настраиваем обработчики
         setup_handlers(application)
@@ -102,7 +317,8 @@ def main():
         
         application.run_polling(
             allowed_updates=None,
-            drop_pending_updates=True
+            # Обновления, пришедшие во время перезапуска, обрабатываются после старта
+            drop_pending_updates=settings.DROP_PENDING_UPDATES
         )
         
     except ValueError as e:
@@ -121,6 +337,9 @@ def main():
         logger.error(f"💥 Критическая ошибка: {e}", exc_info=True)
         print(f"\n💥 КРИТИЧЕСКАЯ ОШИБКА: {e}")
         print("Проверьте файл bot.log для деталей")
+    
+    finally:
+        recorder.stop_recording()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Выгрузка игр, участия и уведомлений из снимка состояния (без запуска бота).
+
+Запуск:
+    python -m tools.export [--snapshot data/snapshot.bin] [--format jsonl|csv]
+                           [--output-dir exports] [--part-size МБ] [--max-size МБ]
+
+Результат — сжатые gzip-части <output-dir>/gatherbot-export-<время>.partN.<формат>.gz,
+тот же формат, что и у команды /export.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from config import settings
+from handlers.export import EXPORT_FORMATS, write_export, export_prefix
+from handlers.storage import load_snapshot
+
+MEGABYTE = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выгрузка данных GatherBot из снимка")
+    parser.add_argument('--snapshot', default=settings.SNAPSHOT_PATH, help="файл снимка")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='jsonl', help="формат строк")
+    parser.add_argument('--output-dir', default='exports', help="каталог для частей выгрузки")
+    parser.add_argument('--part-size', type=int, help="размер части, МБ")
+    parser.add_argument('--max-size', type=int, help="предел всей выгрузки, МБ")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    if not load_snapshot(args.snapshot):
+        parser.error(f"снимок {args.snapshot} не найден")
+
+    result = asyncio.run(write_export(
+        export_prefix(args.output_dir),
+        args.format,
+        part_size=args.part_size * MEGABYTE if args.part_size else None,
+        max_bytes=args.max_size * MEGABYTE if args.max_size else None
+    ))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Воспроизведение записанного потока обновлений (см. utils/recorder.py).
+
+Запуск:
+    python -m tools.replay trace.jsonl [--realtime] [--no-throttle] [--output result.json]
+
+Обновления подаются в main.setup_handlers на заглушке Bot API.
+Результат: пропускная способность, перцентили задержки и контрольная
+сумма состояния, чтобы сравнить две версии кода на одной записи.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from telegram import Update
+from config import settings
+from tools.stub_bot import create_stub_application
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Поля, зависящие от времени запуска — не входят в контрольную сумму
+VOLATILE_FIELDS = ('created_at', 'updated_at', 'timestamp')
+
+
+def strip_volatile(data):
+    """Убирает из состояния поля, зависящие от времени"""
+    if isinstance(data, dict):
+        return {key: strip_volatile(value) for key, value in data.items() if key not in VOLATILE_FIELDS}
+    if isinstance(data, (list, tuple)):
+        return [strip_volatile(item) for item in data]
+    if isinstance(data, (set, frozenset)):
+        return sorted(strip_volatile(item) for item in data)
+    return data
+
+
+def state_checksum() -> str:
+    """Контрольная сумма хранилища игр и уведомлений"""
+    from handlers import keyboards
+    state = {
+        'games': keyboards.games,
+        'notifications': {str(user_id): items for user_id, items in keyboards.notifications.items()},
+        'unreachable': sorted(keyboards.unreachable_users),
+    }
+    payload = json.dumps(strip_volatile(state), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_trace(path: str) -> list:
+    """Читает запись: список (смещение по времени, словарь обновления)"""
+    with open(path, encoding='utf-8') as trace_file:
+        return [(record['t'], record['u']) for record in map(json.loads, trace_file) if record]
+
+
+async def replay(path: str, realtime: bool = False) -> dict:
+    """Воспроизводит запись и возвращает результаты"""
+    import main
+    
+    application = create_stub_application()
+    main.setup_handlers(application)
+    await application.initialize()
+    
+    trace = load_trace(path)
+    latencies = []
+    started = time.perf_counter()
+    
+    for offset, update_data in trace:
+        if realtime:
+            delay = offset - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        update = Update.de_json(update_data, application.bot)
+        update_started = time.perf_counter()
+        await application.process_update(update)
+        latencies.append(time.perf_counter() - update_started)
+    
+    elapsed = time.perf_counter() - started
+    # Отложенные отправки (обновления карточек и т.п.) меняют состояние — дожидаемся их до контрольной суммы
+    from handlers import delivery
+    await delivery.drain_deliveries(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    await application.shutdown()
+    
+    return {
+        'updates': len(trace),
+        'elapsed': round(elapsed, 4),
+        'throughput': round(len(trace) / elapsed, 2) if elapsed else 0.0,
+        'latency_p50': metrics.percentile(latencies, 0.50),
+        'latency_p95': metrics.percentile(latencies, 0.95),
+        'latency_p99': metrics.percentile(latencies, 0.99),
+        'latency_max': max(latencies, default=0.0),
+        'api_calls': application.bot.request.calls if hasattr(application.bot.request, 'calls') else {},
+        'checksum': state_checksum(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных обновлений GatherBot")
+    parser.add_argument('trace', help="файл записи (JSON Lines)")
+    parser.add_argument('--realtime', action='store_true', help="соблюдать исходные интервалы")
+    parser.add_argument('--no-throttle', action='store_true', help="отключить анти-флуд")
+    parser.add_argument('--output', help="записать результат в JSON-файл")
+    args = parser.parse_args()
+    
+    logging.disable(logging.INFO)
+    
+    if args.no_throttle:
+        settings.THROTTLE_RATES = {action: (float('inf'), 10 ** 9) for action in settings.THROTTLE_RATES}
+    
+    result = asyncio.run(replay(args.trace, realtime=args.realtime))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(result, output_file, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import json
+import time
+from telegram.request import BaseRequest
+from telegram.ext import Application
+
+STUB_TOKEN = "123456:STUB"
+STUB_BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'GatherBot', 'username': 'GatherBot'}
+
+
+class StubRequest(BaseRequest):
+    """
+    Заглушка HTTP-транспорта: отвечает на вызовы Bot API без сети.
+    Считает вызовы по методам и выдает правдоподобные ответы.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit('/', 1)[-1]
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+        parameters = request_data.parameters if request_data else {}
+        return 200, json.dumps({'ok': True, 'result': self.make_result(api_method, parameters)}).encode()
+
+    def make_result(self, api_method: str, parameters: dict):
+        """Формирует ответ для метода Bot API"""
+        if api_method == 'getMe':
+            return STUB_BOT_USER
+        if api_method in ('sendMessage', 'editMessageText', 'sendDocument'):
+            self.message_id += 1
+            chat_id = parameters.get('chat_id', 0)
+            return {
+                'message_id': parameters.get('message_id', self.message_id),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private' if int(chat_id) > 0 else 'group'},
+                'text': parameters.get('text', ''),
+            }
+        if api_method == 'getUpdates':
+            return []
+        return True
+
+
+def create_stub_application() -> Application:
+    """Создает Application, работающее без сети"""
+    return (
+        Application.builder()
+        .token(STUB_TOKEN)
+        .request(StubRequest())
+        .get_updates_request(StubRequest())
+        .build()
+    )
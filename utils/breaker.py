@@ -0,0 +1,123 @@
+import logging
+import time
+from collections import deque
+from telegram.error import NetworkError
+from config import settings
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(NetworkError):
+    """Запрос не отправлен: выключатель разомкнут из-за сбоев Bot API"""
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель: следит за долей ошибок и медленных запросов
+    в скользящем окне. При превышении порога размыкается и отклоняет запросы
+    сразу, через паузу пропускает пробные запросы (полуоткрытое состояние)
+    и замыкается после их успеха.
+    """
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_ratio: float,
+                 slow_call_seconds: float, open_seconds: float, half_open_probes: int):
+        self.name = name
+        self.outcomes = deque(maxlen=window)  # True — ошибка или медленный запрос
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        # Номер полуоткрытого периода: слот пробы освобождается только в том периоде, где был взят
+        self.probe_epoch = 0
+        self.listeners = []
+        metrics.set_gauge(f"breaker.{name}.state", self.state)
+
+    def add_listener(self, listener):
+        """Регистрирует функцию listener(новое_состояние), вызываемую при смене состояния"""
+        self.listeners.append(listener)
+
+    def transition(self, state: str):
+        """Меняет состояние и сообщает об этом в лог, метрики и слушателям"""
+        if state == self.state:
+            return
+        logger.warning(f"🔌 Выключатель '{self.name}': {self.state} -> {state}")
+        self.state = state
+        metrics.set_gauge(f"breaker.{self.name}.state", state)
+        metrics.increment(f"breaker.{self.name}.transitions.{state}")
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state == HALF_OPEN:
+            self.probe_epoch += 1
+        self.probes_in_flight = 0
+        if state == CLOSED:
+            self.outcomes.clear()
+        for listener in self.listeners:
+            try:
+                listener(state)
+            except Exception as e:
+                logger.error(f"Ошибка слушателя выключателя '{self.name}': {e}")
+
+    def before_request(self):
+        """
+        Проверяет, можно ли отправить запрос; иначе бросает CircuitOpenError.
+        Возвращает номер полуоткрытого периода, если запрос занял слот пробы, иначе None
+        (его нужно вернуть в release_probe после завершения запроса)
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                metrics.increment(f"breaker.{self.name}.rejected")
+                raise CircuitOpenError(f"Выключатель '{self.name}' разомкнут")
+            self.transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                metrics.increment(f"breaker.{self.name}.rejected")
+                raise CircuitOpenError(f"Выключатель '{self.name}' ждет результата пробного запроса")
+            self.probes_in_flight += 1
+            return self.probe_epoch
+        return None
+
+    def release_probe(self, epoch):
+        """Освобождает слот пробного запроса (вызывается всегда, каким бы ни был исход)"""
+        if epoch is not None and self.state == HALF_OPEN and epoch == self.probe_epoch:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def record(self, failed: bool, latency: float = 0.0):
+        """Учитывает результат запроса"""
+        failed = failed or latency >= self.slow_call_seconds
+
+        if self.state == HALF_OPEN:
+            self.transition(OPEN if failed else CLOSED)
+            return
+
+        self.outcomes.append(failed)
+        if self.state == CLOSED and len(self.outcomes) >= self.min_calls:
+            ratio = sum(self.outcomes) / len(self.outcomes)
+            metrics.set_gauge(f"breaker.{self.name}.failure_ratio", round(ratio, 3))
+            if ratio >= self.failure_ratio:
+                self.transition(OPEN)
+
+
+def build_api_breaker(name: str = 'api') -> CircuitBreaker:
+    """
+    Выключатель запросов к Bot API. У каждого бота свой: 429 приходят на токен,
+    и перегрузка одного бота не должна отклонять запросы остальных
+    """
+    return CircuitBreaker(
+        name,
+        window=settings.BREAKER_WINDOW,
+        min_calls=settings.BREAKER_MIN_CALLS,
+        failure_ratio=settings.BREAKER_FAILURE_RATIO,
+        slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+        open_seconds=settings.BREAKER_OPEN_SECONDS,
+        half_open_probes=settings.BREAKER_HALF_OPEN_PROBES
+    )
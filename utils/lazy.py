@@ -0,0 +1,23 @@
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def lazy_callback(module_name: str, function_name: str):
+    """
+    Возвращает обработчик, модуль которого импортируется при первом вызове.
+    Используется для редко нужных команд, чтобы не замедлять запуск.
+    """
+    callback = None
+
+    async def wrapper(update, context):
+        nonlocal callback
+        if callback is None:
+            logger.info(f"📦 Отложенная загрузка {module_name}.{function_name}")
+            callback = getattr(importlib.import_module(module_name), function_name)
+        return await callback(update, context)
+
+    wrapper.__name__ = function_name
+    wrapper.__qualname__ = function_name
+    return wrapper
@@ -0,0 +1,83 @@
+import logging
+import sys
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Предыдущий снимок tracemalloc для сравнения
+previous_snapshot = {'snapshot': None}
+
+
+def deep_sizeof(obj, seen: set = None) -> int:
+    """Оценивает полный размер объекта вместе с вложенными контейнерами"""
+    if seen is None:
+        seen = set()
+    # Обходим итеративно, чтобы не упереться в глубину рекурсии
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__') and not isinstance(current, type):
+            stack.append(vars(current))
+    return total
+
+
+def entry_count(obj) -> int:
+    """Количество записей в структуре"""
+    try:
+        return len(obj)
+    except TypeError:
+        return 0
+
+
+def start_allocation_tracing() -> bool:
+    """Включает tracemalloc и делает базовый снимок; False, если уже включен"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start()
+    previous_snapshot['snapshot'] = tracemalloc.take_snapshot()
+    logger.info("🧠 tracemalloc включен, базовый снимок сделан")
+    return True
+
+
+def stop_allocation_tracing() -> bool:
+    """Выключает tracemalloc (и его накладные расходы); False, если он не был включен"""
+    previous_snapshot['snapshot'] = None
+    if not tracemalloc.is_tracing():
+        return False
+    tracemalloc.stop()
+    logger.info("🧠 tracemalloc выключен")
+    return True
+
+
+def allocation_diff(limit: int) -> list:
+    """
+    Сравнивает текущий снимок tracemalloc с предыдущим и возвращает
+    самые выросшие места выделения. Пустой список, если tracemalloc не включен.
+    """
+    if not tracemalloc.is_tracing():
+        return []
+    
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    previous = previous_snapshot['snapshot']
+    previous_snapshot['snapshot'] = snapshot
+    if previous is None:
+        return []
+    
+    stats = snapshot.compare_to(previous, 'lineno')
+    return [
+        (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size_diff, stat.count_diff)
+        for stat in stats[:limit]
+    ]
@@ -0,0 +1,103 @@
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних значений хранить для расчета перцентилей
+SAMPLE_WINDOW = 1024
+
+# Хранилище метрик
+counters = {}  # name -> число
+gauges = {}  # name -> последнее значение
+timings = {}  # name -> {'count', 'total', 'max', 'samples'}
+
+
+def increment(name: str, value: int = 1):
+    """Увеличивает счетчик"""
+    counters[name] = counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value):
+    """Устанавливает текущее значение метрики"""
+    gauges[name] = value
+
+
+def observe(name: str, value: float):
+    """Добавляет измерение (время, размер и т.п.)"""
+    timing = timings.get(name)
+    if timing is None:
+        timing = {'count': 0, 'total': 0.0, 'max': 0.0, 'samples': deque(maxlen=SAMPLE_WINDOW)}
+        timings[name] = timing
+    timing['count'] += 1
+    timing['total'] += value
+    if value > timing['max']:
+        timing['max'] = value
+    timing['samples'].append(value)
+
+
+def percentile(samples, fraction: float) -> float:
+    """Возвращает перцентиль по списку значений"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(fraction * len(ordered)))
+    return ordered[index]
+
+
+def timing_summary(name: str) -> dict:
+    """Сводка по измерению: количество, среднее, p50/p95/p99, максимум"""
+    timing = timings.get(name)
+    if not timing or not timing['count']:
+        return {'count': 0, 'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    samples = timing['samples']
+    return {
+        'count': timing['count'],
+        'avg': timing['total'] / timing['count'],
+        'p50': percentile(samples, 0.50),
+        'p95': percentile(samples, 0.95),
+        'p99': percentile(samples, 0.99),
+        'max': timing['max'],
+    }
+
+
+def snapshot() -> dict:
+    """Возвращает снимок всех метрик"""
+    return {
+        'counters': dict(counters),
+        'gauges': dict(gauges),
+        'timings': {name: timing_summary(name) for name in timings},
+    }
+
+
+def format_report() -> str:
+    """Форматирует метрики в текстовый отчет"""
+    lines = []
+    for name in sorted(counters):
+        lines.append(f"{name} = {counters[name]}")
+    for name in sorted(gauges):
+        lines.append(f"{name} = {gauges[name]}")
+    for name in sorted(timings):
+        summary = timing_summary(name)
+        lines.append(
+            f"{name}: n={summary['count']} avg={summary['avg']:.4f} "
+            f"p50={summary['p50']:.4f} p95={summary['p95']:.4f} "
+            f"p99={summary['p99']:.4f} max={summary['max']:.4f}"
+        )
+    return "\n".join(lines)
+
+
+class Timer:
+    """Контекстный менеджер для измерения времени блока кода"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
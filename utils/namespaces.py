@@ -0,0 +1,50 @@
+import importlib
+import importlib.util
+import logging
+import os
+import re
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Имя бота используется в имени модуля и в путях к данным
+NAMESPACE_NAME = re.compile(r'^[A-Za-z0-9_]+$')
+
+
+def load_package_copy(package_name: str, namespace: str) -> str:
+    """
+    Загружает независимую копию пакета под именем <package>__<namespace>
+    и возвращает это имя. Модули копии заново исполняются, поэтому
+    у каждой копии свое хранилище (глобальные переменные модулей).
+    Пакет должен импортировать свои модули относительно (from .module import ...),
+    общие модули вне пакета (config, utils) остаются общими.
+    """
+    if not NAMESPACE_NAME.match(namespace):
+        raise ValueError(f"Недопустимое имя пространства: '{namespace}'")
+
+    copy_name = f"{package_name}__{namespace}"
+    if copy_name in sys.modules:
+        return copy_name
+
+    original = importlib.import_module(package_name)
+    spec = importlib.util.spec_from_file_location(
+        copy_name, original.__file__, submodule_search_locations=list(original.__path__)
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[copy_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[copy_name]
+        raise
+
+    logger.info(f"📦 Пакет {package_name} загружен для пространства '{namespace}'")
+    return copy_name
+
+
+def namespaced_path(path: str, namespace: str = None) -> str:
+    """Путь к файлу данных пространства: data/snapshot.bin -> data/<namespace>/snapshot.bin"""
+    if not namespace:
+        return path
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, namespace, filename)
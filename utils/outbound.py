@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Полоса текущего исходящего запроса: interactive (ответы пользователю),
+# notification (рассылки участникам), bulk (массовые рассылки)
+current_lane = contextvars.ContextVar('outbound_lane', default='interactive')
+
+
+@contextlib.contextmanager
+def outbound_lane(lane: str):
+    """Выполняет запросы к Bot API внутри блока в указанной полосе"""
+    token = current_lane.set(lane)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+class OutboundScheduler:
+    """
+    Планировщик исходящих запросов со взвешенной справедливой очередью (WFQ).
+    Каждый запрос получает виртуальное время окончания 1/вес своей полосы,
+    первым отправляется запрос с наименьшим временем. Общий бюджет ограничен
+    числом одновременных запросов и скоростью (токен-ведро).
+    """
+
+    def __init__(self, weights: dict, max_concurrent: int, rate: float):
+        self.weights = weights
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.queue = []  # куча (время окончания, порядковый номер, полоса, фабрика, future, время постановки)
+        self.sequence = itertools.count()
+        self.virtual_time = 0.0
+        self.lane_finish = {lane: 0.0 for lane in weights}
+        self.lane_queued = {lane: 0 for lane in weights}  # запросов полосы в куче
+        self.in_flight = 0
+        self.tokens = float(max_concurrent)
+        self.tokens_updated = time.monotonic()
+        self.wakeup = None
+        self.dispatcher = None
+
+    async def submit(self, lane: str, factory):
+        """Ставит запрос в очередь полосы и ждет его результата"""
+        if lane not in self.weights:
+            lane = 'interactive'
+        if self.dispatcher is None or self.dispatcher.done():
+            self.wakeup = asyncio.Event()
+            self.dispatcher = asyncio.get_running_loop().create_task(self.dispatch(), name="outbound_dispatcher")
+        
+        finish = max(self.virtual_time, self.lane_finish[lane]) + 1.0 / self.weights[lane]
+        self.lane_finish[lane] = finish
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (finish, next(self.sequence), lane, factory, future, time.monotonic()))
+        self.lane_queued[lane] += 1
+        metrics.set_gauge(f"outbound.{lane}.queued", self.lane_queued[lane])
+        self.wakeup.set()
+        return await future
+
+    def queued(self, lane: str) -> int:
+        """Количество запросов полосы в очереди"""
+        return self.lane_queued.get(lane, 0)
+
+    def take_token(self) -> float:
+        """Списывает токен скорости; возвращает время ожидания, если токена нет"""
+        now = time.monotonic()
+        self.tokens = min(float(self.max_concurrent), self.tokens + (now - self.tokens_updated) * self.rate)
+        self.tokens_updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    async def dispatch(self):
+        """Выбирает следующий запрос по WFQ, когда есть свободный слот и токен"""
+        while True:
+            if not self.queue or self.in_flight >= self.max_concurrent:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            
+            delay = self.take_token()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            
+            finish, _, lane, factory, future, enqueued = heapq.heappop(self.queue)
+            self.virtual_time = finish
+            self.lane_queued[lane] -= 1
+            metrics.set_gauge(f"outbound.{lane}.queued", self.lane_queued[lane])
+            if future.cancelled():
+                continue
+            metrics.observe(f"outbound.{lane}.wait", time.monotonic() - enqueued)
+            self.in_flight += 1
+            asyncio.get_running_loop().create_task(self.execute(lane, factory, future, enqueued))
+
+    async def execute(self, lane: str, factory, future, enqueued: float):
+        """Выполняет запрос и передает результат ожидающему"""
+        try:
+            result = await factory()
+            if not future.done():
+                future.set_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.in_flight -= 1
+            metrics.observe(f"outbound.{lane}.latency", time.monotonic() - enqueued)
+            self.wakeup.set()
+
+    async def close(self):
+        """Останавливает диспетчер"""
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.dispatcher
+            self.dispatcher = None
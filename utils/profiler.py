@@ -0,0 +1,138 @@
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from telegram import Update
+from telegram.ext import TypeHandler
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Группа для временного счетчика обновлений (раньше всех остальных)
+COUNTER_GROUP = -100
+
+# Состояние текущей сессии профилирования (None если профилирование выключено)
+session = None
+
+
+class StackSampler(threading.Thread):
+    """Поток, периодически снимающий стек потока event loop для flamegraph"""
+
+    def __init__(self, target_thread_id: int, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def is_profiling() -> bool:
+    """Проверяет, идет ли профилирование"""
+    return session is not None
+
+
+def start_profiling(application, seconds: float = None, updates: int = None) -> bool:
+    """
+    Включает cProfile и сэмплер стеков на N секунд или N обновлений.
+    Должна вызываться из потока event loop.
+    """
+    global session
+    if session is not None:
+        logger.warning("⚠️ Профилирование уже запущено")
+        return False
+    
+    profile = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+    session = {
+        'profile': profile,
+        'sampler': sampler,
+        'application': application,
+        'started': time.perf_counter(),
+        'updates_left': updates,
+        'counter_handler': None,
+        'timer': None,
+    }
+    
+    if updates:
+        # Счетчик обновлений добавляется только на время профилирования
+        counter_handler = TypeHandler(Update, count_profiled_update)
+        application.add_handler(counter_handler, group=COUNTER_GROUP)
+        session['counter_handler'] = counter_handler
+    else:
+        seconds = seconds or settings.PROFILE_DEFAULT_SECONDS
+        session['timer'] = asyncio.get_running_loop().call_later(seconds, stop_profiling)
+    
+    sampler.start()
+    profile.enable()
+    logger.info(f"🔬 Профилирование запущено: "
+                f"{f'{updates} обновлений' if updates else f'{seconds} сек'}")
+    return True
+
+
+async def count_profiled_update(update: Update, context):
+    """Считает обновления и останавливает профилирование после N штук"""
+    if session is None or session['updates_left'] is None:
+        return
+    session['updates_left'] -= 1
+    if session['updates_left'] <= 0:
+        # Останавливаем после того как текущее обновление будет обработано
+        asyncio.get_running_loop().call_soon(stop_profiling)
+
+
+def stop_profiling():
+    """Выключает профилирование и записывает pstats и collapsed-stack файлы"""
+    global session
+    if session is None:
+        return None
+    
+    current, session = session, None
+    current['profile'].disable()
+    current['sampler'].stop()
+    if current['timer']:
+        current['timer'].cancel()
+    if current['counter_handler']:
+        current['application'].remove_handler(current['counter_handler'], group=COUNTER_GROUP)
+    
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    base_name = os.path.join(settings.PROFILE_DIR, datetime.now().strftime("profile-%Y%m%d-%H%M%S"))
+    pstats_path = base_name + ".pstats"
+    folded_path = base_name + ".folded"
+    
+    pstats.Stats(current['profile']).dump_stats(pstats_path)
+    with open(folded_path, 'w', encoding='utf-8') as folded_file:
+        for stack, count in current['sampler'].stacks.most_common():
+            folded_file.write(f"{stack} {count}\n")
+    
+    elapsed = time.perf_counter() - current['started']
+    logger.info(f"🔬 Профилирование завершено за {elapsed:.1f}с: {pstats_path}, {folded_path}")
+    return pstats_path, folded_path
+
+
+def toggle_profiling(application):
+    """Обработчик сигнала: запускает профилирование или останавливает текущее"""
+    if is_profiling():
+        stop_profiling()
+    else:
+        start_profiling(application)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import time
+from telegram import Update
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Группа обработчика записи (сразу после трекера сторожа)
+RECORDER_GROUP = -999
+
+# Поля с персональными данными, которые заменяются при записи
+NAME_FIELDS = ('first_name', 'last_name', 'username', 'title')
+# Поля, которые удаляются целиком
+DROP_FIELDS = ('language_code', 'is_premium', 'photo', 'bio')
+# Обязательные булевы поля, которые нельзя опускать
+REQUIRED_FLAGS = ('is_bot',)
+# Поля со свободным текстом пользователя (хешируются при RECORD_KEEP_TEXT=0)
+TEXT_FIELDS = ('text', 'caption', 'query')
+
+# Состояние записи
+recording = {'file': None, 'started': None, 'count': 0}
+
+
+def anonymize_id(original_id: int) -> int:
+    """Стабильно отображает ID пользователя/чата в анонимный (знак сохраняется)"""
+    digest = hashlib.sha256(f"{settings.RECORD_SALT}:{abs(original_id)}".encode()).hexdigest()
+    anon_id = int(digest[:10], 16)
+    return -anon_id if original_id < 0 else anon_id
+
+
+def scrub_text(text: str) -> str:
+    """
+    Заменяет текст стабильным хешем. Команда (/newgame) остается, чтобы
+    обновление попало в тот же обработчик; аргументы хешируются
+    """
+    command, separator, rest = text.partition(' ') if text.startswith('/') else ('', '', text)
+    if not rest:
+        return command
+    digest = hashlib.sha256(f"{settings.RECORD_SALT}:{rest}".encode()).hexdigest()[:12]
+    return f"{command}{separator}text{digest}"
+
+
+def anonymize(data):
+    """
+    Рекурсивно анонимизирует словарь обновления: ID и имена заменяются всегда,
+    текст сообщений — только при RECORD_KEEP_TEXT=0 (по умолчанию он сохраняется)
+    """
+    if isinstance(data, list):
+        return [anonymize(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    
+    # Пользователь или чат: есть числовой id и имя/тип
+    is_peer = isinstance(data.get('id'), int) and ('first_name' in data or 'type' in data)
+    
+    result = {}
+    for key, value in data.items():
+        # Необязательные флаги со значением False восстанавливаются по умолчанию при чтении
+        if key in DROP_FIELDS or (value is False and key not in REQUIRED_FLAGS):
+            continue
+        if is_peer and key == 'id':
+            result[key] = anonymize_id(value)
+        elif is_peer and key in NAME_FIELDS:
+            result[key] = f"user{anonymize_id(data['id']) % 100000}"
+        elif key in TEXT_FIELDS and isinstance(value, str) and not settings.RECORD_KEEP_TEXT:
+            result[key] = scrub_text(value)
+        else:
+            result[key] = anonymize(value)
+    return result
+
+
+def start_recording(path: str = None):
+    """Открывает файл записи (один на процесс; повторный вызов ничего не делает)"""
+    if recording['file'] is not None:
+        return
+    path = path or settings.RECORD_UPDATES_PATH
+    recording['file'] = open(path, 'a', encoding='utf-8')
+    recording['started'] = time.monotonic()
+    recording['count'] = 0
+    logger.info(f"📼 Запись обновлений в {path}")
+
+
+def stop_recording():
+    """Закрывает файл записи"""
+    if recording['file']:
+        recording['file'].close()
+        recording['file'] = None
+        logger.info(f"📼 Запись остановлена, записано обновлений: {recording['count']}")
+
+
+async def record_update(update: Update, context):
+    """Записывает анонимизированное обновление одной строкой JSON"""
+    if recording['file'] is None:
+        return
+    line = json.dumps(
+        {'t': round(time.monotonic() - recording['started'], 3), 'u': anonymize(update.to_dict())},
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    recording['file'].write(line + "\n")
+    recording['count'] += 1
+    # Сбрасываем буфер периодически, чтобы не терять запись при падении
+    if recording['count'] % 100 == 0:
+        recording['file'].flush()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from telegram import Update
+from config import settings
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Группа обработчика, запоминающего текущее обновление (раньше всех остальных)
+TRACKER_GROUP = -1000
+
+# Обновление, которое обрабатывается сейчас (обновления обрабатываются последовательно)
+current_update = {'update_id': None, 'user_id': None, 'text': None, 'started': None}
+
+# Состояние сторожа
+heartbeat = {'last': None, 'task': None, 'thread': None, 'stop': None}
+
+
+async def track_update(update: Update, context):
+    """Запоминает обрабатываемое обновление для отчетов о блокировках"""
+    message = update.effective_message
+    current_update['update_id'] = update.update_id
+    current_update['user_id'] = update.effective_user.id if update.effective_user else None
+    current_update['text'] = message.text if message else None
+    current_update['started'] = time.monotonic()
+
+
+async def beat():
+    """Пульс event loop: измеряет задержку пробуждения"""
+    interval = settings.WATCHDOG_INTERVAL
+    while True:
+        scheduled = time.monotonic()
+        heartbeat['last'] = scheduled
+        await asyncio.sleep(interval)
+        lag = time.monotonic() - scheduled - interval
+        metrics.observe('loop.lag', max(lag, 0.0))
+
+
+def find_handler_frame(frames) -> str:
+    """Находит самый глубокий кадр из пакета handlers — это работающий обработчик"""
+    for frame_summary in reversed(frames):
+        if '/handlers/' in frame_summary.filename.replace('\\', '/'):
+            return f"{frame_summary.name} ({frame_summary.filename.rsplit('/', 1)[-1]}:{frame_summary.lineno})"
+    return 'не найден'
+
+
+def report_stall(loop_thread_id: int, stalled_for: float):
+    """Снимает стек потока event loop и пишет отчет о блокировке"""
+    frame = sys._current_frames().get(loop_thread_id)
+    frames = traceback.extract_stack(frame) if frame is not None else []
+    
+    metrics.increment('loop.stalls')
+    metrics.set_gauge('loop.last_stall_seconds', round(stalled_for, 3))
+    
+    logger.warning(
+        f"🐌 Event loop заблокирован {stalled_for:.3f}с: "
+        f"обновление={current_update['update_id']}, пользователь={current_update['user_id']}, "
+        f"текст='{current_update['text']}', обработчик={find_handler_frame(frames)}\n"
+        + ''.join(traceback.format_list(frames))
+    )
+
+
+def watch(loop_thread_id: int, stop_event: threading.Event):
+    """Поток сторожа: проверяет, что пульс event loop не пропал"""
+    threshold = settings.WATCHDOG_STALL_THRESHOLD
+    reported_beat = None
+    while not stop_event.wait(threshold / 2):
+        last = heartbeat['last']
+        if last is None:
+            continue
+        stalled_for = time.monotonic() - last - settings.WATCHDOG_INTERVAL
+        # Одна блокировка — один отчет
+        if stalled_for >= threshold and reported_beat != last:
+            reported_beat = last
+            report_stall(loop_thread_id, stalled_for)
+
+
+def start_watchdog():
+    """Запускает пульс и поток сторожа (вызывать из event loop)"""
+    if heartbeat['task'] is not None:
+        return
+    heartbeat['last'] = time.monotonic()
+    heartbeat['task'] = asyncio.get_running_loop().create_task(beat())
+    heartbeat['stop'] = threading.Event()
+    heartbeat['thread'] = threading.Thread(
+        target=watch,
+        args=(threading.get_ident(), heartbeat['stop']),
+        name="loop-watchdog",
+        daemon=True
+    )
+    heartbeat['thread'].start()
+    logger.info(f"🐕 Сторож event loop запущен: порог {settings.WATCHDOG_STALL_THRESHOLD}с")
+
+
+def stop_watchdog():
+    """Останавливает сторожа"""
+    if heartbeat['task'] is None:
+        return
+    heartbeat['task'].cancel()
+    heartbeat['stop'].set()
+    heartbeat['thread'].join()
+    heartbeat.update({'last': None, 'task': None, 'thread': None, 'stop': None})